@@ -0,0 +1,95 @@
+# benchmarks/bench_compression.py
+"""
+Response compression: bytes and CPU per endpoint and encoding.
+
+Bodies are built the way the handlers build them (shaper() + BSONResponse)
+for a feed page, the club directory and the file catalogue. For each
+encoding it reports the wire size, the CPU spent compressing one response,
+and what the feed cache saves by compressing a page once instead of on
+every hit.
+
+Usage (from "Capstone Backend"):
+    python -m benchmarks.bench_compression --page 50 --hits 100
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from src.compression import compress, supported_encodings
+from src.schemas import ClubResponse, FeedPostResponse, FileMetadataResponse
+from src.serialization import BSONResponse, shaper
+
+
+def feed_page(count: int) -> bytes:
+    now = datetime.utcnow()
+    shape = shaper(FeedPostResponse)
+    docs = []
+    for i in range(count):
+        comments = [{"id": str(ObjectId()), "post_id": str(i), "user_id": str(ObjectId()),
+                     "content": f"Comment {j} on post {i}", "created_at": now} for j in range(3)]
+        docs.append({"_id": ObjectId(), "user_id": f"21BAI{i:05d}", "title": f"Post {i}",
+                     "content": "Lorem ipsum dolor sit amet " * 8, "comments_count": 3,
+                     "created_at": now - timedelta(seconds=i), "updated_at": now,
+                     "recent_comments": comments})
+    return BSONResponse([shape(doc) for doc in docs]).body
+
+
+def club_directory(count: int) -> bytes:
+    now = datetime.utcnow()
+    shape = shaper(ClubResponse)
+    docs = [{"_id": ObjectId(), "name": f"Club {i}", "description": "A student club " * 4,
+             "created_at": now, "created_by": str(ObjectId()),
+             "members": [str(ObjectId()) for _ in range(20)], "admins": [str(ObjectId())],
+             "image_url": f"https://res.cloudinary.com/demo/image/upload/club_{i}.png"}
+            for i in range(count)]
+    return BSONResponse([shape(doc) for doc in docs]).body
+
+
+def file_catalogue(count: int) -> bytes:
+    now = datetime.utcnow()
+    shape = shaper(FileMetadataResponse)
+    docs = [{"_id": ObjectId(), "user_id": str(ObjectId()), "file_name": f"notes_{i}.pdf",
+             "file_url": f"https://bucket.s3.ap-south-1.amazonaws.com/BCSE{i % 40:03d}/notes_{i}.pdf",
+             "file_type": "pdf", "uploaded_at": now - timedelta(minutes=i),
+             "course_id": str(ObjectId()), "uploaded_by": f"21BAI{i:05d}",
+             "course_code": f"BCSE{i % 40:03d}"}
+            for i in range(count)]
+    return BSONResponse({"files": [shape(doc) for doc in docs]}).body
+
+
+def timed(encoding: str, body: bytes, repeat: int) -> tuple:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = compress(body, encoding)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), len(out)
+
+
+def main(args):
+    endpoints = (("/posts/feed", feed_page(args.page)),
+                 ("/club-chat/clubs/all", club_directory(args.clubs)),
+                 ("/files/files", file_catalogue(args.files)))
+    for path, body in endpoints:
+        print(f"{path}  raw {len(body) / 1024:8.1f} KiB")
+        for encoding in supported_encodings():
+            cpu_ms, size = timed(encoding, body, args.repeat)
+            print(f"  {encoding:5} {size / 1024:8.1f} KiB  saved {1 - size / len(body):6.1%}  "
+                  f"{cpu_ms:7.3f} ms/response")
+            if path == "/posts/feed":
+                # Cached page: one compression per encoding instead of one per hit
+                print(f"        {args.hits} cache hits: {cpu_ms * args.hits:8.2f} ms recompressing"
+                      f" vs {cpu_ms:6.2f} ms precompressed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--page", type=int, default=50, help="Posts per feed page")
+    parser.add_argument("--clubs", type=int, default=200)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--hits", type=int, default=100, help="Cache hits per feed page")
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,113 @@
+# benchmarks/bench_concurrency.py
+"""
+Requests/sec of the read endpoints under concurrent clients, Motor vs pymongo.
+
+Seeds a benchmark database on a local mongod, starts uvicorn once per driver
+(MONGO_DRIVER=motor / pymongo) and drives each endpoint at 50 and 200
+concurrent clients.
+
+Usage (from "Capstone Backend", with mongod listening locally):
+    python -m benchmarks.bench_concurrency --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+from pymongo import MongoClient
+
+ENDPOINTS = [
+    "/api/v1/courses/all",
+    "/api/v1/users/posts/user/BENCH0001",
+    "/api/v1/club-chat/clubs/all",
+]
+
+
+def seed(uri: str, database: str):
+    db = MongoClient(uri)[database]
+    for name in ("courses", "posts", "comments", "clubs"):
+        db[name].drop()
+    now = datetime.utcnow()
+    db.courses.insert_many(
+        [{"name": f"Course {i}", "course_code": f"C{i:04d}", "created_at": now} for i in range(50)])
+    posts = db.posts.insert_many(
+        [{"user_id": "BENCH0001", "title": f"Post {i}", "content": "x" * 200,
+          "created_at": now, "updated_at": now} for i in range(50)])
+    db.comments.insert_many(
+        [{"post_id": post_id, "user_id": "bench", "content": "nice", "created_at": now}
+         for post_id in posts.inserted_ids for _ in range(3)])
+    db.clubs.insert_many(
+        [{"name": f"Club {i}", "description": "d", "created_at": now, "created_by": "bench",
+          "admins": [], "members": [], "faculty_advisor": [], "image_url": None} for i in range(30)])
+
+
+async def drive(base_url: str, path: str, total: int, concurrency: int) -> dict:
+    latencies = []
+    counter = iter(range(total))
+
+    async def client_loop(client):
+        for _ in counter:
+            started = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "req_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
+
+
+def start_server(driver: str, args) -> subprocess.Popen:
+    env = dict(os.environ, MONGODB_URI=args.mongodb_uri,
+               DATABASE_NAME=args.database, MONGO_DRIVER=driver)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(args.port),
+         "--log-level", "warning"],
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{args.port}/", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+async def main(args):
+    seed(args.mongodb_uri, args.database)
+    base_url = f"http://127.0.0.1:{args.port}"
+    for driver in ("pymongo", "motor"):
+        server = start_server(driver, args)
+        try:
+            for path in ENDPOINTS:
+                for concurrency in (50, 200):
+                    result = await drive(base_url, path, args.requests, concurrency)
+                    print(f"{driver:8} c={concurrency:<4} {path:40} {result}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="prabhavit_bench")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))
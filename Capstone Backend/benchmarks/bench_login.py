@@ -0,0 +1,80 @@
+# benchmarks/bench_login.py
+"""
+Login throughput: inline bcrypt on the request threadpool vs the process pool.
+
+Simulates a burst of concurrent logins while a probe keeps calling a cheap
+sync endpoint, which is what every other route in the app looks like to
+FastAPI. Reports logins/sec and how long the probe waited for a thread.
+
+Usage (from "Capstone Backend"):
+    python -m benchmarks.bench_login --logins 200 --concurrency 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from src.auth import hash_password, verify_password
+from src.hashing import HashingService
+
+
+async def probe(latencies: list, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await run_in_threadpool(lambda: None)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def run(verify, hashed: str, logins: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    stop = asyncio.Event()
+
+    async def login():
+        async with semaphore:
+            assert await verify("password", hashed)
+
+    probe_task = asyncio.create_task(probe(latencies, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+
+    latencies.sort()
+    return {
+        "logins_per_sec": round(logins / elapsed, 1),
+        "probe_p50_ms": round(statistics.median(latencies), 2),
+        "probe_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "probe_max_ms": round(latencies[-1], 2),
+    }
+
+
+async def main(args):
+    hashed = hash_password("password", args.rounds)
+
+    async def inline_verify(password, hashed_password):
+        return await run_in_threadpool(verify_password, password, hashed_password)
+
+    service = HashingService(workers=args.workers, queue_limit=args.logins)
+    service.start()
+    # Warm the worker processes so spawn cost is not counted
+    await asyncio.gather(*(service.verify("password", hashed) for _ in range(args.workers)))
+
+    print(f"{args.logins} logins, concurrency {args.concurrency}, "
+          f"bcrypt rounds {args.rounds}, pool workers {args.workers}")
+    print("inline:", await run(inline_verify, hashed, args.logins, args.concurrency))
+    print("pooled:", await run(service.verify, hashed, args.logins, args.concurrency))
+    service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=2)
+    asyncio.run(main(parser.parse_args()))
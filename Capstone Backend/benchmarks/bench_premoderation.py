@@ -0,0 +1,87 @@
+# benchmarks/bench_premoderation.py
+"""
+Local pre-moderation tier: escalation rate and latency per tier.
+
+Runs a corpus (one text per line, or a built-in sample of typical posts and
+comments) through the local tier and reports how much of it would still
+reach the model. With --live, escalated texts are sent to Gemini
+(GEMINI_API_KEY must be set) to measure the model tier's latency as well.
+
+Usage (from "Capstone Backend"):
+    python -m benchmarks.bench_premoderation [--corpus texts.txt] [--live]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+from src.gemini import moderation
+from src.premoderation import ESCALATE, premoderator
+
+SAMPLE = [
+    "Nice post!", "congrats", "Thanks for sharing", "When is the CAT-2 exam?",
+    "Anyone has notes for BCSE302L?", "Great work team", "See you at the fest",
+    "Is the library open on Sunday?", "lol", "Agreed", "This is so helpful, thank you!",
+    "Who is coming to the hackathon this weekend? We need one more member for the team.",
+    "Selling my old cycle, DM me", "check out pornhub", "send nudes",
+    "Visit www.free-money.xyz for free recharge", "THIS MESS IS UNACCEPTABLE FIX IT NOW",
+    "I will kill you", "p.o.r.n link in bio", "Long rant about the hostel mess food " * 4,
+    "The essex trip photos are up", "heyyyyyyyyyyyyyyyyyyyyy", "Happy birthday!!",
+    "you are a worthless idiot, nobody likes you", "send me your n00dz tonight", "🎉🎉",
+]
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(name: str, samples: list):
+    if not samples:
+        print(f"{name:6} no calls")
+        return
+    print(f"{name:6} n={len(samples):6}  p50 {percentile(samples, 50):9.3f} ms  "
+          f"p95 {percentile(samples, 95):9.3f} ms  p99 {percentile(samples, 99):9.3f} ms  "
+          f"mean {statistics.mean(samples):9.3f} ms")
+
+
+def main(args):
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = SAMPLE * args.repeat
+
+    decisions = Counter()
+    reasons = Counter()
+    local_ms, escalated = [], []
+    for text in texts:
+        started = time.perf_counter()
+        decision, _, reason = premoderator.classify({"content": text})
+        local_ms.append((time.perf_counter() - started) * 1000)
+        decisions[decision] += 1
+        if decision == ESCALATE:
+            reasons[reason.split(": ", 1)[1]] += 1
+            escalated.append(text)
+
+    print(f"{len(texts)} texts: " + ", ".join(f"{k} {v}" for k, v in sorted(decisions.items())))
+    print(f"escalation rate {decisions[ESCALATE] / len(texts):.1%}  "
+          f"({', '.join(f'{k} {v}' for k, v in reasons.most_common())})")
+    report("local", local_ms)
+
+    if args.live:
+        model_ms = []
+        for text in dict.fromkeys(escalated):
+            started = time.perf_counter()
+            asyncio.run(moderation.provider.check({"content": text}))
+            model_ms.append((time.perf_counter() - started) * 1000)
+        report("model", model_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="File with one text per line")
+    parser.add_argument("--repeat", type=int, default=200, help="Copies of the built-in sample")
+    parser.add_argument("--live", action="store_true", help="Also time escalated texts against Gemini")
+    main(parser.parse_args())
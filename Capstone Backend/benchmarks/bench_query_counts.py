@@ -0,0 +1,120 @@
+# benchmarks/bench_query_counts.py
+"""
+MongoDB commands issued per request as list sizes grow.
+
+With the request-scoped loaders the count must stay constant no matter how
+many posts, comments or members a response covers; a count that grows with
+N means an N+1 query pattern crept back in, and the script exits non-zero.
+tests/test_query_counts.py runs the same check against mongomock, with
+its own copy of the seed data (the seed_lists fixture).
+
+Usage (from "Capstone Backend", with mongod listening locally):
+    python -m benchmarks.bench_query_counts --sizes 10 50 200
+"""
+import argparse
+import os
+import sys
+import threading
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import MongoClient, monitoring
+
+SIZES = (10, 50, 200)
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def reset(self):
+        with self._lock:
+            self.counts = {}
+
+    def started(self, event):
+        with self._lock:
+            self.counts[event.command_name] = self.counts.get(event.command_name, 0) + 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.counts.values())
+
+
+def seed(db, size: int) -> dict:
+    for name in ("users", "posts", "comments", "clubs"):
+        db[name].drop()
+    now = datetime.utcnow()
+    users = db.users.insert_many(
+        [{"name": f"User {i}", "regno": f"BENCH{i:04d}", "email": f"u{i}@vitbhopal.ac.in",
+          "password_hash": "x"} for i in range(size + 1)])
+    owner = users.inserted_ids[0]
+    posts = db.posts.insert_many(
+        [{"user_id": "BENCH0000", "title": f"Post {i}", "content": "x" * 50,
+          "created_at": now, "updated_at": now} for i in range(size)])
+    db.comments.insert_many(
+        [{"post_id": str(post_id), "user_id": str(owner), "content": "nice", "created_at": now}
+         for post_id in posts.inserted_ids])
+    club = db.clubs.insert_one(
+        {"name": "Bench Club", "description": "d", "created_at": now, "created_by": str(owner),
+         "admins": [owner], "members": [owner] + users.inserted_ids[1:],
+         "pending_requests": users.inserted_ids[1:], "faculty_advisor": [], "image_url": None})
+    return {"owner": owner, "club_id": club.inserted_id}
+
+
+def main(args):
+    counter = CommandCounter()
+    # Must be registered before the app creates its client
+    monitoring.register(counter)
+    os.environ.update(MONGODB_URI=args.mongodb_uri, DATABASE_NAME=args.database,
+                      CREATE_INDEXES_ON_STARTUP="false")
+
+    from fastapi.testclient import TestClient
+    from src.auth import create_jwt_token
+    from src.dependencies import user_cache
+    from src.main import app
+
+    seed_db = MongoClient(args.mongodb_uri)[args.database]
+    commands = {}  # endpoint -> {size: command count}
+    with TestClient(app) as client:
+        for size in args.sizes:
+            ids = seed(seed_db, size)
+            # The reseeded users get new ids, so drop any cached lookups
+            user_cache.clear()
+            token = create_jwt_token({"regno": "BENCH0000", "email": "u0@vitbhopal.ac.in"})
+            client.cookies.set("access_token", token)
+            endpoints = [
+                "/api/v1/users/posts/user/BENCH0000",
+                f"/api/v1/users/comments/user/{ids['owner']}",
+                f"/api/v1/club-chat/{ids['club_id']}/participants",
+                f"/api/v1/club-chat/{ids['club_id']}/pending",
+            ]
+            for path in endpoints:
+                # Warm the user cache so only the handler's own queries are counted
+                client.get(path)
+                counter.reset()
+                response = client.get(path)
+                endpoint = path.replace(str(ids['club_id']), '{club}').replace(str(ids['owner']), '{user}')
+                commands.setdefault(endpoint, {})[size] = counter.total()
+                print(f"n={size:<5} {response.status_code} commands={counter.total():<3} {endpoint}")
+
+    growing = {endpoint: counts for endpoint, counts in commands.items()
+               if len(set(counts.values())) > 1}
+    for endpoint, counts in growing.items():
+        print(f"FAIL {endpoint}: commands grow with list size {counts}")
+    if growing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="prabhavit_bench")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    main(parser.parse_args())
@@ -0,0 +1,81 @@
+# benchmarks/bench_serialization.py
+"""
+List serialization: per-item Pydantic models + response_model vs orjson.
+
+"pydantic" mirrors what FastAPI did for /posts/all and /comment/all: build
+a model per document, validate the list against response_model, then encode
+it with JSONResponse. "orjson" is the shaper() + BSONResponse path. Both must
+produce the same JSON.
+
+Usage (from "Capstone Backend"):
+    python -m benchmarks.bench_serialization --docs 10000
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from src.schemas import CommentResponse, PostResponse
+from src.serialization import BSONResponse, shaper
+
+
+def post_docs(count: int) -> list:
+    now = datetime.utcnow()
+    return [{"_id": ObjectId(), "user_id": f"21BAI{i:05d}", "title": f"Post {i}",
+             "content": "Lorem ipsum dolor sit amet " * 8, "comments_count": i % 7,
+             "created_at": now - timedelta(seconds=i), "updated_at": now - timedelta(seconds=i)}
+            for i in range(count)]
+
+
+def comment_docs(count: int) -> list:
+    now = datetime.utcnow()
+    return [{"_id": ObjectId(), "user_id": str(ObjectId()), "post_id": str(ObjectId()),
+             "content": "Nice post!", "created_at": now - timedelta(seconds=i)}
+            for i in range(count)]
+
+
+def pydantic_path(schema, docs: list) -> bytes:
+    adapter = TypeAdapter(List[schema])
+    models = []
+    for doc in docs:
+        doc = dict(doc, id=str(doc["_id"]))
+        models.append(schema(**doc))
+    validated = adapter.validate_python(models, from_attributes=True)
+    return JSONResponse(content=adapter.dump_python(validated, mode="json")).body
+
+
+def orjson_path(schema, docs: list) -> bytes:
+    shape = shaper(schema)
+    return BSONResponse([shape(doc) for doc in docs]).body
+
+
+def timed(fn, *args, repeat: int) -> tuple:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), body
+
+
+def main(args):
+    for name, schema, docs in (("posts", PostResponse, post_docs(args.docs)),
+                               ("comments", CommentResponse, comment_docs(args.docs))):
+        slow_ms, slow_body = timed(pydantic_path, schema, docs, repeat=args.repeat)
+        fast_ms, fast_body = timed(orjson_path, schema, docs, repeat=args.repeat)
+        assert json.loads(slow_body) == json.loads(fast_body), f"{name}: outputs differ"
+        print(f"{name:9} n={args.docs}  pydantic {slow_ms:8.2f} ms  orjson {fast_ms:7.2f} ms  "
+              f"x{slow_ms / fast_ms:5.1f}  ({len(fast_body) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
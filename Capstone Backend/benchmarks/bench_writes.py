@@ -0,0 +1,235 @@
+# benchmarks/bench_writes.py
+"""
+Write-path latency: create_post, create_comment, upload_file and create_club.
+
+Starts the app under uvicorn against a local mongod, with Gemini, S3 and
+Cloudinary replaced by the in-process fakes in benchmarks/fakes.py (the
+server process installs them before serving). Each endpoint is driven by
+concurrent clients; p50/p95/p99 and throughput are printed and saved as
+JSON, together with the commit and settings, for comparison between commits.
+
+Usage (from "Capstone Backend", with mongod listening locally):
+    python -m benchmarks.bench_writes --requests 500 --gemini-latency lognormal:400,0.6
+    python -m benchmarks.bench_writes --compare benchmarks/results/writes-<commit>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from itertools import count
+
+import httpx
+from pymongo import MongoClient
+
+ENDPOINTS = ("create_post", "create_comment", "upload_file", "create_club")
+PASSWORD = "bench-password"
+METRICS_TOKEN = "bench-metrics"
+# Typical posts and comments; anything not allowlisted reaches the (fake) model
+TEXTS = [
+    "Anyone has notes for BCSE302L?",
+    "Notes from today's lab session on operating systems",
+    "Is the library open on Sunday?",
+    "Who is coming to the hackathon this weekend?",
+    "The Essex trip photos are up",
+]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def seed(args) -> dict:
+    db = MongoClient(args.mongodb_uri)[args.database]
+    for name in ("posts", "comments", "clubs", "courses", "file_metadata", "moderation_verdicts"):
+        db[name].drop()
+    db.users.delete_many({"regno": "BENCH0001"})
+    now = datetime.utcnow()
+    course = db.courses.insert_one({"name": "Bench Course", "course_code": "BENCH101",
+                                    "created_at": now, "students": []})
+    posts = db.posts.insert_many(
+        [{"user_id": "BENCH0001", "title": f"Seed {i}", "content": TEXTS[i % len(TEXTS)], "comments_count": 0,
+          "status": "published", "created_at": now, "updated_at": now} for i in range(20)])
+    return {"course_id": str(course.inserted_id),
+            "post_ids": [str(post_id) for post_id in posts.inserted_ids]}
+
+
+def serve(args):
+    """Server process: install the fakes, then run the app."""
+    import uvicorn
+    from benchmarks import fakes
+    fakes.install(gemini_latency=args.gemini_latency, s3_latency=args.s3_latency,
+                  cloudinary_latency=args.cloudinary_latency, s3=args.s3,
+                  gemini_error_rate=args.gemini_error_rate, seed=args.seed)
+    from src.main import app
+    uvicorn.run(app, port=args.port, log_level="warning")
+
+
+def start_server(args) -> subprocess.Popen:
+    env = dict(os.environ, MONGODB_URI=args.mongodb_uri, DATABASE_NAME=args.database,
+               AWS_ACCESS_KEY_ID="bench", AWS_SECRET_ACCESS_KEY="bench",
+               AWS_REGION=os.getenv("AWS_REGION") or "us-east-1",
+               S3_BUCKET_NAME=os.getenv("S3_BUCKET_NAME") or "bench-bucket",
+               METRICS_TOKEN=METRICS_TOKEN)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_writes", "--serve", *sys.argv[1:]], env=env)
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{args.port}/", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+def request_factory(endpoint: str, seeded: dict, args):
+    """Returns a function building the (method, path, kwargs) of the n-th request."""
+    pdf = b"%PDF-1.4\n" + os.urandom(args.file_kb * 1024) + b"\n%%EOF"
+    image = b"\x89PNG\r\n\x1a\n" + os.urandom(args.image_kb * 1024)
+    post_ids = seeded["post_ids"]
+
+    def unique(n: int) -> int:
+        # --duplicates of the texts repeat, which the verdict cache should absorb
+        return 0 if args.duplicates and n % 100 < args.duplicates * 100 else n
+
+    def build(n: int):
+        if endpoint == "create_post":
+            return "POST", "/api/v1/posts/create", {
+                "json": {"title": f"Bench post {unique(n)}", "content": f"{TEXTS[n % len(TEXTS)]} #{unique(n)}"}}
+        if endpoint == "create_comment":
+            return "POST", "/api/v1/comment/create", {
+                "json": {"post_id": post_ids[n % len(post_ids)], "content": f"{TEXTS[n % len(TEXTS)]} #{unique(n)}"}}
+        if endpoint == "upload_file":
+            return "POST", "/api/v1/files/upload", {
+                "data": {"file_name": f"notes_{n}.pdf", "course_id": seeded["course_id"]},
+                "files": {"file": (f"notes_{n}.pdf", pdf, "application/pdf")}}
+        return "POST", "/api/v1/club-chat/createclub", {
+            "data": {"name": f"Bench club {args.run_id}-{n}", "description": "Benchmark club"},
+            "files": {"image": ("club.png", image, "image/png")}}
+    return build
+
+
+async def drive(client, build, total: int, concurrency: int) -> dict:
+    latencies, errors = [], {}
+    counter = count()
+
+    async def client_loop():
+        while (n := next(counter)) < total:
+            method, path, kwargs = build(n)
+            started = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))], 2)
+    return {"requests": total, "concurrency": concurrency, "errors": errors,
+            "req_per_sec": round(total / elapsed, 1),
+            "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99), "max_ms": round(latencies[-1], 2)}
+
+
+async def login(client):
+    await client.post("/api/v1/users/register", json={
+        "name": "Bench", "email": "bench@vitbhopal.ac.in", "password": PASSWORD, "regno": "BENCH0001"})
+    response = await client.post("/api/v1/users/login", json={"regno": "BENCH0001", "password": PASSWORD})
+    response.raise_for_status()
+    client.cookies.set("access_token", response.json()["token"])
+
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline['commit']} ({baseline_path})")
+    for endpoint, result in current["results"].items():
+        before = baseline["results"].get(endpoint)
+        if not before:
+            continue
+        deltas = "  ".join(
+            f"{metric} {before[metric]:>8} -> {result[metric]:>8} ({(result[metric] / before[metric] - 1) * 100:+6.1f}%)"
+            for metric in ("p50_ms", "p95_ms", "p99_ms", "req_per_sec") if before[metric])
+        print(f"{endpoint:15} {deltas}")
+
+
+async def main(args):
+    seeded = seed(args)
+    server = start_server(args)
+    results = {}
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits,
+                                     timeout=120) as client:
+            await login(client)
+            for endpoint in args.endpoints:
+                build = request_factory(endpoint, seeded, args)
+                for n in range(min(args.warmup, args.requests)):
+                    method, path, kwargs = build(-1 - n)
+                    await client.request(method, path, **kwargs)
+                results[endpoint] = await drive(client, build, args.requests, args.concurrency)
+                print(f"{endpoint:15} {results[endpoint]}")
+            metrics = (await client.get(
+                "/metrics", headers={"Authorization": f"Bearer {METRICS_TOKEN}"})).json()
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "settings": {key: value for key, value in vars(args).items()
+                     if key not in ("serve", "compare", "output")},
+        "results": results,
+        "server_metrics": {key: metrics.get(key) for key in ("moderation", "moderation_queue")},
+    }
+    output = args.output or os.path.join("benchmarks", "results", f"writes-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"saved {output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="prabhavit_bench")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=300, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--gemini-latency", default="lognormal:400,0.5",
+                        help="fixed:MS, uniform:LO,HI, lognormal:MEDIAN,SIGMA, exponential:MEAN or none")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--s3-latency", default="lognormal:80,0.4")
+    parser.add_argument("--cloudinary-latency", default="lognormal:300,0.4")
+    parser.add_argument("--s3", choices=("memory", "moto"), default="memory",
+                        help="In-memory S3 stand-in, or moto if installed")
+    parser.add_argument("--file-kb", type=int, default=512, help="Size of each uploaded PDF")
+    parser.add_argument("--image-kb", type=int, default=64, help="Size of each club image")
+    parser.add_argument("--duplicates", type=float, default=0.0,
+                        help="Fraction of posts/comments repeating earlier text")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--run-id", default=str(int(time.time())), help="Keeps club names unique")
+    parser.add_argument("--output", help="JSON file (default benchmarks/results/writes-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier JSON result to compare against")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parsed = parser.parse_args()
+    if parsed.serve:
+        serve(parsed)
+    else:
+        asyncio.run(main(parsed))
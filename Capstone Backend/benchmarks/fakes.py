@@ -0,0 +1,186 @@
+# benchmarks/fakes.py
+"""
+In-process stand-ins for the cloud services on the write paths.
+
+- Gemini: `FakeGeminiProvider`, a moderation provider whose latency follows
+  a configurable distribution (see `latency`).
+- S3: `FakeS3`, an in-memory bucket with the parts of the boto3 client the
+  routes call; with `s3="moto"` the real client runs against moto instead.
+- Cloudinary: `fake_cloudinary_upload`, swapped in for cloudinary.uploader.upload.
+
+`install()` patches them into the app modules before the app starts.
+"""
+import asyncio
+import random
+import threading
+import time
+import uuid
+
+from src.moderation_providers import ModerationProvider, ResilientProvider, Verdict
+
+
+def latency(spec: str, seed: int = 0):
+    """
+    Returns a function drawing one latency in seconds from `spec` (milliseconds):
+    "fixed:200", "uniform:100,400", "lognormal:200,0.5" (median, sigma),
+    "exponential:200" (mean), or "none".
+    """
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    draws = {
+        "none": lambda: 0.0,
+        "fixed": lambda: values[0],
+        "uniform": lambda: rng.uniform(values[0], values[1]),
+        "lognormal": lambda: rng.lognormvariate(0, values[1]) * values[0],
+        "exponential": lambda: rng.expovariate(1 / values[0]),
+    }
+    if kind not in draws:
+        raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def draw() -> float:
+        with lock:
+            return max(0.0, draws[kind]()) / 1000
+    return draw
+
+
+class FakeGeminiProvider(ModerationProvider):
+    """Flags text containing `marker`; sleeps a latency drawn per call."""
+
+    name = "fake-gemini"
+
+    def __init__(self, delay, error_rate: float = 0.0, marker: str = "[nsfw]", seed: int = 0):
+        self.delay = delay
+        self.error_rate = error_rate
+        self.marker = marker
+        self._rng = random.Random(seed)
+
+    async def check(self, fields: dict, timeout: float) -> Verdict:
+        await asyncio.sleep(self.delay())
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise RuntimeError("fake Gemini error")
+        flagged = [name for name, text in fields.items() if self.marker in (text or "").lower()]
+        return Verdict(nsfw=bool(flagged), flagged_fields=flagged)
+
+
+class FakeS3:
+    """In-memory S3 client: objects are kept as {key: (body, metadata)} per bucket."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.objects = {}
+        self.multipart = {}  # upload id -> (bucket, key, extra args, {part number: body})
+        self._lock = threading.Lock()
+
+    def _store(self, bucket: str, key: str, body: bytes, content_type: str = None, metadata=None):
+        time.sleep(self.delay())
+        with self._lock:
+            self.objects[(bucket, key)] = (body, {"ContentType": content_type,
+                                                  "Metadata": metadata or {}})
+
+    def upload_fileobj(self, fileobj, bucket: str, key: str, ExtraArgs: dict = None, **kwargs):
+        extra = ExtraArgs or {}
+        self._store(bucket, key, fileobj.read(), extra.get("ContentType"), extra.get("Metadata"))
+
+    def put_object(self, Bucket: str, Key: str, Body=b"", ContentType: str = None,
+                   Metadata: dict = None, **kwargs):
+        body = Body.read() if hasattr(Body, "read") else Body
+        self._store(Bucket, Key, body, ContentType, Metadata)
+        return {"ETag": f'"{uuid.uuid4().hex}"'}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, ContentType: str = None,
+                                Metadata: dict = None, **kwargs):
+        time.sleep(self.delay())
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self.multipart[upload_id] = (Bucket, Key, (ContentType, Metadata), {})
+        return {"Bucket": Bucket, "Key": Key, "UploadId": upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body=b"", **kwargs):
+        body = Body.read() if hasattr(Body, "read") else Body
+        time.sleep(self.delay())
+        with self._lock:
+            self.multipart[UploadId][3][PartNumber] = body
+        return {"ETag": f'"{uuid.uuid4().hex}"'}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str,
+                                  MultipartUpload: dict, **kwargs):
+        time.sleep(self.delay())
+        with self._lock:
+            _, _, (content_type, metadata), parts = self.multipart.pop(UploadId)
+            body = b"".join(parts[part["PartNumber"]] for part in MultipartUpload["Parts"])
+            self.objects[(Bucket, Key)] = (body, {"ContentType": content_type,
+                                                  "Metadata": metadata or {}})
+        return {"Bucket": Bucket, "Key": Key}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str, **kwargs):
+        with self._lock:
+            self.multipart.pop(UploadId, None)
+
+    def generate_presigned_post(self, Bucket: str, Key: str, Fields: dict = None,
+                                Conditions: list = None, ExpiresIn: int = 3600):
+        return {"url": f"https://{Bucket}.s3.amazonaws.com/",
+                "fields": dict(Fields or {}, key=Key, policy=uuid.uuid4().hex, signature="fake")}
+
+    def generate_presigned_url(self, ClientMethod: str, Params: dict = None, ExpiresIn: int = 3600):
+        params = Params or {}
+        return (f"https://{params.get('Bucket')}.s3.amazonaws.com/{params.get('Key')}"
+                f"?X-Amz-Expires={ExpiresIn}&X-Amz-Signature={uuid.uuid4().hex}")
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs):
+        time.sleep(self.delay())
+        with self._lock:
+            self.objects.pop((Bucket, Key), None)
+
+    def head_object(self, Bucket: str, Key: str, **kwargs):
+        time.sleep(self.delay())
+        with self._lock:
+            entry = self.objects.get((Bucket, Key))
+        if entry is None:
+            from botocore.exceptions import ClientError
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        body, meta = entry
+        return {"ContentLength": len(body), "ContentType": meta["ContentType"],
+                "Metadata": meta["Metadata"]}
+
+
+def fake_cloudinary_upload(delay):
+    def upload(file, folder: str = "", **kwargs):
+        data = file.read() if hasattr(file, "read") else file
+        time.sleep(delay())
+        public_id = f"{folder}/{uuid.uuid4().hex}"
+        return {"public_id": public_id, "bytes": len(data),
+                "secure_url": f"https://res.cloudinary.com/bench/image/upload/{public_id}"}
+    return upload
+
+
+def install(gemini_latency: str = "none", s3_latency: str = "none",
+            cloudinary_latency: str = "none", s3: str = "memory",
+            gemini_error_rate: float = 0.0, seed: int = 0) -> dict:
+    """Patches the fakes into the app; returns them by service name."""
+    import cloudinary.uploader
+    import src.gemini
+    import src.routes.file
+
+    provider = FakeGeminiProvider(latency(gemini_latency, seed), gemini_error_rate, seed=seed)
+    src.gemini.moderation.provider = ResilientProvider(provider)
+
+    if s3 == "moto":
+        from moto import mock_aws
+        import boto3
+        mock_aws().start()
+        # Clients created before the mock started would still talk to AWS
+        region = src.routes.file.AWS_REGION or "us-east-1"
+        storage = boto3.client("s3", region_name=region)
+        bucket = {"Bucket": src.routes.file.S3_BUCKET_NAME}
+        if region != "us-east-1":
+            bucket["CreateBucketConfiguration"] = {"LocationConstraint": region}
+        storage.create_bucket(**bucket)
+        src.routes.file.s3 = storage
+    else:
+        storage = FakeS3(latency(s3_latency, seed + 1))
+        src.routes.file.s3 = storage
+
+    cloudinary.uploader.upload = fake_cloudinary_upload(latency(cloudinary_latency, seed + 2))
+    return {"gemini": provider, "s3": storage}
@@ -2,6 +2,7 @@
 import os
 from jose import jwt
 from passlib.context import CryptContext
+from passlib.hash import bcrypt
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,14 +12,18 @@ load_dotenv()
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 # Use a strong secret key in production
 JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key")
+# Sign the user id and administered clubs into tokens so admin checks skip Mongo
+JWT_ROLE_CLAIMS = os.getenv("JWT_ROLE_CLAIMS", "false").lower() in ("1", "true", "yes")
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt."""
-    return pwd_context.hash(password)
+def hash_password(password: str, rounds: int = None) -> str:
+    """Hash a password using bcrypt, optionally with an explicit cost factor."""
+    if rounds is None:
+        return pwd_context.hash(password)
+    return bcrypt.using(rounds=rounds).hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -26,6 +31,22 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def build_token_claims(user: dict, administered_club_ids=None) -> dict:
+    """
+    Build the JWT payload for a user.
+
+    With `administered_club_ids` the token also carries the user id (`uid`),
+    the administered club ids (`adm`) and the user's `claims_version` (`cv`).
+    Bumping `claims_version` on the user document makes older role claims stale.
+    """
+    claims = {"regno": user["regno"], "email": user["email"]}
+    if administered_club_ids is not None:
+        claims["uid"] = str(user["_id"])
+        claims["adm"] = sorted({str(club_id) for club_id in administered_club_ids})
+        claims["cv"] = user.get("claims_version", 0)
+    return claims
+
+
 def create_jwt_token(data: dict) -> str:
     """Create a JWT token."""
     return jwt.encode(data, JWT_SECRET, algorithm=ALGORITHM)
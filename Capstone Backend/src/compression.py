@@ -0,0 +1,216 @@
+# src/compression.py
+"""
+gzip/brotli response compression.
+
+CompressionMiddleware negotiates an encoding from Accept-Encoding and
+compresses compressible responses of at least COMPRESSION_MIN_SIZE bytes;
+streamed responses are compressed chunk by chunk. Responses that already
+carry a Content-Encoding (e.g. precompressed cache entries) pass through.
+A strong ETag on a response that gets compressed is sent weak (W/"...").
+"""
+import gzip
+import os
+import threading
+import time
+import zlib
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Load environment variables
+load_dotenv()
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def supported_encodings() -> tuple:
+    """Encodings in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str):
+    """Picks the preferred supported encoding the client accepts, or None."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.encodings = {}
+
+    def record(self, encoding: str, raw: int, compressed: int, elapsed_ms: float):
+        with self._lock:
+            entry = self.encodings.setdefault(
+                encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_ms": 0.0})
+            entry["responses"] += 1
+            entry["bytes_in"] += raw
+            entry["bytes_out"] += compressed
+            entry["cpu_ms"] += elapsed_ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                encoding: dict(entry, cpu_ms=round(entry["cpu_ms"], 3),
+                               ratio=round(entry["bytes_out"] / entry["bytes_in"], 4)
+                               if entry["bytes_in"] else 0.0)
+                for encoding, entry in self.encodings.items()
+            }
+
+
+compression_stats = CompressionStats()
+
+
+class _Compressor:
+    """Incremental compressor with the same interface for both encodings."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits 31: gzip container
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_ms = 0.0
+
+    def _timed(self, fn, *args) -> bytes:
+        started = time.perf_counter()
+        out = fn(*args)
+        self.cpu_ms += (time.perf_counter() - started) * 1000
+        self.bytes_out += len(out)
+        return out
+
+    def compress(self, data: bytes) -> bytes:
+        self.bytes_in += len(data)
+        if self.encoding == "br":
+            return self._timed(self._compressor.process, data) + self._timed(self._compressor.flush)
+        return self._timed(self._compressor.compress, data) + self._timed(
+            self._compressor.flush, zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        out = self._timed(self._compressor.finish if self.encoding == "br" else self._compressor.flush)
+        compression_stats.record(self.encoding, self.bytes_in, self.bytes_out, self.cpu_ms)
+        return out
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compresses a complete body in one call."""
+    started = time.perf_counter()
+    if encoding == "br":
+        out = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        out = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    compression_stats.record(encoding, len(body), len(out), (time.perf_counter() - started) * 1000)
+    return out
+
+
+def is_compressible(headers) -> bool:
+    content_type = headers.get("content-type", "")
+    return (not headers.get("content-encoding")
+            and any(content_type.startswith(kind) for kind in COMPRESSIBLE_TYPES))
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            if message["status"] < 200 or message["status"] in (204, 304) or not is_compressible(headers):
+                self.passthrough = True
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            # First body message decides: small complete bodies go out as they are
+            if not more_body and len(body) < self.minimum_size:
+                await self.send(self.start_message)
+                self.start_message = None
+                await self.send(message)
+                return
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # A strong tag promises identical bytes; the encoded body is not
+                headers["ETag"] = "W/" + etag
+            if "content-length" in headers:
+                del headers["content-length"]
+            if not more_body:
+                body = compress(body, self.encoding)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start_message)
+                self.start_message = None
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            self.compressor = _Compressor(self.encoding)
+            await self.send(self.start_message)
+            self.start_message = None
+
+        chunk = self.compressor.compress(body) if body else b""
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
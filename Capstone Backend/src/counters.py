@@ -0,0 +1,140 @@
+# src/counters.py
+"""
+Denormalized activity counters.
+
+posts.comments_count, users.posts_count and users.comments_count are kept
+with $inc by the post/comment write paths, so profile and feed reads never
+count documents. Anything that drifts (crashes between writes, manual
+edits, documents from before the counters existed) is fixed by the repair
+job:
+
+    python -m src.counters            # recompute and fix drifted counters
+    python -m src.counters --dry-run  # only report them
+"""
+import argparse
+import asyncio
+import logging
+from bson import ObjectId
+from pymongo import UpdateOne
+from src.database import get_database
+from src.moderation_queue import VISIBLE
+
+# Updates sent per bulk_write by the repair job
+REPAIR_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+# Database
+db = get_database()
+users_collection = db.users
+posts_collection = db.posts
+comments_collection = db.comments
+
+
+async def post_created(regno: str):
+    # posts.user_id holds the author's regno
+    await users_collection.update_one({"regno": regno}, {"$inc": {"posts_count": 1}})
+
+
+async def post_deleted(regno: str, comments_by_user: dict):
+    """
+    Decrements the author's posts_count and, for the comments deleted with
+    the post, each commenter's comments_count ({user id: deleted comments}).
+    """
+    await users_collection.update_one({"regno": regno}, {"$inc": {"posts_count": -1}})
+    updates = [UpdateOne({"_id": ObjectId(user_id)}, {"$inc": {"comments_count": -count}})
+               for user_id, count in comments_by_user.items() if ObjectId.is_valid(user_id)]
+    if updates:
+        await users_collection.bulk_write(updates, ordered=False)
+
+
+async def comment_created(post_id, user_id):
+    await posts_collection.update_one({"_id": post_id}, {"$inc": {"comments_count": 1}})
+    await users_collection.update_one({"_id": user_id}, {"$inc": {"comments_count": 1}})
+
+
+async def comment_deleted(post_id, user_id):
+    await posts_collection.update_one({"_id": post_id}, {"$inc": {"comments_count": -1}})
+    await users_collection.update_one({"_id": user_id}, {"$inc": {"comments_count": -1}})
+
+
+async def _group_counts(collection, field: str) -> dict:
+    # Ids are compared as strings: comments store post_id/user_id as str, older ones as ObjectId.
+    # Pending and rejected documents are not counted until they are published.
+    pipeline = [
+        {"$match": VISIBLE},
+        {"$group": {"_id": {"$toString": f"${field}"}, "count": {"$sum": 1}}},
+    ]
+    return {row["_id"]: row["count"]
+            for row in await collection.aggregate(pipeline).to_list(length=None)}
+
+
+async def _repair(collection, expected: dict, dry_run: bool) -> dict:
+    """
+    Sets each counter to its recomputed value.
+
+    `expected` maps a counter field to (key, counts): key(doc) is the id the
+    source collection references the document by. Each update is conditional
+    on the value that was read, so an $inc landing while the job runs is not
+    overwritten; that document is simply picked up again on the next run.
+    """
+    fixed = {field: 0 for field in expected}
+    updates = []
+    projection = {field: 1 for field in expected}
+    projection["regno"] = 1
+    async for doc in collection.find({}, projection):
+        for field, (key, counts) in expected.items():
+            value = counts.get(key(doc), 0)
+            if doc.get(field) != value:
+                fixed[field] += 1
+                # {field: None} also matches documents without the counter
+                updates.append(UpdateOne({"_id": doc["_id"], field: doc.get(field)},
+                                         {"$set": {field: value}}))
+        if not dry_run and len(updates) >= REPAIR_BATCH_SIZE:
+            await collection.bulk_write(updates, ordered=False)
+            updates = []
+    if not dry_run and updates:
+        await collection.bulk_write(updates, ordered=False)
+    return fixed
+
+
+async def repair_counters(db=None, dry_run: bool = False) -> dict:
+    """Recomputes every counter from the source collections and fixes the drifted ones."""
+    db = db if db is not None else get_database()
+    comments_per_post = await _group_counts(db.comments, "post_id")
+    posts_per_user = await _group_counts(db.posts, "user_id")
+    comments_per_user = await _group_counts(db.comments, "user_id")
+
+    def by_id(doc):
+        return str(doc["_id"])
+
+    def by_regno(doc):
+        return doc.get("regno")
+
+    return {
+        "posts": await _repair(db.posts, {
+            "comments_count": (by_id, comments_per_post),
+        }, dry_run),
+        # posts reference their author by regno, comments by user id
+        "users": await _repair(db.users, {
+            "posts_count": (by_regno, posts_per_user),
+            "comments_count": (by_id, comments_per_user),
+        }, dry_run),
+    }
+
+
+async def main(args):
+    fixed = await repair_counters(dry_run=args.dry_run)
+    action = "drifted" if args.dry_run else "fixed"
+    for collection_name, counts in fixed.items():
+        for field, count in counts.items():
+            logger.info(f"{collection_name}.{field}: {count} {action}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Recompute denormalized activity counters")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="report drifted counters without fixing them")
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
@@ -1,7 +1,11 @@
 # src/database.py
+import asyncio
+import itertools
+from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
+from src.monitoring import pool_metrics
 
 # Load environment variables
 load_dotenv()
@@ -9,12 +13,206 @@ load_dotenv()
 # MongoDB connection
 MONGODB_URI = os.getenv("MONGODB_URI")
 DATABASE_NAME = os.getenv("DATABASE_NAME")
+# "motor" (default) or "pymongo"; the blocking driver is kept for comparison
+MONGO_DRIVER = os.getenv("MONGO_DRIVER", "motor").lower()
+
+# Connection pool tuning
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS")
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 30000))
+# Comma separated, e.g. "zstd,snappy,zlib"
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS")
+# e.g. "local", "majority"
+MONGO_READ_CONCERN = os.getenv("MONGO_READ_CONCERN")
+
+# Documents fetched per thread hop when iterating a pymongo cursor
+THREADED_BATCH_SIZE = 100
+
+
+class ThreadedCursor:
+    """
+    Motor-style cursor over a blocking pymongo cursor.
+
+    Chained modifiers are recorded and applied when the cursor is opened;
+    fetching runs in a worker thread so the event loop is never blocked.
+    """
+
+    def __init__(self, open_cursor):
+        self._open_cursor = open_cursor
+        self._modifiers = []
+        self._cursor = None
+        self._batch_size = THREADED_BATCH_SIZE
+
+    def _chain(self, name, *args, **kwargs):
+        self._modifiers.append((name, args, kwargs))
+        return self
+
+    def sort(self, *args, **kwargs):
+        return self._chain("sort", *args, **kwargs)
+
+    def limit(self, *args, **kwargs):
+        return self._chain("limit", *args, **kwargs)
+
+    def skip(self, *args, **kwargs):
+        return self._chain("skip", *args, **kwargs)
+
+    def batch_size(self, batch_size):
+        # Also the number of documents fetched per thread hop
+        self._batch_size = batch_size
+        return self._chain("batch_size", batch_size)
+
+    def _open(self):
+        cursor = self._open_cursor()
+        for name, args, kwargs in self._modifiers:
+            cursor = getattr(cursor, name)(*args, **kwargs)
+        return cursor
+
+    async def to_list(self, length=None):
+        def fetch():
+            cursor = self._open()
+            return list(itertools.islice(cursor, length))
+        return await asyncio.to_thread(fetch)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._cursor is None:
+            self._cursor = await asyncio.to_thread(self._open)
+            self._buffer = []
+        if not self._buffer:
+            self._buffer = await asyncio.to_thread(
+                lambda: list(itertools.islice(self._cursor, self._batch_size)))
+            if not self._buffer:
+                raise StopAsyncIteration
+            self._buffer.reverse()
+        return self._buffer.pop()
+
+
+class ThreadedCollection:
+    """Awaitable facade over a pymongo collection with the same call shapes as Motor."""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, *args, **kwargs):
+        return ThreadedCursor(lambda: self._collection.find(*args, **kwargs))
+
+    def aggregate(self, *args, **kwargs):
+        return ThreadedCursor(lambda: self._collection.aggregate(*args, **kwargs))
+
+    def list_indexes(self, *args, **kwargs):
+        return ThreadedCursor(lambda: self._collection.list_indexes(*args, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(attr, *args, **kwargs)
+        return call
+
+
+class ThreadedDatabase:
+    def __init__(self, database):
+        self._database = database
+        self.name = database.name
+
+    def __getattr__(self, name):
+        return ThreadedCollection(self._database[name])
+
+    def __getitem__(self, name):
+        return ThreadedCollection(self._database[name])
+
+    async def command(self, *args, **kwargs):
+        return await asyncio.to_thread(self._database.command, *args, **kwargs)
+
+
+class LazyCollection:
+    """Resolves the collection on each attribute access, so it follows the current client."""
+
+    def __init__(self, name):
+        self.name = name
+        self._database = None
+        self._collection = None
+
+    def __getattr__(self, attr):
+        database = _current_database()
+        if database is not self._database:
+            self._database = database
+            self._collection = database[self.name]
+        return getattr(self._collection, attr)
+
+
+class LazyDatabase:
+    """
+    Database handle that routers can capture at import time.
+
+    The client itself is only created by connect() (from the app lifespan),
+    after uvicorn has forked its workers.
+    """
+
+    def __getattr__(self, name):
+        return LazyCollection(name)
+
+    def __getitem__(self, name):
+        return LazyCollection(name)
+
+    async def command(self, *args, **kwargs):
+        return await _current_database().command(*args, **kwargs)
+
+
+client = None
+_database = None
+
+
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [pool_metrics],
+    }
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = int(MONGO_WAIT_QUEUE_TIMEOUT_MS)
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    if MONGO_READ_CONCERN:
+        options["readConcernLevel"] = MONGO_READ_CONCERN
+    return options
+
+
+def connect():
+    """Creates the MongoDB client for this process if it does not exist yet."""
+    global client, _database
+    if client is None:
+        if MONGO_DRIVER == "pymongo":
+            client = MongoClient(MONGODB_URI, **client_options())
+            _database = ThreadedDatabase(client.get_database(DATABASE_NAME))
+        else:
+            client = AsyncIOMotorClient(MONGODB_URI, **client_options())
+            _database = client.get_database(DATABASE_NAME)
+    return client
+
+
+def close():
+    global client, _database
+    if client is not None:
+        client.close()
+        client = None
+        _database = None
+
+
+def _current_database():
+    if _database is None:
+        connect()
+    return _database
 
-# Create MongoDB client
-client = MongoClient(MONGODB_URI)
 
 # Get the database
 
 
 def get_database():
-    return client.get_database(DATABASE_NAME)
+    return LazyDatabase()
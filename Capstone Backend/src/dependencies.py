@@ -0,0 +1,146 @@
+# src/dependencies.py
+import os
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, Request, status
+from dotenv import load_dotenv
+from src.auth import decode_jwt_token
+from src.cache import TTLCache
+from src.database import get_database
+from src.serialization import BSONResponse
+
+# Load environment variables
+load_dotenv()
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 60))
+
+# Database
+db = get_database()
+users_collection = db.users
+
+# Fields never needed once a request is authenticated
+USER_PROJECTION = {"password_hash": 0}
+
+# access token -> (user document, token claims), tagged with the user's id
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+async def get_current_user(request: Request) -> dict:
+    """
+    Resolves the user behind the `access_token` cookie.
+
+    FastAPI runs a dependency once per request, and the user document is
+    cached per token, so repeated requests with the same token skip Mongo.
+
+    Raises:
+        HTTPException: 401 if the token is missing or invalid, 404 if the user no longer exists.
+    """
+    token = request.cookies.get("access_token")
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token not found")
+
+    entry = user_cache.get(token)
+    if entry is None:
+        token_data = decode_jwt_token(token)
+        if not token_data or "regno" not in token_data:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+        user = await users_collection.find_one(
+            {"regno": token_data["regno"]}, USER_PROJECTION)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        entry = (user, token_data)
+        user_cache.set(token, entry, tags=(str(user["_id"]),))
+
+    user, request.state.token_claims = entry
+    # Handlers reshape the document for responses; keep the cached copy intact
+    return dict(user)
+
+
+async def get_optional_user(request: Request) -> Optional[dict]:
+    """Like get_current_user, but None for anonymous or invalid tokens."""
+    if not request.cookies.get("access_token"):
+        return None
+    try:
+        return await get_current_user(request)
+    except HTTPException:
+        return None
+
+
+def get_admin_clubs(request: Request, user: dict = Depends(get_current_user)):
+    """
+    Club ids the caller administers, taken from role-carrying token claims.
+
+    Returns None when the token has no role claims or its claims version no
+    longer matches the user document; callers then check the club document.
+    """
+    claims = request.state.token_claims
+    if "adm" not in claims:
+        return None
+    if claims.get("cv") != user.get("claims_version", 0):
+        return None
+    return frozenset(claims["adm"])
+
+
+def invalidate_user(user_id) -> None:
+    """Drops every cached token entry for a user whose document has changed."""
+    user_cache.invalidate_tag(str(user_id))
+
+
+class FieldSelection:
+    """
+    Fields requested with `?fields=`.
+
+    `projection` is pushed down to Mongo, and `respond` trims the formatted
+    result to the same fields. The id is always returned.
+    """
+
+    def __init__(self, fields: frozenset = None):
+        self.fields = fields
+
+    def __bool__(self):
+        return bool(self.fields)
+
+    def __contains__(self, field):
+        return not self.fields or field in self.fields
+
+    @property
+    def projection(self) -> Optional[dict]:
+        if not self.fields:
+            return None
+        return {field: 1 for field in self.fields if field != "id"}
+
+    def select(self, item: dict) -> dict:
+        id_key = "id" if "id" in item else "_id"
+        return {key: value for key, value in item.items()
+                if key in self.fields or key == id_key}
+
+    def respond(self, result):
+        """Returns `result` untouched without a selection, else the trimmed JSON."""
+        if not self.fields:
+            return result
+        if isinstance(result, list):
+            return BSONResponse([self.select(item) for item in result])
+        return BSONResponse(self.select(result))
+
+
+def sparse_fields(schema, extra=()):
+    """Builds a `?fields=` dependency accepting the fields of `schema` (plus `extra`)."""
+    allowed = frozenset(schema.model_fields) | frozenset(extra)
+
+    def dependency(fields: Optional[str] = Query(
+            None, description="Comma separated list of fields to return")) -> FieldSelection:
+        if not fields:
+            return FieldSelection()
+        requested = frozenset(f.strip() for f in fields.split(",") if f.strip())
+        unknown = requested - allowed
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        return FieldSelection(requested)
+
+    return dependency
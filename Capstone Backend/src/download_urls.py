@@ -0,0 +1,90 @@
+# src/download_urls.py
+"""
+Presigned download URLs, cached per object.
+
+A URL is signed for DOWNLOAD_URL_EXPIRY seconds and reused until
+DOWNLOAD_URL_MARGIN seconds before it expires, so a file downloaded
+hundreds of times costs one signing per expiry window; every redirect
+still leaves the client at least the margin to follow it. The S3 key and
+name of each file are cached as well, so repeat downloads do not read
+Mongo either. Deleting a file drops both entries.
+"""
+import os
+import threading
+import time
+from urllib.parse import quote
+from dotenv import load_dotenv
+from src.cache import TTLCache
+
+# Load environment variables
+load_dotenv()
+
+DOWNLOAD_URL_EXPIRY = int(os.getenv("DOWNLOAD_URL_EXPIRY", 3600))
+DOWNLOAD_URL_MARGIN = min(int(os.getenv("DOWNLOAD_URL_MARGIN", 300)), DOWNLOAD_URL_EXPIRY // 2)
+DOWNLOAD_CACHE_SIZE = int(os.getenv("DOWNLOAD_CACHE_SIZE", 10000))
+# How long a file's key and name are trusted without rereading Mongo
+FILE_CACHE_TTL = float(os.getenv("FILE_CACHE_TTL", 600))
+
+
+def key_from_url(file_url: str) -> str:
+    """S3 key of files stored before s3_key was recorded, taken from their public URL."""
+    return file_url.split(".amazonaws.com/", 1)[-1]
+
+
+class DownloadUrls:
+    def __init__(self, maxsize: int = DOWNLOAD_CACHE_SIZE, expiry: int = DOWNLOAD_URL_EXPIRY,
+                 margin: int = DOWNLOAD_URL_MARGIN, file_ttl: float = FILE_CACHE_TTL):
+        self.expiry = expiry
+        self.margin = margin
+        # S3 key -> (url, monotonic time it stops being handed out)
+        self._urls = TTLCache(maxsize=maxsize, ttl=expiry - margin)
+        # file id -> (S3 key, file name)
+        self._files = TTLCache(maxsize=maxsize, ttl=file_ttl)
+        self._lock = threading.Lock()
+        self.signed = 0
+
+    def get_file(self, file_id: str):
+        return self._files.get(file_id)
+
+    def set_file(self, file_id: str, key: str, file_name: str):
+        self._files.set(file_id, (key, file_name))
+
+    def url_for(self, client, bucket: str, key: str, file_name: str):
+        """Returns (url, seconds it will still be handed out for)."""
+        entry = self._urls.get(key)
+        if entry is None:
+            # Signing is local, so two concurrent misses just sign twice
+            url = client.generate_presigned_url(
+                "get_object",
+                Params={
+                    "Bucket": bucket,
+                    "Key": key,
+                    "ResponseContentDisposition":
+                        f"attachment; filename*=UTF-8''{quote(file_name)}",
+                },
+                ExpiresIn=self.expiry)
+            entry = (url, time.monotonic() + self.expiry - self.margin)
+            self._urls.set(key, entry)
+            with self._lock:
+                self.signed += 1
+        url, reuse_until = entry
+        return url, max(0, int(reuse_until - time.monotonic()))
+
+    def forget(self, file_id: str, key: str = None):
+        self._files.delete(file_id)
+        if key is not None:
+            self._urls.delete(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            signed = self.signed
+        return {
+            "expiry": self.expiry,
+            "margin": self.margin,
+            "signed": signed,
+            "urls": self._urls.stats(),
+            "files": self._files.stats(),
+        }
+
+
+download_urls = DownloadUrls()
@@ -0,0 +1,86 @@
+# src/etags.py
+import hashlib
+from typing import Optional
+from bson import ObjectId
+from fastapi import Depends, Request, Response
+from pymongo.errors import DuplicateKeyError
+from src.database import get_database
+from src.streaming import stream_format
+
+# Database
+db = get_database()
+# One document per collection: {"_id": <collection name>, "stamp": ObjectId}
+versions_collection = db.collection_versions
+
+
+async def bump_version(name: str):
+    """Call after every write that changes what a versioned listing returns."""
+    await versions_collection.update_one(
+        {"_id": name}, {"$set": {"stamp": ObjectId()}}, upsert=True)
+
+
+async def current_version(name: str) -> str:
+    doc = await versions_collection.find_one({"_id": name})
+    if doc is None:
+        # First use, or the stamp document was lost: create it once. A fresh
+        # ObjectId never repeats an earlier stamp; a concurrent creator may win
+        try:
+            await versions_collection.update_one(
+                {"_id": name}, {"$setOnInsert": {"stamp": ObjectId()}}, upsert=True)
+        except DuplicateKeyError:
+            pass
+        doc = await versions_collection.find_one({"_id": name})
+    return str(doc["stamp"])
+
+
+class Conditional:
+    """
+    Strong ETag for a listing whose content only changes with its collection.
+
+    The tag combines the collection's version stamp, the representation
+    (a page, or a JSON/NDJSON stream) and the query string (field selections
+    etc.), so a matching If-None-Match can be answered with 304 before the
+    listing is queried or serialized; the check is one _id lookup. NDJSON can
+    be chosen by the Accept header alone, hence `Vary: Accept`.
+    CompressionMiddleware sends the tag weak on compressed responses, which
+    still matches here.
+    """
+
+    def __init__(self, request: Request, response: Response, etag: str):
+        self.request = request
+        self.response = response
+        self.etag = etag
+
+    @property
+    def not_modified(self) -> bool:
+        header = self.request.headers.get("if-none-match")
+        if not header:
+            return False
+        # If-None-Match uses the weak comparison, so W/ prefixes still match
+        candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+        return "*" in candidates or self.etag in candidates
+
+    def headers(self) -> dict:
+        # no-cache: browsers keep the copy but revalidate it on every use
+        return {"ETag": self.etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+
+    def not_modified_response(self) -> Response:
+        return Response(status_code=304, headers=self.headers())
+
+    def respond(self, result):
+        """Attaches the ETag to `result` (or to the injected response)."""
+        target = result if isinstance(result, Response) else self.response
+        target.headers.update(self.headers())
+        return result
+
+
+def versioned(name: str):
+    """Builds a dependency resolving the current ETag of the `name` collection."""
+    async def dependency(
+        request: Request, response: Response,
+        stream: Optional[str] = Depends(stream_format),
+    ) -> Conditional:
+        version = await current_version(name)
+        query = hashlib.sha1(request.url.query.encode()).hexdigest()[:12]
+        return Conditional(request, response, f'"{name}-{version}-{stream or "page"}-{query}"')
+    return dependency
@@ -0,0 +1,144 @@
+# src/feed_cache.py
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from fastapi import Response
+from src.cache import TTLCache
+from src.compression import COMPRESSION_MIN_SIZE, compress, negotiate
+from src.pagination import NEXT_CURSOR_HEADER
+from src.serialization import BSONResponse
+
+# Load environment variables
+load_dotenv()
+
+FEED_CACHE_SIZE = int(os.getenv("FEED_CACHE_SIZE", 256))
+FEED_CACHE_TTL = float(os.getenv("FEED_CACHE_TTL", 30))
+
+# Tag carried by first pages (no cursor), the only pages a new post lands on
+HEAD_TAG = "head"
+
+
+def post_tag(post_id) -> str:
+    return f"post:{post_id}"
+
+
+class FeedCache:
+    """
+    Serialized post-listing pages, kept until a write touches them.
+
+    Pages are keyset pages, so a new post only shifts the first page of each
+    listing and a comment or delete only changes the pages holding that
+    post. Each page is tagged accordingly and writes drop exactly those. A
+    post published late by the moderation queue can sort below posts on a
+    cached later page; then the whole cache is dropped.
+
+    The cache is per process: other workers only see a write once their
+    copy is invalidated by their own writes or expires after the TTL.
+    """
+
+    def __init__(self, maxsize: int = FEED_CACHE_SIZE, ttl: float = FEED_CACHE_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a rebuild that raced a write is not stored
+        self._generation = 0
+        # Newest position any cached later page starts after; older posts land on one
+        self._later_pages_after = None
+        self.rebuilds = 0
+        self.rebuild_ms_total = 0.0
+        self.rebuild_ms_max = 0.0
+        self.precompressed_hits = 0
+
+    def lookup(self, key, accept_encoding: str = None) -> Response:
+        """
+        Returns the cached page for `key` as a response, or None.
+
+        Compressed variants are cached next to the raw bytes, so a page is
+        compressed once per encoding rather than on every hit.
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        body, next_cursor, variants = entry
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        encoding = negotiate(accept_encoding) if len(body) >= COMPRESSION_MIN_SIZE else None
+        if encoding is not None:
+            compressed = variants.get(encoding)
+            if compressed is None:
+                compressed = variants[encoding] = compress(body, encoding)
+            else:
+                with self._lock:
+                    self.precompressed_hits += 1
+            body = compressed
+            headers.update({"Content-Encoding": encoding, "Vary": "Accept-Encoding"})
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def start_rebuild(self) -> tuple:
+        return self._generation, time.perf_counter()
+
+    def store(self, key, result, post_ids, after, next_cursor, rebuild: tuple) -> Response:
+        """
+        Serializes `result` once, caches the bytes and returns the response.
+
+        `post_ids` are the posts on the page and `after` the decoded cursor it
+        starts after (None for a first page); `rebuild` is the token from
+        start_rebuild().
+        """
+        if not isinstance(result, Response):
+            result = BSONResponse(result)
+        generation, started = rebuild
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.rebuilds += 1
+            self.rebuild_ms_total += elapsed_ms
+            self.rebuild_ms_max = max(self.rebuild_ms_max, elapsed_ms)
+            current = generation == self._generation
+            if current and after is not None:
+                sort_value = after[0]
+                if self._later_pages_after is None or sort_value > self._later_pages_after:
+                    self._later_pages_after = sort_value
+        if current:
+            tags = [post_tag(post_id) for post_id in post_ids]
+            if after is None:
+                tags.append(HEAD_TAG)
+            self._cache.set(key, (bytes(result.body), next_cursor, {}), tags=tags)
+        return result
+
+    def post_created(self, created_at=None):
+        """A post became visible; `created_at` is its sort value."""
+        with self._lock:
+            late = (created_at is not None and self._later_pages_after is not None
+                    and created_at < self._later_pages_after)
+        if late:
+            self.clear()
+        else:
+            self._invalidate(HEAD_TAG)
+
+    def post_changed(self, post_id):
+        """A post was deleted or its comments changed."""
+        self._invalidate(post_tag(post_id))
+
+    def _invalidate(self, tag):
+        with self._lock:
+            self._generation += 1
+        self._cache.invalidate_tag(tag)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._later_pages_after = None
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        with self._lock:
+            stats.update({
+                "rebuilds": self.rebuilds,
+                "rebuild_avg_ms": round(self.rebuild_ms_total / self.rebuilds, 3) if self.rebuilds else 0.0,
+                "rebuild_max_ms": round(self.rebuild_ms_max, 3),
+                "precompressed_hits": self.precompressed_hits,
+            })
+        return stats
+
+
+feed_cache = FeedCache()
@@ -1,29 +1,215 @@
-# Test using GemininAPI
-import google.generativeai as genai
+# src/gemini.py
+"""
+Content moderation with Gemini.
+
+One `GenerativeModel` is built on first use and reused for every request.
+All fields of a submission (e.g. a post's title and content) are judged in
+a single structured request, and the JSON reply is parsed into a `Verdict`.
+The model sits behind a pluggable provider (MODERATION_PROVIDER: gemini or
+the offline stub) wrapped with deadlines, retries, hedging and a circuit
+breaker (src/moderation_providers.py).
+
+Requests go through three tiers, each stopping when it can decide: the
+local pre-moderator (src/premoderation.py), the verdict cache keyed by
+content hash (src/verdict_cache.py), and finally the model. Counts,
+outcomes and latency per tier are kept for /metrics.
+"""
+import asyncio
+import json
 import os
+import threading
+import time
+import google.generativeai as genai
 from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from google.generativeai.types import GenerationConfig
+from pydantic import ValidationError
+from src.moderation_providers import (
+    ModerationError, ModerationProvider, ModerationUnavailable, ResilientProvider, StubProvider,
+    Verdict,
+)
+from src.premoderation import ESCALATE, REJECT, premoderator
+from src.verdict_cache import content_key, verdict_cache
 
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+MODERATION_PROVIDER = os.getenv("MODERATION_PROVIDER", "gemini").lower()
+PREMODERATION_ENABLED = os.getenv("PREMODERATION_ENABLED", "true").lower() in ("1", "true", "yes")
 os.environ["GRPC_VERBOSITY"] = "ERROR"
 os.environ["GRPC_POLL_STRATEGY"] = "poll"
 
 genai.configure(api_key=GEMINI_API_KEY)
 
+MODERATION_PROMPT = """You are a content moderator for a university social platform.
+Decide whether the submission below is NSFW: sexual content, harassment,
+hate speech, graphic violence or self-harm. Judge every field; the
+submission is NSFW if any field is.
+
+{fields}"""
+
+VERDICT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "nsfw": {"type": "boolean"},
+        "flagged_fields": {"type": "array", "items": {"type": "string"}},
+        "reason": {"type": "string"},
+    },
+    "required": ["nsfw", "flagged_fields"],
+}
+
+# Upper bounds (ms) of the per-tier latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 10, 100, 500, 1000, 5000)
+
+
+class TierStats:
+    """Calls, outcomes and latency of each moderation tier."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tiers = {}
+
+    def record(self, tier: str, outcome: str, elapsed_ms: float):
+        with self._lock:
+            entry = self.tiers.setdefault(tier, {
+                "calls": 0, "outcomes": {}, "total_ms": 0.0, "max_ms": 0.0,
+                "histogram": {bucket: 0 for bucket in LATENCY_BUCKETS_MS + ("inf",)},
+            })
+            entry["calls"] += 1
+            entry["outcomes"][outcome] = entry["outcomes"].get(outcome, 0) + 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            bucket = next((b for b in LATENCY_BUCKETS_MS if elapsed_ms <= b), "inf")
+            entry["histogram"][bucket] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            tiers = {
+                tier: {
+                    "calls": entry["calls"],
+                    "outcomes": dict(entry["outcomes"]),
+                    "avg_ms": round(entry["total_ms"] / entry["calls"], 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                    "histogram": dict(entry["histogram"]),
+                }
+                for tier, entry in self.tiers.items()
+            }
+        local = tiers.get("local")
+        escalated = local["outcomes"].get(ESCALATE, 0) if local else 0
+        return {
+            "tiers": tiers,
+            "escalation_rate": round(escalated / local["calls"], 4) if local else None,
+        }
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+class GeminiProvider(ModerationProvider):
+    """One reused GenerativeModel; every field is judged in a single structured request."""
+
+    def __init__(self, model_name: str = GEMINI_MODEL):
+        self.model_name = model_name
+        self.name = f"gemini:{model_name}"
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> genai.GenerativeModel:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = genai.GenerativeModel(
+                        model_name=self.model_name,
+                        generation_config=GenerationConfig(
+                            temperature=0,
+                            response_mime_type="application/json",
+                            response_schema=VERDICT_SCHEMA,
+                        ),
+                    )
+        return self._model
+
+    @staticmethod
+    def build_prompt(fields: dict) -> str:
+        # JSON-encoded values keep user text from breaking out of its field
+        lines = [f"{name}: {json.dumps(value, ensure_ascii=False)}" for name, value in fields.items()]
+        return MODERATION_PROMPT.format(fields="\n".join(lines))
+
+    @staticmethod
+    def parse(text: str) -> Verdict:
+        try:
+            return Verdict.model_validate_json(text)
+        except ValidationError as e:
+            raise ModerationError(f"Unparseable moderation reply: {text!r}") from e
+
+    def generate(self, fields: dict, timeout: float = None) -> Verdict:
+        """Moderates `fields` ({name: text}) in one blocking request."""
+        # The request timeout also frees the thread when the caller stops waiting
+        request_options = {"timeout": timeout} if timeout else None
+        response = self.model.generate_content(self.build_prompt(fields), request_options=request_options)
+        return self.parse(response.text)
+
+    async def check(self, fields: dict, timeout: float) -> Verdict:
+        return await run_in_threadpool(self.generate, fields, timeout)
+
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "stub": StubProvider,
+}
+
+
+class ModerationService:
+    def __init__(self, provider: ModerationProvider = None, premoderation: bool = PREMODERATION_ENABLED):
+        provider = provider or PROVIDERS[MODERATION_PROVIDER]()
+        self.provider = provider if isinstance(provider, ResilientProvider) else ResilientProvider(provider)
+        self.premoderation = premoderation
+        self.tier_stats = TierStats()
+
+    async def moderate(self, **fields) -> Verdict:
+        """Moderates the given fields, e.g. `moderate(title=..., content=...)`."""
+        if self.premoderation:
+            started = time.perf_counter()
+            decision, flagged, reason = premoderator.classify(fields)
+            self.tier_stats.record("local", decision, _elapsed_ms(started))
+            if decision != ESCALATE:
+                return Verdict(nsfw=decision == REJECT, flagged_fields=flagged,
+                               reason=reason, source="local")
+
+        started = time.perf_counter()
+        key = content_key(fields, namespace=self.provider.name + MODERATION_PROMPT)
+        cached = await verdict_cache.get(key)
+        self.tier_stats.record("cache", "miss" if cached is None else "hit", _elapsed_ms(started))
+        if cached is not None:
+            return Verdict(**dict(cached, source="cache"))
+
+        started = time.perf_counter()
+        try:
+            verdict = await self.provider.check(fields)
+        except ModerationUnavailable:
+            self.tier_stats.record("model", "unavailable", _elapsed_ms(started))
+            raise
+        if verdict.source == "fallback":
+            # Fail-open verdicts are not real verdicts and are never cached
+            self.tier_stats.record("model", "fallback", _elapsed_ms(started))
+            return verdict
+        self.tier_stats.record("model", "nsfw" if verdict.nsfw else "ok", _elapsed_ms(started))
+        await verdict_cache.set(key, verdict.model_dump())
+        return verdict
+
+    def stats(self) -> dict:
+        return dict(self.tier_stats.stats(), provider=self.provider.stats())
+
+
+moderation = ModerationService()
+
 
 def is_NSFW(message: str) -> str:
-    model = genai.GenerativeModel(
-        model_name="gemini-2.0-flash",
-    )
-    chat_session = model.start_chat()
-    response = chat_session.send_message(f'''
-                                        You are a moderation chatbot. Just reply in yes or no.
-                                        You need to check the message:
-                                        {message}
-
-                                        No means it is okay and yes means it is NSFW.
-                                        ''')
-    # print(f"Messsage: {message} || Response: {response.text}")
-    return response.text
+    """
+    Single-message check kept for scripts; returns 'Yes' or 'No'.
+    Not usable from a running event loop: await moderation.moderate() there.
+    """
+    return "Yes" if asyncio.run(moderation.moderate(message=message)).nsfw else "No"
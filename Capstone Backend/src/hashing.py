@@ -0,0 +1,120 @@
+# src/hashing.py
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from src.auth import hash_password, verify_password
+
+# Load environment variables
+load_dotenv()
+
+# Number of worker processes doing bcrypt work
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", os.cpu_count() or 2))
+# Jobs allowed to wait for a free worker before new ones are rejected
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", 64))
+# When set, the bcrypt cost factor is tuned at startup to roughly this latency
+BCRYPT_TARGET_MS = os.getenv("BCRYPT_TARGET_MS")
+
+logger = logging.getLogger(__name__)
+
+# passlib's default; tuning never goes below MIN_ROUNDS
+DEFAULT_ROUNDS = 12
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+
+class HashingOverloaded(Exception):
+    """Raised when the hashing queue is full and the request should be retried later."""
+
+
+class HashingService:
+    """
+    Runs bcrypt hashing and verification in a bounded process pool.
+
+    bcrypt is CPU bound, so running it on the request threads lets a login
+    spike starve every other endpoint. Here it runs in separate processes,
+    and at most `workers + queue_limit` jobs are admitted at a time.
+    """
+
+    def __init__(self, workers: int = HASH_POOL_SIZE, queue_limit: int = HASH_QUEUE_LIMIT, rounds: int = None):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.rounds = rounds
+        self._executor = None
+        self._in_flight = 0
+        self.completed = 0
+        self.failed = 0  # Raised or cancelled while running
+        self.rejected = 0
+
+    def start(self):
+        if self._executor is None:
+            # spawn keeps the workers clear of the parent's event loop and sockets
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, password, hashed_password)
+
+    def tune_rounds(self, target_ms: float) -> int:
+        """
+        Picks the highest bcrypt cost whose hash time stays within `target_ms`.
+
+        Each extra round doubles the work, so one timed sample at MIN_ROUNDS
+        is enough to extrapolate.
+        """
+        self.start()
+        started = time.perf_counter()
+        self._executor.submit(hash_password, "calibration", MIN_ROUNDS).result()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        extra = math.floor(math.log2(target_ms / elapsed_ms)) if elapsed_ms > 0 else 0
+        self.rounds = max(MIN_ROUNDS, min(MAX_ROUNDS, MIN_ROUNDS + extra))
+        logger.info(f"bcrypt cost tuned to {self.rounds} rounds "
+                    f"({elapsed_ms:.1f} ms at {MIN_ROUNDS} rounds, target {target_ms} ms)")
+        return self.rounds
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "rounds": self.rounds or DEFAULT_ROUNDS,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    async def _submit(self, fn, *args):
+        if self._in_flight >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise HashingOverloaded("Too many password operations in progress")
+
+        self.start()
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, fn, *args)
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+        self.completed += 1
+        return result
+
+
+hashing_service = HashingService()
@@ -0,0 +1,197 @@
+# src/indexes.py
+"""
+Index registry for every collection the routes query.
+
+Applied idempotently at startup (CREATE_INDEXES_ON_STARTUP) or from the CLI:
+
+    python -m src.indexes            # create missing indexes
+    python -m src.indexes --verify   # report registry indexes missing from the database
+    python -m src.indexes --check    # explain each route query, flag COLLSCAN plans
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from src.database import get_database
+from src.moderation_queue import PENDING, VISIBLE
+from src.verdict_cache import VERDICT_STORE_TTL
+
+# Load environment variables
+load_dotenv()
+
+CREATE_INDEXES_ON_STARTUP = os.getenv(
+    "CREATE_INDEXES_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+# Moderation looks pending items up by author and sweeps them oldest first at
+# startup; partial indexes keep those lookups off the (mostly published) rest
+PENDING_INDEXES = [
+    IndexModel([("user_id", ASCENDING)], name="user_id_pending",
+               partialFilterExpression={"status": PENDING}),
+    IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at_pending",
+               partialFilterExpression={"status": PENDING}),
+]
+
+# Unique indexes mirror the "already exists" checks in the routes
+INDEXES = {
+    "users": [
+        IndexModel([("regno", ASCENDING)], name="regno_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    # List endpoints page on (created_at or uploaded_at, _id) newest first,
+    # so the sort key ends every index they use
+    "posts": [
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="user_id_created_at_id"),
+        *PENDING_INDEXES,
+    ],
+    "comments": [
+        # Also serves the feed's newest-comments-per-post preview
+        IndexModel([("post_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="post_id_created_at_id"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="user_id_created_at_id"),
+        *PENDING_INDEXES,
+    ],
+    "club_posts": [
+        IndexModel([("club_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="club_id_created_at_id"),
+    ],
+    "file_metadata": [
+        IndexModel([("course_id", ASCENDING), ("uploaded_at", DESCENDING), ("_id", DESCENDING)],
+                   name="course_id_uploaded_at_id"),
+        IndexModel([("uploaded_at", DESCENDING), ("_id", DESCENDING)], name="uploaded_at_id"),
+        # Files uploaded before s3_key was stored have none
+        IndexModel([("s3_key", ASCENDING)], name="s3_key_unique", unique=True, sparse=True),
+    ],
+    "courses": [
+        IndexModel([("course_code", ASCENDING)], name="course_code_unique", unique=True),
+        IndexModel([("students", ASCENDING)], name="students"),
+    ],
+    "clubs": [
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+        IndexModel([("admins", ASCENDING)], name="admins"),
+    ],
+    # Lookups are by _id (the content hash); the TTL index expires old verdicts
+    "moderation_verdicts": [
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl",
+                   expireAfterSeconds=VERDICT_STORE_TTL),
+    ],
+}
+
+# Representative filters/sorts issued by the routes, used by --check
+ROUTE_QUERIES = [
+    ("users.login", "users", {"regno": "21BAI10019"}, None),
+    ("users.register", "users",
+     {"$or": [{"email": "a@vitbhopal.ac.in"}, {"regno": "21BAI10019"}]}, None),
+    ("posts.all", "posts", VISIBLE, {"created_at": -1, "_id": -1}),
+    ("posts.by_user", "posts", {"user_id": "21BAI10019", **VISIBLE}, {"created_at": -1, "_id": -1}),
+    ("posts.by_user_own", "posts", {"user_id": "21BAI10019"}, {"created_at": -1, "_id": -1}),
+    ("posts.pending_by_user", "posts", {"user_id": "21BAI10019", "status": PENDING}, None),
+    ("posts.pending_sweep", "posts", {"status": PENDING, "created_at": {"$lte": datetime.utcnow()}},
+     {"created_at": 1}),
+    ("comments.pending_by_user", "comments", {"user_id": str(ObjectId()), "status": PENDING}, None),
+    ("comments.pending_sweep", "comments", {"status": PENDING, "created_at": {"$lte": datetime.utcnow()}},
+     {"created_at": 1}),
+    ("comments.by_post", "comments", {"post_id": str(ObjectId()), **VISIBLE}, None),
+    ("comments.by_user", "comments", {"user_id": str(ObjectId()), **VISIBLE}, {"created_at": -1, "_id": -1}),
+    ("comments.by_user_own", "comments", {"user_id": str(ObjectId())}, {"created_at": -1, "_id": -1}),
+    ("club_posts.by_club", "club_posts", {"club_id": ObjectId()}, {"created_at": -1, "_id": -1}),
+    ("file_metadata.by_course", "file_metadata", {"course_id": ObjectId()},
+     {"uploaded_at": -1, "_id": -1}),
+    ("file_metadata.all", "file_metadata", {}, {"uploaded_at": -1, "_id": -1}),
+    ("courses.registered", "courses", {"students": str(ObjectId())}, None),
+    ("courses.by_code", "courses", {"course_code": "CSE1001"}, None),
+    ("clubs.by_name", "clubs", {"name": "AI Club"}, None),
+    ("clubs.administered", "clubs", {"admins": {"$in": [ObjectId(), str(ObjectId())]}}, None),
+]
+
+
+async def ensure_indexes(db=None) -> dict:
+    """
+    Creates every registry index. Existing identical indexes are a no-op.
+
+    A failing collection (for example duplicates blocking a unique index) is
+    reported and skipped so the app can still start.
+    """
+    db = db if db is not None else get_database()
+    created = {}
+    for collection_name, indexes in INDEXES.items():
+        try:
+            created[collection_name] = await db[collection_name].create_indexes(indexes)
+        except OperationFailure as e:
+            logger.error(f"Index creation failed on {collection_name}: {e}")
+            created[collection_name] = []
+    return created
+
+
+async def verify_indexes(db=None) -> dict:
+    """Returns {collection: [missing index names]} for registry indexes not in the database."""
+    db = db if db is not None else get_database()
+    missing = {}
+    for collection_name, indexes in INDEXES.items():
+        existing = await db[collection_name].index_information()
+        absent = [index.document["name"] for index in indexes
+                  if index.document["name"] not in existing]
+        if absent:
+            missing[collection_name] = absent
+    return missing
+
+
+def _plan_stages(plan: dict):
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+async def check_query_plans(db=None) -> list:
+    """Explains every ROUTE_QUERIES entry and returns the names planned as COLLSCAN."""
+    db = db if db is not None else get_database()
+    collscans = []
+    for name, collection_name, query_filter, sort in ROUTE_QUERIES:
+        find = {"find": collection_name, "filter": query_filter}
+        if sort:
+            find["sort"] = sort
+        explain = await db.command({"explain": find, "verbosity": "queryPlanner"})
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        stages = set(_plan_stages(winning_plan))
+        status = "COLLSCAN" if "COLLSCAN" in stages else "ok"
+        logger.info(f"{status:9} {name:28} {collection_name}")
+        if status == "COLLSCAN":
+            collscans.append(name)
+    return collscans
+
+
+async def main(args):
+    if args.check:
+        collscans = await check_query_plans()
+        return 1 if collscans else 0
+    if args.verify:
+        missing = await verify_indexes()
+        for collection_name, names in missing.items():
+            logger.info(f"missing   {collection_name}: {', '.join(names)}")
+        return 1 if missing else 0
+    created = await ensure_indexes()
+    for collection_name, names in created.items():
+        logger.info(f"{collection_name}: {', '.join(names) or 'failed'}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Create or verify MongoDB indexes")
+    parser.add_argument("--verify", action="store_true",
+                        help="report registry indexes missing from the database")
+    parser.add_argument("--check", action="store_true",
+                        help="explain route queries and flag COLLSCAN plans")
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,102 @@
+# src/loaders.py
+import asyncio
+from bson import ObjectId
+from src.database import get_database
+from src.moderation_queue import VISIBLE
+
+# Database
+db = get_database()
+users_collection = db.users
+posts_collection = db.posts
+comments_collection = db.comments
+
+
+class BatchLoader:
+    """
+    DataLoader-style batching for a single request.
+
+    Keys requested in the same event-loop tick are coalesced into one call to
+    `batch_fn(keys) -> {key: value}`, and every result is memoized for the
+    rest of the request. Missing keys resolve to `default`.
+    """
+
+    def __init__(self, batch_fn, default=None):
+        self._batch_fn = batch_fn
+        self._default = default
+        self._futures = {}
+        self._queue = []
+        self._dispatch_task = None
+
+    def load(self, key) -> asyncio.Future:
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[key] = future
+            self._queue.append(key)
+            if len(self._queue) == 1:
+                # Dispatch after the current tick so sibling loads join the batch
+                loop.call_soon(self._schedule_dispatch)
+        return future
+
+    async def load_many(self, keys) -> list:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _schedule_dispatch(self):
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._dispatch_task = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self):
+        keys, self._queue = self._queue, []
+        try:
+            results = await self._batch_fn(keys)
+        except Exception as e:
+            for key in keys:
+                self._futures[key].set_exception(e)
+            return
+        for key in keys:
+            self._futures[key].set_result(results.get(key, self._default))
+
+
+def _object_id(value):
+    return value if isinstance(value, ObjectId) else ObjectId(value)
+
+
+def document_loader(collection, projection: dict) -> BatchLoader:
+    """Loads documents by _id with one `$in` query per batch. Keys may be str or ObjectId."""
+    async def batch(keys):
+        ids = list({_object_id(key) for key in keys})
+        docs = await collection.find({"_id": {"$in": ids}}, projection).to_list(length=None)
+        by_id = {doc["_id"]: doc for doc in docs}
+        return {key: by_id.get(_object_id(key)) for key in keys}
+    return BatchLoader(batch)
+
+
+def comment_count_loader() -> BatchLoader:
+    """Counts comments per post id with one `$group` aggregation per batch."""
+    async def batch(keys):
+        # post_id is stored as a string by create_comment; older documents may hold ObjectIds
+        ids = [str(key) for key in keys]
+        match = ids + [ObjectId(i) for i in ids if ObjectId.is_valid(i)]
+        pipeline = [
+            {"$match": {"post_id": {"$in": match}, **VISIBLE}},
+            {"$group": {"_id": {"$toString": "$post_id"}, "count": {"$sum": 1}}},
+        ]
+        counts = {row["_id"]: row["count"]
+                  for row in await comments_collection.aggregate(pipeline).to_list(length=None)}
+        return {key: counts.get(str(key), 0) for key in keys}
+    return BatchLoader(batch, default=0)
+
+
+class Loaders:
+    """The loaders available to one request."""
+
+    def __init__(self):
+        self.users = document_loader(users_collection, {"name": 1, "regno": 1})
+        self.posts = document_loader(posts_collection, {"title": 1, "user_id": 1})
+        self.comment_counts = comment_count_loader()
+
+
+async def get_loaders() -> Loaders:
+    """FastAPI dependency: a fresh set of loaders per request."""
+    return Loaders()
@@ -1,9 +1,12 @@
 # src/main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from uvicorn import run
 from dotenv import load_dotenv
+import hmac
 import os
+from typing import Optional
 from fastapi.responses import JSONResponse
 
 from src.routes.user import router as users_router
@@ -12,6 +15,19 @@ from src.routes.comment import router as comment_router
 from src.routes.file import router as file_router
 from src.routes.course import router as course_router
 from src.routes.club_chat import router as club_chat_router
+from src.dependencies import user_cache
+from src.feed_cache import feed_cache
+from src.verdict_cache import verdict_cache
+from src.gemini import moderation
+from src.moderation_queue import moderation_queue
+from src.hashing import hashing_service, BCRYPT_TARGET_MS
+from src.indexes import ensure_indexes, CREATE_INDEXES_ON_STARTUP
+from src import database
+from src.monitoring import pool_metrics
+from src.pagination import NEXT_CURSOR_HEADER
+from src.compression import CompressionMiddleware, compression_stats
+from src.s3_upload import upload_stats
+from src.download_urls import download_urls
 
 
 # Load environment variables
@@ -19,9 +35,30 @@ load_dotenv()
 
 # Get the PORT from the environment
 PORT = int(os.getenv("PORT", 8000))
+# Bearer token for /metrics; the endpoint is disabled while it is unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One MongoDB client per worker process, created after the fork
+    database.connect()
+    # Create the bcrypt process pool before the first login arrives
+    hashing_service.start()
+    if BCRYPT_TARGET_MS:
+        hashing_service.tune_rounds(float(BCRYPT_TARGET_MS))
+    if CREATE_INDEXES_ON_STARTUP:
+        await ensure_indexes()
+    # Background moderation workers (MODERATION_MODE=async)
+    await moderation_queue.start()
+    yield
+    await moderation_queue.stop()
+    hashing_service.shutdown()
+    database.close()
+
 
 # Create the FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 origins = [
@@ -35,9 +72,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["*"]
+    # "*" is not honoured for credentialed requests, so name the pagination header
+    expose_headers=["*", NEXT_CURSOR_HEADER]
 )
 
+# Compress large JSON responses (gzip, or brotli when installed)
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(users_router, prefix="/api/v1")
 app.include_router(posts_router, prefix="/api/v1")
@@ -58,6 +99,30 @@ def root():
     return {"message": "Welcome to College Social Media!"}
 
 
+def require_metrics_token(authorization: Optional[str] = Header(None)):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+
+# Cache and performance counters, for operators only
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)])
+def metrics():
+    return {
+        "user_cache": user_cache.stats(),
+        "feed_cache": feed_cache.stats(),
+        "moderation": moderation.stats(),
+        "moderation_cache": verdict_cache.stats(),
+        "moderation_queue": moderation_queue.stats(),
+        "compression": compression_stats.stats(),
+        "uploads": upload_stats.stats(),
+        "downloads": download_urls.stats(),
+        "hashing": hashing_service.stats(),
+        "mongo_pool": pool_metrics.stats(),
+    }
+
+
 # Run the server
 if __name__ == "__main__":
     print(f"⚙️ Server is running on PORT: {PORT}")
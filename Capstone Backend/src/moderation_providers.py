@@ -0,0 +1,299 @@
+# src/moderation_providers.py
+"""
+Moderation providers and the resilience layer around them.
+
+A provider turns {field name: text} into a `Verdict`. `ResilientProvider`
+wraps any provider with:
+
+- a deadline per attempt (MODERATION_TIMEOUT),
+- bounded retries with exponential backoff (MODERATION_RETRIES),
+- an overall deadline covering every attempt, backoff sleep and hedged
+  request of one check (MODERATION_DEADLINE), so a write waits at most
+  that long for moderation,
+- an optional hedged second request once an attempt runs past the p95
+  latency of recent calls (MODERATION_HEDGE),
+- a circuit breaker that stops calling a failing provider for a while
+  (BREAKER_THRESHOLD consecutive failures, BREAKER_COOLDOWN seconds).
+
+When the provider cannot answer, MODERATION_FAILURE_POLICY decides: `closed`
+raises ModerationUnavailable, `open` lets the content through with a
+fallback verdict. `StubProvider` is a deterministic offline stand-in for
+load tests.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+import backoff
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+# Load environment variables
+load_dotenv()
+
+MODERATION_TIMEOUT = float(os.getenv("MODERATION_TIMEOUT", 5))
+MODERATION_RETRIES = int(os.getenv("MODERATION_RETRIES", 2))
+MODERATION_DEADLINE = float(os.getenv("MODERATION_DEADLINE", 8))
+MODERATION_HEDGE = os.getenv("MODERATION_HEDGE", "false").lower() in ("1", "true", "yes")
+# Successful calls needed before the p95 is trusted as a hedge delay
+MODERATION_HEDGE_MIN_SAMPLES = int(os.getenv("MODERATION_HEDGE_MIN_SAMPLES", 20))
+MODERATION_FAILURE_POLICY = os.getenv("MODERATION_FAILURE_POLICY", "closed").lower()
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", 5))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", 30))
+
+# Stub provider: simulated latency and the marker that makes it flag text
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", 0))
+STUB_JITTER_MS = float(os.getenv("STUB_JITTER_MS", 0))
+STUB_FLAG_MARKER = os.getenv("STUB_FLAG_MARKER", "[nsfw]")
+
+LATENCY_WINDOW = 200
+
+logger = logging.getLogger(__name__)
+
+
+class Verdict(BaseModel):
+    nsfw: bool
+    flagged_fields: List[str] = []  # Names of the fields judged NSFW
+    reason: Optional[str] = None
+    source: str = "model"  # Tier that decided: local, cache, model or fallback
+
+
+class ModerationError(Exception):
+    """The model did not return a usable verdict."""
+
+
+class ModerationUnavailable(Exception):
+    """No verdict could be obtained and the failure policy is fail-closed."""
+
+
+class CircuitOpen(ModerationUnavailable):
+    pass
+
+
+class ModerationProvider:
+    """Interface: `check` returns a Verdict for {field name: text} within `timeout` seconds."""
+
+    name = "provider"
+
+    async def check(self, fields: dict, timeout: float) -> Verdict:
+        raise NotImplementedError
+
+
+class StubProvider(ModerationProvider):
+    """
+    Deterministic offline provider: text containing STUB_FLAG_MARKER is NSFW,
+    and the simulated latency (STUB_LATENCY_MS ± STUB_JITTER_MS) is derived
+    from the text, so the same input always behaves the same.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_ms: float = STUB_LATENCY_MS, jitter_ms: float = STUB_JITTER_MS,
+                 marker: str = STUB_FLAG_MARKER):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.marker = marker.lower()
+
+    def latency_for(self, fields: dict) -> float:
+        seed = hashlib.sha256(repr(sorted(fields.items())).encode()).digest()
+        spread = random.Random(seed).uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + spread) / 1000
+
+    async def check(self, fields: dict, timeout: float) -> Verdict:
+        await asyncio.sleep(self.latency_for(fields))
+        flagged = [name for name, text in fields.items() if self.marker in (text or "").lower()]
+        return Verdict(nsfw=bool(flagged), flagged_fields=flagged,
+                       reason="stub marker" if flagged else None)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures; after `cooldown` seconds a
+    single trial call is let through (half-open) and its outcome closes or
+    reopens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial_running = False
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    raise CircuitOpen("Moderation circuit is open")
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._trial_running:
+                    raise CircuitOpen("Moderation circuit is half-open")
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_cancelled(self):
+        """A call cut short by its caller says nothing about the provider."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures, "trips": self.trips}
+
+
+class ResilientProvider(ModerationProvider):
+    def __init__(self, provider: ModerationProvider, timeout: float = MODERATION_TIMEOUT,
+                 retries: int = MODERATION_RETRIES, hedge: bool = MODERATION_HEDGE,
+                 failure_policy: str = MODERATION_FAILURE_POLICY, breaker: CircuitBreaker = None,
+                 deadline: float = MODERATION_DEADLINE):
+        self.provider = provider
+        self.name = provider.name
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.hedge = hedge
+        self.fail_open = failure_policy == "open"
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self.counts = {"calls": 0, "attempts": 0, "timeouts": 0, "errors": 0,
+                       "hedges": 0, "hedge_wins": 0, "rejected_by_breaker": 0,
+                       "deadline_exceeded": 0, "fallbacks": 0}
+        # An open circuit is not retried: waiting would not close it any sooner
+        self._attempt_with_retries = backoff.on_exception(
+            backoff.expo, Exception, max_tries=lambda: self.retries + 1,
+            giveup=lambda e: isinstance(e, CircuitOpen), factor=0.2, max_value=2,
+            logger=None)(self._attempt)
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counts[counter] += 1
+
+    def hedge_delay(self) -> Optional[float]:
+        """p95 of recent successful calls, in seconds, or None until there are enough."""
+        with self._lock:
+            if not self.hedge or len(self._latencies) < MODERATION_HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    async def check(self, fields: dict, timeout: float = None) -> Verdict:
+        """Verdict within `timeout` seconds (default MODERATION_DEADLINE), retries included."""
+        self._count("calls")
+        try:
+            return await asyncio.wait_for(
+                self._attempt_with_retries(fields), timeout or self.deadline)
+        except Exception as e:
+            reason = e
+            if isinstance(e, CircuitOpen):
+                self._count("rejected_by_breaker")
+            elif isinstance(e, asyncio.TimeoutError):
+                # Attempts that time out raise ModerationError, so this is the overall deadline
+                self._count("deadline_exceeded")
+                reason = "deadline exceeded"
+            if not self.fail_open:
+                raise ModerationUnavailable(f"Moderation unavailable: {reason}") from e
+            self._count("fallbacks")
+            logger.warning(f"Moderation unavailable, letting content through: {reason}")
+            return Verdict(nsfw=False, reason=f"Moderation unavailable: {reason}", source="fallback")
+
+    async def _attempt(self, fields: dict) -> Verdict:
+        self.breaker.before_call()
+        try:
+            verdict = await self._hedged(fields)
+        except asyncio.CancelledError:
+            self.breaker.record_cancelled()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return verdict
+
+    async def _call(self, fields: dict) -> Verdict:
+        self._count("attempts")
+        started = time.perf_counter()
+        try:
+            verdict = await asyncio.wait_for(self.provider.check(fields, self.timeout), self.timeout)
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            raise ModerationError(f"No verdict within {self.timeout}s") from None
+        except Exception:
+            self._count("errors")
+            raise
+        with self._lock:
+            self._latencies.append(time.perf_counter() - started)
+        return verdict
+
+    async def _hedged(self, fields: dict) -> Verdict:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._call(fields)
+        first = asyncio.create_task(self._call(fields))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return first.result()
+
+            # Slower than the p95: race a second request against the first
+            self._count("hedges")
+            second = asyncio.create_task(self._call(fields))
+            tasks.add(second)
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The loser, or both when the overall deadline cuts the check short
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        delay = self.hedge_delay()
+        with self._lock:
+            ordered = sorted(self._latencies)
+            counts = dict(self.counts)
+        return dict(
+            counts,
+            provider=self.name,
+            failure_policy="open" if self.fail_open else "closed",
+            deadline_s=self.deadline,
+            p95_ms=round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3) if ordered else None,
+            hedge_delay_ms=round(delay * 1000, 3) if delay is not None else None,
+            breaker=self.breaker.stats(),
+        )
@@ -0,0 +1,245 @@
+# src/moderation_queue.py
+"""
+Asynchronous moderation of posts and comments.
+
+With MODERATION_MODE=async, a new post or comment is stored as `pending` and
+returned to its author straight away; a pool of MODERATION_WORKERS
+background tasks moderates it and flips it to `published` or `rejected`.
+Side effects of publishing (counters, feed cache) run only then. Pending
+items are hidden from everyone but their author; rejected ones are only
+listed, with their rejection reason, on the author's own profile.
+
+In the default sync mode content is moderated before it is stored, as
+before, and stored as `published`. Documents from before these states
+existed have no status and count as published.
+
+If the queue is full, content (new or retried) is moderated inline, so a
+backlog slows writes down instead of growing without bound; if that inline
+attempt fails the item stays pending and is retried later like any other.
+Items still pending when a worker process stops, or that ran out of
+attempts, are queued again by the sweep at the next startup, which feeds
+the queue as it drains.
+
+`has_pending` asks the database, through a partial index on pending items,
+so every worker process gives the same answer.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+from src.gemini import moderation
+
+# Load environment variables
+load_dotenv()
+
+MODERATION_MODE = os.getenv("MODERATION_MODE", "sync").lower()
+MODERATION_WORKERS = int(os.getenv("MODERATION_WORKERS", 4))
+MODERATION_QUEUE_LIMIT = int(os.getenv("MODERATION_QUEUE_LIMIT", 1000))
+# Attempts per item before it is left pending for the next startup sweep,
+# and the delay before the first retry (doubled on each further one)
+MODERATION_MAX_ATTEMPTS = int(os.getenv("MODERATION_MAX_ATTEMPTS", 3))
+MODERATION_RETRY_DELAY = float(os.getenv("MODERATION_RETRY_DELAY", 5))
+
+PENDING = "pending"
+PUBLISHED = "published"
+REJECTED = "rejected"
+
+logger = logging.getLogger(__name__)
+
+# Filter for items everyone may see
+VISIBLE = {"status": {"$nin": [PENDING, REJECTED]}}
+
+
+def visible_to(author: str) -> dict:
+    """Filter for items everyone may see plus `author`'s own pending ones."""
+    return {"$or": [VISIBLE, {"user_id": author, "status": PENDING}]}
+
+
+class _Kind:
+    def __init__(self, collection, fields: tuple, on_publish):
+        self.collection = collection
+        self.fields = fields
+        self.on_publish = on_publish
+
+
+class ModerationQueue:
+    def __init__(self, mode: str = MODERATION_MODE, workers: int = MODERATION_WORKERS,
+                 queue_limit: int = MODERATION_QUEUE_LIMIT):
+        self.enabled = mode == "async"
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._kinds = {}
+        self._queue = None
+        self._tasks = []
+        self._retries = set()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.processed = {PUBLISHED: 0, REJECTED: 0}
+        self.inline = 0
+        self.failures = 0
+        self.abandoned = 0
+        self.swept = 0
+        self.dequeued = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def register(self, kind: str, collection, fields: tuple, on_publish):
+        """
+        Declares a moderated document type: `fields` are sent to the
+        moderator and `on_publish(doc)` runs once the document is published.
+        """
+        self._kinds[kind] = _Kind(collection, fields, on_publish)
+
+    async def start(self):
+        """Starts the worker pool and queues items left pending by a previous run."""
+        if not self.enabled or self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_limit)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep(datetime.utcnow())))
+
+    async def _sweep(self, started_at: datetime):
+        """Queues items left pending by a previous run, waiting for room as the queue drains."""
+        # Items created since startup were submitted by this run already. Dates are
+        # stored to the millisecond, so one from that millisecond may be queued
+        # twice; process() only moderates a still-pending document once
+        query = {"status": PENDING, "created_at": {"$lte": started_at}}
+        for kind, spec in self._kinds.items():
+            async for doc in spec.collection.find(query).sort("created_at", 1):
+                await self._queue.put((kind, doc, time.perf_counter(), 1))
+                with self._lock:
+                    self.swept += 1
+
+    async def stop(self):
+        tasks = self._tasks + list(self._retries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._retries = set()
+        self._queue = None
+
+    async def has_pending(self, kind: str, author: str) -> bool:
+        """Whether `author` has `kind` items awaiting moderation (always False in sync mode)."""
+        if not self.enabled:
+            return False
+        doc = await self._kinds[kind].collection.find_one(
+            {"user_id": author, "status": PENDING}, {"_id": 1})
+        return doc is not None
+
+    async def submit(self, kind: str, doc: dict) -> str:
+        """
+        Moderates a stored document: queued in async mode (returns PENDING),
+        inline otherwise or when the queue is full (returns the outcome).
+        """
+        if self._queue is None:
+            return await self.process(kind, doc)
+        return await self._enqueue(kind, doc, 1)
+
+    async def _enqueue(self, kind: str, doc: dict, attempt: int) -> str:
+        """Queues `doc`, or moderates it inline when the queue is full."""
+        try:
+            self._queue.put_nowait((kind, doc, time.perf_counter(), attempt))
+            return PENDING
+        except asyncio.QueueFull:
+            with self._lock:
+                self.inline += 1
+        try:
+            return await self.process(kind, doc)
+        except Exception as e:
+            # The document is already stored: leave it pending and retry later
+            # rather than failing a write that has happened
+            self._failed(kind, doc, attempt, e)
+            return PENDING
+
+    async def check(self, kind: str, doc: dict):
+        """Moderates `doc` without storing anything; returns the Verdict."""
+        spec = self._kinds[kind]
+        return await moderation.moderate(**{field: doc[field] for field in spec.fields})
+
+    async def publish(self, kind: str, doc: dict):
+        """Side effects of a document becoming visible."""
+        await self._kinds[kind].on_publish(doc)
+
+    async def process(self, kind: str, doc: dict) -> str:
+        verdict = await self.check(kind, doc)
+        outcome = REJECTED if verdict.nsfw else PUBLISHED
+        update = {"status": outcome, "moderated_at": datetime.utcnow()}
+        if verdict.nsfw:
+            update["rejection_reason"] = verdict.reason
+        # Only a still-pending document changes state, so a deleted or already
+        # moderated one is not published twice
+        result = await self._kinds[kind].collection.update_one(
+            {"_id": doc["_id"], "status": PENDING}, {"$set": update})
+        if result.modified_count:
+            with self._lock:
+                self.processed[outcome] += 1
+            if outcome == PUBLISHED:
+                await self.publish(kind, doc)
+        return outcome
+
+    async def _worker(self):
+        while True:
+            kind, doc, enqueued_at, attempt = await self._queue.get()
+            wait_ms = (time.perf_counter() - enqueued_at) * 1000
+            with self._lock:
+                self.in_flight += 1
+                self.dequeued += 1
+                self.wait_ms_total += wait_ms
+                self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            try:
+                await self.process(kind, doc)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed(kind, doc, attempt, e)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                self._queue.task_done()
+
+    def _failed(self, kind: str, doc: dict, attempt: int, error: Exception):
+        logger.warning(f"Moderation of {kind} {doc.get('_id')} failed (attempt {attempt}): {error}")
+        with self._lock:
+            self.failures += 1
+        if attempt >= MODERATION_MAX_ATTEMPTS:
+            with self._lock:
+                self.abandoned += 1
+            logger.error(f"Giving up on {kind} {doc.get('_id')} until the next startup sweep")
+            return
+        # Delayed, so an unavailable provider is not hammered
+        retry = asyncio.create_task(self._retry(
+            kind, doc, attempt + 1, MODERATION_RETRY_DELAY * 2 ** (attempt - 1)))
+        self._retries.add(retry)
+        retry.add_done_callback(self._retries.discard)
+
+    async def _retry(self, kind: str, doc: dict, attempt: int, delay: float):
+        await asyncio.sleep(delay)
+        if self._queue is not None:
+            await self._enqueue(kind, doc, attempt)
+
+    def stats(self) -> dict:
+        queued = self._queue.qsize() if self._queue is not None else 0
+        with self._lock:
+            return {
+                "mode": "async" if self.enabled else "sync",
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "backlog": queued + self.in_flight,
+                "queued": queued,
+                "in_flight": self.in_flight,
+                "processed": dict(self.processed),
+                "inline": self.inline,
+                "failures": self.failures,
+                "abandoned": self.abandoned,
+                "swept": self.swept,
+                "retries_scheduled": len(self._retries),
+                "wait_avg_ms": round(self.wait_ms_total / self.dequeued, 3) if self.dequeued else 0.0,
+                "wait_max_ms": round(self.wait_ms_max, 3),
+            }
+
+
+moderation_queue = ModerationQueue()
@@ -0,0 +1,89 @@
+# src/pagination.py
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from dotenv import load_dotenv
+from fastapi import HTTPException, Query, Response, status
+
+# Load environment variables
+load_dotenv()
+
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 200))
+
+# List bodies stay plain arrays; the cursor for the next page travels in this header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, _id: ObjectId) -> str:
+    payload = json.dumps({"t": sort_value.isoformat(), "id": str(_id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+class Page:
+    """
+    Keyset pagination over (sort field, _id), newest first.
+
+    Each page resumes strictly after the last document of the previous one,
+    so the query walks the compound index instead of skipping, and a page
+    costs the same however deep it is.
+    """
+
+    def __init__(self, response: Response, limit: int, cursor: Optional[str]):
+        self.response = response
+        self.limit = limit
+        self.cursor = cursor
+        self.after = decode_cursor(cursor) if cursor else None
+        self.next_cursor = None
+
+    def query(self, query: dict, field: str) -> dict:
+        if self.after is None:
+            return query
+        sort_value, _id = self.after
+        keyset = {"$or": [
+            {field: {"$lt": sort_value}},
+            {field: sort_value, "_id": {"$lt": _id}},
+        ]}
+        return {"$and": [query, keyset]} if query else keyset
+
+    async def fetch(self, collection, query: dict, projection: dict = None,
+                    field: str = "created_at") -> list:
+        """Returns one page of `collection.find(query)` and records the next cursor."""
+        if projection and field not in projection and all(projection.values()):
+            projection = dict(projection, **{field: 1})  # the cursor needs it
+        docs = await collection.find(self.query(query, field), projection).sort(
+            [(field, -1), ("_id", -1)]).limit(self.limit + 1).to_list(length=None)
+        if len(docs) > self.limit:
+            docs = docs[:self.limit]
+            last = docs[-1]
+            self.next_cursor = encode_cursor(last[field], last["_id"])
+        return docs
+
+    def respond(self, result):
+        """Attaches the next cursor header to `result` (or to the injected response)."""
+        if self.next_cursor:
+            target = result if isinstance(result, Response) else self.response
+            target.headers[NEXT_CURSOR_HEADER] = self.next_cursor
+        return result
+
+
+def paginate(
+    response: Response,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(
+        None, description=f"Opaque cursor from the previous page's {NEXT_CURSOR_HEADER} header"),
+) -> Page:
+    return Page(response, limit, cursor)
@@ -0,0 +1,192 @@
+# src/premoderation.py
+"""
+Local first moderation tier, run before the model.
+
+Text is matched against a configurable term list with an Aho-Corasick
+automaton (one pass over the text whatever the number of terms). The tier
+only decides what is unambiguous: a whole-word blocked term rejects, and
+text with no letters or digits (empty, emoji, punctuation) or exactly
+matching an allowlisted phrase ("thanks", "congrats") is accepted.
+Everything else is escalated to the model; the reason recorded for an
+escalation (watch term, obfuscated term, link) is informational.
+
+Term list format (MODERATION_TERMS, one term per line): `term` blocks,
+`?term` is reported as a watch term, `#` starts a comment. The allowlist
+(MODERATION_ALLOWLIST) holds one phrase per line, compared ignoring case,
+accents and punctuation.
+"""
+import logging
+import os
+import re
+import unicodedata
+from collections import deque
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MODERATION_TERMS = os.getenv(
+    "MODERATION_TERMS", os.path.join(os.path.dirname(__file__), "moderation_terms.txt"))
+MODERATION_ALLOWLIST = os.getenv(
+    "MODERATION_ALLOWLIST", os.path.join(os.path.dirname(__file__), "moderation_allowlist.txt"))
+
+ACCEPT = "accept"
+REJECT = "reject"
+ESCALATE = "escalate"
+
+BLOCK = "block"
+WATCH = "watch"
+
+# Common character substitutions used to dodge filters
+_LEET = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t",
+                       "@": "a", "$": "s", "!": "i"})
+_link = re.compile(r"https?://|www\.|\b[\w-]+\.(?:com|net|org|xyz|ru|io|ly)\b")
+_not_word = re.compile(r"[^a-z0-9]+")
+
+
+class AhoCorasick:
+    """Multi-pattern matcher; `search` yields (start, end, value) for every occurrence."""
+
+    def __init__(self, patterns: dict):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern, value in patterns.items():
+            node = 0
+            for char in pattern:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._out[node].append((len(pattern), value))
+
+        # Breadth-first, so each node's failure link is resolved before its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def search(self, text: str):
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, value in self._out[node]:
+                yield index - length + 1, index + 1, value
+
+
+def fold(text: str) -> str:
+    """Lowercase, accent-free, leetspeak-folded form of `text`."""
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in text if not unicodedata.combining(char)).lower().translate(_LEET)
+
+
+def load_terms(path: str = MODERATION_TERMS) -> dict:
+    """Reads the term list into {term: BLOCK or WATCH}; a missing file gives no terms."""
+    terms = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                kind = WATCH if line.startswith("?") else BLOCK
+                term = fold(line.lstrip("?").strip())
+                if term:
+                    terms[term] = kind
+    except FileNotFoundError:
+        logger.warning(f"Moderation term list not found: {path}")
+    return terms
+
+
+def phrase(text: str) -> str:
+    """Allowlist form of `text`: lowercase, accent-free words separated by single spaces."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return _not_word.sub(" ", text).strip()
+
+
+def load_allowlist(path: str = MODERATION_ALLOWLIST) -> set:
+    """Reads the allowlist into a set of phrases; a missing file gives none."""
+    phrases = set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = phrase(line.split("#", 1)[0])
+                if line:
+                    phrases.add(line)
+    except FileNotFoundError:
+        logger.warning(f"Moderation allowlist not found: {path}")
+    return phrases
+
+
+def _whole_word(text: str, start: int, end: int) -> bool:
+    return ((start == 0 or not text[start - 1].isalnum())
+            and (end == len(text) or not text[end].isalnum()))
+
+
+class PreModerator:
+    def __init__(self, terms: dict = None, allowlist: set = None):
+        terms = load_terms() if terms is None else terms
+        self.allowlist = load_allowlist() if allowlist is None else {phrase(p) for p in allowlist}
+        self._matcher = AhoCorasick(terms)
+        # Terms with separators removed, matched against text with separators removed,
+        # to catch "p.o.r.n"-style spelling
+        self._compact_matcher = AhoCorasick(
+            {"".join(filter(str.isalnum, term)): kind for term, kind in terms.items()
+             if len(term) >= 4})
+
+    def classify(self, fields: dict) -> tuple:
+        """
+        Returns (decision, flagged field names, reason) for `fields`
+        ({name: text}) as a whole: REJECT if any field is, otherwise ACCEPT
+        only if every field is.
+        """
+        decision, flagged, reason = ACCEPT, [], None
+        for name, text in fields.items():
+            field_decision, field_reason = self._classify_text(text or "")
+            if field_decision == REJECT:
+                return REJECT, [name], f"{name}: {field_reason}"
+            if field_decision == ESCALATE:
+                if decision == ACCEPT:
+                    reason = f"{name}: {field_reason}"
+                decision = ESCALATE
+                flagged.append(name)
+        return decision, flagged, reason
+
+    def _classify_text(self, text: str) -> tuple:
+        if not any(char.isalnum() for char in text):
+            return ACCEPT, None
+        folded = fold(text)
+        watch = None
+        for start, end, kind in self._matcher.search(folded):
+            if not _whole_word(folded, start, end):
+                continue  # "essex" is not "sex"
+            if kind == BLOCK:
+                return REJECT, f"blocked term {folded[start:end]!r}"
+            watch = watch or f"watch term {folded[start:end]!r}"
+        if phrase(text) in self.allowlist:
+            return ACCEPT, None
+        if watch:
+            return ESCALATE, watch
+
+        compact = "".join(filter(str.isalnum, folded))
+        if next(self._compact_matcher.search(compact), None):
+            return ESCALATE, "obfuscated term"
+        if _link.search(folded):
+            return ESCALATE, "link"
+        return ESCALATE, "not allowlisted"
+
+
+premoderator = PreModerator()
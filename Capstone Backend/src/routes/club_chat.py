@@ -1,18 +1,21 @@
-from pymongo import MongoClient
-from fastapi import APIRouter, HTTPException, status, Request, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File
 from fastapi import Form
+from fastapi.concurrency import run_in_threadpool
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 from bson import ObjectId
 # Import ClubPostCreate and ClubPostResponse
 from src.schemas import ClubCreate, ClubResponse, ClubPostCreate, ClubPostResponse
-from src.auth import decode_jwt_token
 from src.database import get_database
+from src.dependencies import get_current_user, get_admin_clubs, invalidate_user, sparse_fields, FieldSelection
+from src.loaders import Loaders, get_loaders
+from src.pagination import Page, paginate
+from src.etags import Conditional, versioned, bump_version
+from src.serialization import BSONResponse
+from src.streaming import stream_format, stream_response
 # Import Club model and PyObjectId
 from src.models import Club, PyObjectId, ClubPost
-import uuid
-import boto3
 import cloudinary
 import cloudinary.uploader
 import os
@@ -35,34 +38,49 @@ user_collection = db['users']
 club_posts_collection = db["club_posts"]
 
 
+def format_club(club: dict) -> dict:
+    """ClubResponse-shaped dict; fields left out by a projection come back empty."""
+    return {
+        "id": str(club["_id"]),
+        "name": club.get("name"),
+        "description": club.get("description"),
+        "created_at": club.get("created_at"),
+        "created_by": str(club["created_by"]) if "created_by" in club else None,
+        "members": [str(m) for m in club.get("members", [])],
+        "faculty_advisor": [str(f) for f in club.get("faculty_advisor", [])],
+        "admins": [str(admin) for admin in club.get("admins", [])],
+        "image_url": club.get("image_url")
+    }
+
+
+async def ensure_club_admin(club_id: str, user: dict, admin_clubs, detail: str):
+    """
+    Raises 403 unless `user` administers the club.
+
+    Uses the role claims from the token when they are current, otherwise
+    falls back to the club's `admins` list.
+    """
+    if admin_clubs is not None:
+        if club_id not in admin_clubs:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+        return
+
+    club = await clubs_collection.find_one({"_id": ObjectId(club_id)}, {"admins": 1})
+    if not club:
+        raise HTTPException(status_code=404, detail="Club not found")
+    if str(user["_id"]) not in [str(aid) for aid in club.get("admins", [])]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+
 @router.post("/createclub", response_model=ClubResponse)
-def create_club(
-    request: Request,
+async def create_club(
     name: str = Form(...),
     description: str = Form(...),
-    image: UploadFile = File(None)
+    image: UploadFile = File(None),
+    user: dict = Depends(get_current_user)
 ):
     try:
-        existing_club = clubs_collection.find_one({"name": name})
-        access_token = request.cookies.get("access_token")
-        if access_token is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing access token"
-            )
-
-        current_user = decode_jwt_token(access_token)
-        if current_user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token"
-            )
-
-        user = user_collection.find_one({"regno": current_user["regno"]})
-
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-            )
-
+        existing_club = await clubs_collection.find_one({"name": name}, {"_id": 1})
         created_by = str(user["_id"])
 
         if existing_club:
@@ -75,7 +93,8 @@ def create_club(
         image_url = None
         if image:
             try:
-                upload_result = cloudinary.uploader.upload(
+                upload_result = await run_in_threadpool(
+                    cloudinary.uploader.upload,
                     image.file, folder="club_images", resource_type="auto"
                 )
                 image_url = upload_result.get("secure_url")
@@ -96,12 +115,15 @@ def create_club(
         club_data_dict = club_data.dict(by_alias=True)
         club_data_dict["created_at"] = datetime.utcnow()
 
-        result = clubs_collection.insert_one(club_data_dict)
-        created_club = clubs_collection.find_one({"_id": result.inserted_id})
-        user['clubs_participated'] = user['clubs_participated'].append(created_club['_id'])
-        user_collection.update_one(
+        result = await clubs_collection.insert_one(club_data_dict)
+        await bump_version("clubs")
+        created_club = await clubs_collection.find_one({"_id": result.inserted_id})
+        await user_collection.update_one(
         {"_id": user["_id"]},
-        {"$push": {"clubs_participated": created_club["_id"]}})
+        {"$push": {"clubs_participated": created_club["_id"],
+                   "clubs_administered": created_club["_id"]},
+         "$inc": {"claims_version": 1}})
+        invalidate_user(user["_id"])
 
         if created_club:
             res = {
@@ -129,32 +151,16 @@ def create_club(
 
 
 @router.post("/{club_id}/createpost", response_model=ClubPostResponse)
-def create_club_post(club_id: str, post: ClubPostCreate, request: Request):
+async def create_club_post(
+    club_id: str,
+    post: ClubPostCreate,
+    user: dict = Depends(get_current_user),
+    admin_clubs=Depends(get_admin_clubs)
+):
     try:
-        access_token = request.cookies.get("access_token")
-        if access_token is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing access token")
-
-        current_user = decode_jwt_token(access_token)
-        if current_user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token")
-
-        user = user_collection.find_one({"regno": current_user["regno"]})
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-        club = clubs_collection.find_one({"_id": ObjectId(club_id)})
-        if club is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Club not found")
-
         # Verify if the user is an admin of the club
-        if str(user["_id"]) not in [str(admin_id) for admin_id in club["admins"]]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="User is not an admin of this club")
+        await ensure_club_admin(club_id, user, admin_clubs,
+                          "User is not an admin of this club")
 
         # Create the club post
         club_post_data = ClubPost(
@@ -167,8 +173,8 @@ def create_club_post(club_id: str, post: ClubPostCreate, request: Request):
         club_post_data_dict["created_at"] = datetime.utcnow()
         club_post_data_dict["updated_at"] = datetime.utcnow()
 
-        result = club_posts_collection.insert_one(club_post_data_dict)
-        created_club_post = club_posts_collection.find_one(
+        result = await club_posts_collection.insert_one(club_post_data_dict)
+        created_club_post = await club_posts_collection.find_one(
             {"_id": result.inserted_id})
 
         if created_club_post:
@@ -195,31 +201,39 @@ def create_club_post(club_id: str, post: ClubPostCreate, request: Request):
 from bson.errors import InvalidId
 
 @router.get("/{club_id}/posts", response_model=List[ClubPostResponse])
-def get_club_posts(club_id: str):
+async def get_club_posts(
+    club_id: str,
+    fields: FieldSelection = Depends(sparse_fields(ClubPostResponse)),
+    page: Page = Depends(paginate)
+):
     try:
         # First validate the club exists
-        club = clubs_collection.find_one({"_id": ObjectId(club_id)})
+        club = await clubs_collection.find_one({"_id": ObjectId(club_id)}, {"_id": 1})
         if not club:
             raise HTTPException(status_code=404, detail="Club not found")
             
         # Query posts from club_posts_collection instead of posts_collection
-        posts = list(club_posts_collection.find({"club_id": ObjectId(club_id)}))
-        
-        # Format the response
+        projection = fields.projection
+        if projection and "updated_at" in projection:
+            projection["created_at"] = 1  # updated_at falls back to created_at
+        posts = await page.fetch(
+            club_posts_collection, {"club_id": ObjectId(club_id)}, projection)
+
+        # Format the response; the chat reads oldest to newest, next_cursor pages back in time
         formatted_posts = []
-        for post in posts:
+        for post in reversed(posts):
             formatted_post = {
                 "id": str(post["_id"]),
-                "club_id": str(post["club_id"]),
-                "user_id": str(post["user_id"]),
-                "title": post["title"],
-                "content": post["content"],
-                "created_at": post["created_at"],
-                "updated_at": post.get("updated_at", post["created_at"])
+                "club_id": str(post.get("club_id")),
+                "user_id": str(post.get("user_id")),
+                "title": post.get("title"),
+                "content": post.get("content"),
+                "created_at": post.get("created_at"),
+                "updated_at": post.get("updated_at", post.get("created_at"))
             }
             formatted_posts.append(formatted_post)
             
-        return formatted_posts
+        return page.respond(fields.respond(formatted_posts))
         
     except InvalidId:
         raise HTTPException(status_code=400, detail="Invalid club ID format")
@@ -228,14 +242,15 @@ def get_club_posts(club_id: str):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.get("/{user_id}/clubs", response_model=List[ClubResponse])
-def get_user_clubs(user_id: str):
+async def get_user_clubs(user_id: str):
     from bson import ObjectId  # Ensure ObjectId is imported
-    user = user_collection.find_one({"_id": ObjectId(user_id)})
+    user = await user_collection.find_one(
+        {"_id": ObjectId(user_id)}, {"clubs_participated": 1, "clubs_administered": 1})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     clubs_ids = list(set(user.get("clubs_participated", []) + user.get("clubs_administered", [])))
-    clubs = list(clubs_collection.find({"_id": {"$in": clubs_ids}}))
+    clubs = await clubs_collection.find({"_id": {"$in": clubs_ids}}).to_list(length=None)
     
     result = []
     for club in clubs:
@@ -257,34 +272,26 @@ class MakeAdminAction(BaseModel):
     user_id: str
 
 @router.post("/{club_id}/make-admin")
-def make_club_admin(club_id: str, action: MakeAdminAction, request: Request):
-    # Validate access token
-    access_token = request.cookies.get("access_token")
-    if not access_token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing access token")
-    
-    current_user = decode_jwt_token(access_token)
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token")
-    
-    # Get admin user making the request
-    admin_user = user_collection.find_one({"regno": current_user["regno"]})
-    if not admin_user:
-        raise HTTPException(status_code=404, detail="User not found")
+async def make_club_admin(
+    club_id: str,
+    action: MakeAdminAction,
+    admin_user: dict = Depends(get_current_user),
+    admin_clubs=Depends(get_admin_clubs)
+):
+    # Verify the requesting user is an admin
+    await ensure_club_admin(club_id, admin_user, admin_clubs,
+                      "Only administrators can make other users admin")
 
     # Get the club
-    club = clubs_collection.find_one({"_id": ObjectId(club_id)})
+    club = await clubs_collection.find_one(
+        {"_id": ObjectId(club_id)}, {"members": 1, "admins": 1})
     if not club:
         raise HTTPException(status_code=404, detail="Club not found")
 
-    # Verify the requesting user is an admin
-    if str(admin_user["_id"]) not in [str(aid) for aid in club.get("admins", [])]:
-        raise HTTPException(status_code=403, detail="Only administrators can make other users admin")
-
     target_user_id = action.user_id
 
     # Verify target user exists
-    target_user = user_collection.find_one({"_id": ObjectId(target_user_id)})
+    target_user = await user_collection.find_one({"_id": ObjectId(target_user_id)}, {"_id": 1})
     if not target_user:
         raise HTTPException(status_code=404, detail="Target user not found")
 
@@ -297,31 +304,26 @@ def make_club_admin(club_id: str, action: MakeAdminAction, request: Request):
         raise HTTPException(status_code=400, detail="User is already an admin")
 
     # Add user to admins list
-    clubs_collection.update_one(
+    await clubs_collection.update_one(
         {"_id": club["_id"]}, 
         {"$push": {"admins": ObjectId(target_user_id)}}
     )
+    await bump_version("clubs")
 
-    # Add club to user's administered clubs
-    user_collection.update_one(
+    # Add club to user's administered clubs; older tokens lose their role claims
+    await user_collection.update_one(
         {"_id": ObjectId(target_user_id)}, 
-        {"$push": {"clubs_administered": club["_id"]}}
+        {"$push": {"clubs_administered": club["_id"]},
+         "$inc": {"claims_version": 1}}
     )
+    invalidate_user(target_user_id)
 
     return {"message": "User successfully made club admin"}
 
 @router.post("/{club_id}/join")
-def join_club(club_id: str, request: Request):
-    access_token = request.cookies.get("access_token")
-    if not access_token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing access token")
-    current_user = decode_jwt_token(access_token)
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token")
-    user = user_collection.find_one({"regno": current_user["regno"]})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    club = clubs_collection.find_one({"_id": ObjectId(club_id)})
+async def join_club(club_id: str, user: dict = Depends(get_current_user)):
+    club = await clubs_collection.find_one(
+        {"_id": ObjectId(club_id)}, {"members": 1, "pending_requests": 1})
     if not club:
         raise HTTPException(status_code=404, detail="Club not found")
     user_id_str = str(user["_id"])
@@ -329,31 +331,25 @@ def join_club(club_id: str, request: Request):
         raise HTTPException(status_code=400, detail="Already a member of the club")
     if user_id_str in [str(pid) for pid in club.get("pending_requests", [])]:
         raise HTTPException(status_code=400, detail="Join request already pending")
-    clubs_collection.update_one({"_id": club["_id"]}, {"$push": {"pending_requests": ObjectId(user_id_str)}})
+    await clubs_collection.update_one({"_id": club["_id"]}, {"$push": {"pending_requests": ObjectId(user_id_str)}})
     return {"message": "Join request submitted successfully"}
 
 @router.get("/{club_id}/pending")
-def get_pending_requests(club_id: str, request: Request):
-    access_token = request.cookies.get("access_token")
-    if not access_token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing access token")
-    current_user = decode_jwt_token(access_token)
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token")
-    admin_user = user_collection.find_one({"regno": current_user["regno"]})
-    if not admin_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    club = clubs_collection.find_one({"_id": ObjectId(club_id)})
+async def get_pending_requests(
+    club_id: str,
+    admin_user: dict = Depends(get_current_user),
+    admin_clubs=Depends(get_admin_clubs),
+    loaders: Loaders = Depends(get_loaders)
+):
+    await ensure_club_admin(club_id, admin_user, admin_clubs,
+                      "Only administrators can view pending requests")
+    club = await clubs_collection.find_one(
+        {"_id": ObjectId(club_id)}, {"pending_requests": 1})
     if not club:
         raise HTTPException(status_code=404, detail="Club not found")
-    print(admin_user["_id"])
-    print(club.get("admins", []))
-    if str(admin_user["_id"]) not in [str(aid) for aid in club.get("admins", [])]:
-        raise HTTPException(status_code=403, detail="Only administrators can view pending requests")
     pending = club.get("pending_requests", [])
     pending_list = []
-    for uid in pending:
-        pending_user = user_collection.find_one({"_id": uid})
+    for pending_user in await loaders.users.load_many(pending):
         if pending_user:
             pending_list.append({
                 "id": str(pending_user["_id"]),
@@ -363,112 +359,108 @@ def get_pending_requests(club_id: str, request: Request):
     return pending_list
 
 @router.post("/{club_id}/approve")
-def approve_request(club_id: str, action: JoinAction, request: Request):
-    access_token = request.cookies.get("access_token")
-    if not access_token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing access token")
-    current_user = decode_jwt_token(access_token)
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token")
-    admin_user = user_collection.find_one({"regno": current_user["regno"]})
-    if not admin_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    club = clubs_collection.find_one({"_id": ObjectId(club_id)})
+async def approve_request(
+    club_id: str,
+    action: JoinAction,
+    admin_user: dict = Depends(get_current_user),
+    admin_clubs=Depends(get_admin_clubs)
+):
+    await ensure_club_admin(club_id, admin_user, admin_clubs,
+                      "Only administrators can approve join requests")
+    club = await clubs_collection.find_one(
+        {"_id": ObjectId(club_id)}, {"pending_requests": 1})
     if not club:
         raise HTTPException(status_code=404, detail="Club not found")
-    if str(admin_user["_id"]) not in [str(aid) for aid in club.get("admins", [])]:
-        raise HTTPException(status_code=403, detail="Only administrators can approve join requests")
     join_user_id = action.user_id
     if join_user_id not in [str(pid) for pid in club.get("pending_requests", [])]:
         raise HTTPException(status_code=400, detail="User join request is not pending")
-    join_user = user_collection.find_one({"_id": ObjectId(join_user_id)})
-    clubs_collection.update_one({"_id": club["_id"]}, {"$pull": {"pending_requests": ObjectId(join_user_id)}})
-    clubs_collection.update_one({"_id": club["_id"]}, {"$push": {"members": ObjectId(join_user_id)}})
-    user_collection.update_one({"_id": ObjectId(join_user_id)}, {"$push": {"clubs_participated": club["_id"]}})
+    await clubs_collection.update_one({"_id": club["_id"]}, {"$pull": {"pending_requests": ObjectId(join_user_id)}})
+    await clubs_collection.update_one({"_id": club["_id"]}, {"$push": {"members": ObjectId(join_user_id)}})
+    await bump_version("clubs")
+    await user_collection.update_one({"_id": ObjectId(join_user_id)}, {"$push": {"clubs_participated": club["_id"]}})
+    invalidate_user(join_user_id)
     return {"message": "User approved and added to club members"}
 
 @router.post("/{club_id}/decline")
-def decline_request(club_id: str, action: JoinAction, request: Request):
-    access_token = request.cookies.get("access_token")
-    if not access_token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing access token")
-    current_user = decode_jwt_token(access_token)
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token")
-    admin_user = user_collection.find_one({"regno": current_user["regno"]})
-    if not admin_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    club = clubs_collection.find_one({"_id": ObjectId(club_id)})
+async def decline_request(
+    club_id: str,
+    action: JoinAction,
+    admin_user: dict = Depends(get_current_user),
+    admin_clubs=Depends(get_admin_clubs)
+):
+    await ensure_club_admin(club_id, admin_user, admin_clubs,
+                      "Only administrators can decline join requests")
+    club = await clubs_collection.find_one(
+        {"_id": ObjectId(club_id)}, {"pending_requests": 1})
     if not club:
         raise HTTPException(status_code=404, detail="Club not found")
-    if str(admin_user["_id"]) not in [str(aid) for aid in club.get("admins", [])]:
-        raise HTTPException(status_code=403, detail="Only administrators can decline join requests")
     join_user_id = action.user_id
     if join_user_id not in [str(pid) for pid in club.get("pending_requests", [])]:
         raise HTTPException(status_code=400, detail="User join request is not pending")
-    clubs_collection.update_one({"_id": club["_id"]}, {"$pull": {"pending_requests": ObjectId(join_user_id)}})
+    await clubs_collection.update_one({"_id": club["_id"]}, {"$pull": {"pending_requests": ObjectId(join_user_id)}})
     return {"message": "User join request declined"}
 
 @router.get("/clubs/all", response_model=List[ClubResponse])
-def get_all_clubs():
+async def get_all_clubs(
+    fields: FieldSelection = Depends(sparse_fields(ClubResponse)),
+    conditional: Conditional = Depends(versioned("clubs")),
+    stream: Optional[str] = Depends(stream_format)
+):
+    # Client copy is current: skip the query and serialization
+    if conditional.not_modified:
+        return conditional.not_modified_response()
     try:
-        clubs = list(clubs_collection.find())
+        if stream:
+            def shape(club):
+                club = format_club(club)
+                return fields.select(club) if fields else club
+            return conditional.respond(stream_response(
+                clubs_collection.find({}, fields.projection), shape, stream))
+
+        clubs = await clubs_collection.find({}, fields.projection).to_list(length=None)
         result = []
         for club in clubs:
-            club_data = {
-                "id": str(club["_id"]),
-                "name": club["name"],
-                "description": club["description"],
-                "created_at": club["created_at"],
-                "created_by": str(club["created_by"]),
-                "members": [str(m) for m in club.get("members", [])],
-                "faculty_advisor": [str(f) for f in club.get("faculty_advisor", [])],
-                "admins": [str(admin) for admin in club.get("admins", [])],
-                "image_url": club.get("image_url")
-            }
-            result.append(club_data)
-        return result
+            result.append(format_club(club))
+        # format_club already matches ClubResponse
+        return conditional.respond(fields.respond(result) if fields else BSONResponse(result))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{club_id}/details", response_model=ClubResponse)
-def get_club_details(club_id: str):
+async def get_club_details(
+    club_id: str,
+    fields: FieldSelection = Depends(sparse_fields(ClubResponse))
+):
     from bson.errors import InvalidId
     try:
-        club = clubs_collection.find_one({"_id": ObjectId(club_id)})
+        club = await clubs_collection.find_one({"_id": ObjectId(club_id)}, fields.projection)
         if not club:
             raise HTTPException(status_code=404, detail="Club not found")
-        club["id"] = str(club["_id"])
-        club["created_by"] = str(club["created_by"])
-        club["members"] = [str(m) for m in club.get("members", [])]
-        club["admins"] = [str(a) for a in club.get("admins", [])]
-        club["faculty_advisor"] = [str(f) for f in club.get("faculty_advisor", [])]
-        return club
+        return fields.respond(format_club(club))
     except InvalidId:
         raise HTTPException(status_code=400, detail="Invalid club ID format")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{club_id}/participants")
-def get_participants(club_id: str, request: Request):
-    access_token = request.cookies.get("access_token")
-    if not access_token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing access token")
-    current_user = decode_jwt_token(access_token)
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token")
-    club = clubs_collection.find_one({"_id": ObjectId(club_id)})
+async def get_participants(
+    club_id: str,
+    user: dict = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders)
+):
+    club = await clubs_collection.find_one(
+        {"_id": ObjectId(club_id)}, {"members": 1, "admins": 1})
     if not club:
         raise HTTPException(status_code=404, detail="Club not found")
     participants = []
-    for uid in club.get("members", []):
-        # Exclude members who are already admins
-        if str(uid) not in [str(a) for a in club.get("admins", [])]:
-            pending_user = user_collection.find_one({"_id": ObjectId(uid)})
-            if pending_user:
-                participants.append({
-                    "id": str(pending_user["_id"]),
-                    "name": pending_user.get("name", ""),
-                    "regno": pending_user.get("regno", "")
-                })
+    # Exclude members who are already admins
+    admins = {str(a) for a in club.get("admins", [])}
+    member_ids = [uid for uid in club.get("members", []) if str(uid) not in admins]
+    for member in await loaders.users.load_many(member_ids):
+        if member:
+            participants.append({
+                "id": str(member["_id"]),
+                "name": member.get("name", ""),
+                "regno": member.get("regno", "")
+            })
     return participants
@@ -1,12 +1,16 @@
 from src.models import Comment
 from src.schemas import CommentCreate, CommentResponse  # Import CommentResponse
 from src.database import get_database
-from src.auth import decode_jwt_token
 
-from fastapi import APIRouter, HTTPException, status, Request
+from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.responses import JSONResponse
 from datetime import datetime
-from src.gemini import is_NSFW
+from src.dependencies import get_current_user
+from src import counters
+from src.feed_cache import feed_cache
+from src.serialization import BSONResponse, shaper
+from src.moderation_queue import moderation_queue, PENDING, PUBLISHED, VISIBLE, visible_to
+from src.moderation_providers import ModerationUnavailable
 from bson import ObjectId
 
 router = APIRouter(prefix="/comment", tags=["Comments"])
@@ -17,49 +21,65 @@ posts_collection = db.posts
 users_collection = db.users
 comments_collection = db.comments
 
+shape_comment = shaper(CommentResponse)
+
+
+async def comment_published(comment: dict):
+    await counters.comment_created(ObjectId(comment["post_id"]), ObjectId(comment["user_id"]))
+    feed_cache.post_changed(comment["post_id"])
+
+
+moderation_queue.register("comment", comments_collection, ("content",), comment_published)
+
+
+def _moderation_unavailable():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Moderation is unavailable, please try again shortly",
+        headers={"Retry-After": "5"},
+    )
+
 
 # Change to CommentResponse
 @router.post("/create", response_model=CommentResponse)
-def create_comment(comment: CommentCreate, request: Request):
+async def create_comment(comment: CommentCreate, user: dict = Depends(get_current_user)):
     try:
-        token = request.cookies.get("access_token")
-        if not token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token not found",
-            )
-
-        token_data = decode_jwt_token(token)
-        user = users_collection.find_one({"regno": token_data["regno"]})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token",
-            )
-
-        post = posts_collection.find_one({"_id": ObjectId(comment.post_id)})
+        post = await posts_collection.find_one(
+            {"_id": ObjectId(comment.post_id), **visible_to(user["regno"])}, {"_id": 1})
         if not post:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Post not found",
             )
-        comment_d = comment.model_dump()
-        if is_NSFW(comment_d['content']).strip() == 'Yes':
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Post contains NSFW content",
-            )
         comment_data = comment.dict()
         comment_data["user_id"] = str(user["_id"])
         comment_data['post_id'] = str(post["_id"])
         comment_data["created_at"] = datetime.utcnow()
 
-        result = comments_collection.insert_one(comment_data)
+        # In async mode the comment is stored as pending and moderated in the background
+        if moderation_queue.enabled:
+            comment_data["status"] = PENDING
+        else:
+            verdict = await moderation_queue.check("comment", comment_data)
+            if verdict.nsfw:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Post contains NSFW content",
+                )
+            comment_data["status"] = PUBLISHED
+
+        result = await comments_collection.insert_one(comment_data)
         comment_data["_id"] = result.inserted_id  # get inserted id
+        if moderation_queue.enabled:
+            comment_data["status"] = await moderation_queue.submit("comment", comment_data)
+        else:
+            await moderation_queue.publish("comment", comment_data)
         comment_data["id"] = str(result.inserted_id)
 
         return CommentResponse(**comment_data)
 
+    except ModerationUnavailable:
+        raise _moderation_unavailable()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -68,24 +88,10 @@ def create_comment(comment: CommentCreate, request: Request):
 
 
 @router.delete("/delete/{comment_id}")
-def delete_comment(comment_id: str, request: Request):
+async def delete_comment(comment_id: str, user: dict = Depends(get_current_user)):
     try:
-        token = request.cookies.get("access_token")
-        if not token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token not found",
-            )
-
-        token_data = decode_jwt_token(token)
-        user = users_collection.find_one({"regno": token_data["regno"]})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token",
-            )
-
-        comment = comments_collection.find_one({"_id": ObjectId(comment_id)})
+        comment = await comments_collection.find_one(
+            {"_id": ObjectId(comment_id)}, {"user_id": 1, "post_id": 1, "status": 1})
         if not comment:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -98,7 +104,11 @@ def delete_comment(comment_id: str, request: Request):
                 detail="Unauthorized",
             )
 
-        comments_collection.delete_one({"_id": ObjectId(comment_id)})
+        result = await comments_collection.delete_one({"_id": ObjectId(comment_id)})
+        # Pending and rejected comments were never counted
+        if result.deleted_count and comment.get("status", PUBLISHED) == PUBLISHED:
+            await counters.comment_deleted(ObjectId(comment["post_id"]), user["_id"])
+            feed_cache.post_changed(comment["post_id"])
 
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -112,32 +122,15 @@ def delete_comment(comment_id: str, request: Request):
         )
 
 
-@router.get("/all")
-def get_all_comments(request: Request):
+@router.get("/all", response_model=list[CommentResponse])
+async def get_all_comments(user: dict = Depends(get_current_user)):
     try:
-        token = request.cookies.get("access_token")
-        if not token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token not found",
-            )
-
-        token_data = decode_jwt_token(token)
-        user = users_collection.find_one({"regno": token_data["regno"]})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token",
-            )
-
-        comments = comments_collection.find()
+        comments = comments_collection.find(VISIBLE)
         comments_list = []
-        for comment in comments:
-            comment["id"] = str(comment["id"])
-            comments_list.append(CommentResponse(
-                **comment))  # Use CommentResponse
+        async for comment in comments:
+            comments_list.append(shape_comment(comment))  # Shaped as CommentResponse
 
-        return comments_list
+        return BSONResponse(comments_list)
 
     except Exception as e:
         raise HTTPException(
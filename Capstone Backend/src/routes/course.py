@@ -2,17 +2,19 @@
 # Create a router to manage the courses
 # Create a router to manage the courses
 # Create a router to manage the courses
-from fastapi import APIRouter, Request
+from fastapi import APIRouter
 # Import json response
 from fastapi.responses import JSONResponse
 from fastapi import HTTPException, status
 from src.models import Course
-from src.auth import decode_jwt_token
 from src.schemas import CourseCreate, CourseResponse
 from typing import List
 from datetime import datetime
 from bson import ObjectId  # Import ObjectId
-from fastapi import Cookie, HTTPException
+from fastapi import HTTPException, Depends
+from src.dependencies import get_current_user, sparse_fields, FieldSelection
+from src.etags import Conditional, versioned, bump_version
+from src.serialization import BSONResponse, shaper
 
 from src.database import get_database
 
@@ -23,45 +25,49 @@ user_collection = db.users
 
 router = APIRouter(prefix="/courses", tags=["Courses"])
 
+shape_course = shaper(CourseResponse)
+
 
 # Updated response_model
 @router.get("/all", response_model=List[CourseResponse])
-async def get_courses():
+async def get_courses(
+    fields: FieldSelection = Depends(sparse_fields(CourseResponse)),
+    conditional: Conditional = Depends(versioned("courses"))
+):
+    # Client copy is current: skip the query and serialization
+    if conditional.not_modified:
+        return conditional.not_modified_response()
     try:
-        courses_cursor = courses_collection.find()  # Get the cursor
+        courses_cursor = courses_collection.find({}, fields.projection)  # Get the cursor
         courses_list = []
         # Iterate through the cursor
-        for course_doc in courses_cursor.to_list(length=None):
+        for course_doc in await courses_cursor.to_list(length=None):
             # Convert ObjectId to string
             course_doc["id"] = str(course_doc["_id"])
-            courses_list.append(course_doc)  # Add to list
-        return courses_list  # Return the list of CourseResponse objects
+            courses_list.append(course_doc if fields else shape_course(course_doc))  # Add to list
+        # Return the list of CourseResponse objects
+        return conditional.respond(fields.respond(courses_list) if fields else BSONResponse(courses_list))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/register/{course_id}")
-async def register_course(course_id: str, access_token: str = Cookie(None)):
+async def register_course(course_id: str, user: dict = Depends(get_current_user)):
     try:
-        token_data = decode_jwt_token(access_token)
-        if not token_data:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        regno = token_data.get("regno")
-        user = user_collection.find_one({"regno": regno})
         user_id = user.get("_id")
         if not user_id:
             raise HTTPException(
                 status_code=400, detail="User ID not found in token")
 
         # Validate course existence
-        course = courses_collection.find_one({"_id": ObjectId(course_id)})
+        course = await courses_collection.find_one({"_id": ObjectId(course_id)}, {"students": 1})
         if not course:
             raise HTTPException(
                 status_code=400, detail="Course with this course id does not exist")
 
         # Add user to the course's students array if not already registered
         if str(user_id) not in course.get("students", []):
-            result = courses_collection.update_one(
+            result = await courses_collection.update_one(
                 {"_id": ObjectId(course_id)},
                 {"$push": {"students": str(user_id)}}
             )
@@ -77,13 +83,8 @@ async def register_course(course_id: str, access_token: str = Cookie(None)):
 
 
 @router.get("/registered", response_model=List[CourseResponse])
-async def get_registered_courses(access_token: str = Cookie(None)):
+async def get_registered_courses(user: dict = Depends(get_current_user)):
     try:
-        token_data = decode_jwt_token(access_token)
-        if not token_data:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        regno = token_data.get("regno")
-        user = user_collection.find_one({"regno": regno})
         user_id = user.get("_id")
         if not user_id:
             raise HTTPException(
@@ -93,7 +94,7 @@ async def get_registered_courses(access_token: str = Cookie(None)):
         courses_cursor = courses_collection.find({"students": str(user_id)})
         courses_list = []
         print(f"User ID: {user_id}")
-        for course_doc in courses_cursor.to_list(length=None):
+        for course_doc in await courses_cursor.to_list(length=None):
             print(f"Course: {course_doc}")
             course_doc["id"] = str(course_doc["_id"])
             courses_list.append(course_doc)
@@ -103,11 +104,11 @@ async def get_registered_courses(access_token: str = Cookie(None)):
 
 
 @router.post("/create", response_model=CourseResponse)
-def create_course(course: CourseCreate):
+async def create_course(course: CourseCreate):
     try:
         name, course_code = course.name, course.course_code
-        existing_course = courses_collection.find_one(
-            {"course_code": course_code})
+        existing_course = await courses_collection.find_one(
+            {"course_code": course_code}, {"_id": 1})
         if existing_course:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -118,8 +119,9 @@ def create_course(course: CourseCreate):
             "course_code": course_code,
             "created_at": datetime.utcnow()  # Explicitly add created_at here
         }
-        result = courses_collection.insert_one(course_data)
-        created_course = courses_collection.find_one(
+        result = await courses_collection.insert_one(course_data)
+        await bump_version("courses")
+        created_course = await courses_collection.find_one(
             {"_id": result.inserted_id})
         # Convert ObjectId to string for 'id'
         created_course["id"] = str(created_course["_id"])
@@ -130,13 +132,14 @@ def create_course(course: CourseCreate):
 
 # Updated response_model
 @router.delete("/delete/{course_id}", response_model=CourseResponse)
-def delete_course(course_id: str):
+async def delete_course(course_id: str):
     try:
-        deleted_course = courses_collection.find_one(
+        deleted_course = await courses_collection.find_one(
             {"_id": ObjectId(course_id)})  # Fetch course to be deleted
         if deleted_course:  # Check if course exists
-            courses_collection.delete_one(
+            await courses_collection.delete_one(
                 {"_id": ObjectId(course_id)})  # Delete the course
+            await bump_version("courses")
             # Convert ObjectId to string
             deleted_course["id"] = str(deleted_course["_id"])
             return deleted_course  # Return the deleted CourseResponse object
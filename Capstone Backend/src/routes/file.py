@@ -1,16 +1,23 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Cookie, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends
+from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.concurrency import run_in_threadpool
 import os
 import boto3
 from botocore.exceptions import ClientError
 import logging
-from io import BytesIO
 from datetime import datetime
 from dotenv import load_dotenv
 from typing import Optional, List
 from src.models import FileMetadata, PyObjectId
 from src.database import get_database
-from src.auth import decode_jwt_token
+from src.dependencies import get_current_user, sparse_fields, FieldSelection
+from src.pagination import Page, paginate
+from src.streaming import stream_format, stream_response
+from src.s3_upload import (stream_upload, presigned_post, EmptyUpload, UploadTooLarge,
+                           MAX_UPLOAD_SIZE, PRESIGNED_POST_EXPIRY)
+from src.schemas import FileUploadRequest, FileUploadCommit
+from src.download_urls import download_urls, key_from_url
+from pymongo.errors import DuplicateKeyError
 from fastapi import HTTPException
 
 load_dotenv()
@@ -39,13 +46,46 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def object_key(course_name: str, file_name: str) -> str:
+    """S3 key of a new upload: the course folder and a timestamped, slash-free name."""
+    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')
+    return f"{course_name}/{timestamp}_{file_name.replace('/', '_')}"
+
+
+def file_document(user_id, file_name: str, key: str, course: dict, course_name: str,
+                  description: Optional[str]) -> dict:
+    return {
+        "user_id": user_id,
+        "file_name": file_name,
+        "file_url": f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}",
+        "s3_key": key,
+        "file_type": "application/pdf",
+        "uploaded_at": datetime.utcnow(),
+        "course_id": course["_id"],
+        "description": description or "",
+        "subject": course_name
+    }
+
+
+async def find_course(course_id: str):
+    """Returns the course and its name as used in S3 keys, or raises 400/404."""
+    try:
+        course_oid = PyObjectId(course_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid course ID")
+    course = await course_collection.find_one({"_id": course_oid}, {"name": 1})
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return course, course.get('name', 'unknown').replace('/', '-')
+
+
 @router.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
     file_name: str = Form(...),
     course_id: str = Form(...),
-    access_token: str = Cookie(None),
     description: Optional[str] = Form(None),
+    user: dict = Depends(get_current_user),
 ):
     try:
         logger.info(f"Starting file upload: {file_name} for course {course_id}")
@@ -61,79 +101,45 @@ async def upload_file(
         if not file.content_type == "application/pdf":
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
         
-        # Get file content
-        try:
-            file_content = await file.read()
-            if not file_content:
-                raise HTTPException(status_code=400, detail="Empty file")
-        except Exception as e:
-            logger.error(f"File read error: {str(e)}")
-            raise HTTPException(status_code=400, detail="Could not read file content")
+        # Reject oversized files the client declared up front; the limit is
+        # enforced again while streaming
+        if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+            raise HTTPException(status_code=413, detail="File is too large")
 
-        # Auth and user check
-        try:
-            token_data = decode_jwt_token(access_token)
-            if not token_data:
-                raise HTTPException(status_code=401, detail="Invalid token")
-            
-            regno = token_data.get("regno")
-            user = user_collection.find_one({"regno": regno})
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            user_id = user.get("_id")
-        except Exception as e:
-            logger.error(f"Auth error: {str(e)}")
-            raise HTTPException(status_code=401, detail="Authentication failed")
+        user_id = user.get("_id")
 
-        # Course check
-        try:
-            course = course_collection.find_one({"_id": PyObjectId(course_id)})
-            if not course:
-                raise HTTPException(status_code=404, detail="Course not found")
-            course_name = course.get('name', 'unknown').replace('/', '-')
-        except Exception as e:
-            logger.error(f"Course error: {str(e)}")
-            raise HTTPException(status_code=400, detail="Invalid course ID")
+        # Course check: 400 for a malformed ID, 404 for an unknown course
+        course, course_name = await find_course(course_id)
 
-        # Create safe filename
-        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-        safe_filename = f"{timestamp}_{file_name.replace('/', '_')}"
-        key = f"{course_name}/{safe_filename}"
+        key = object_key(course_name, file_name)
 
-        # Upload to S3
+        # Stream to S3 from the upload spool, one part at a time
         try:
-            s3.upload_fileobj(
-                BytesIO(file_content),
+            await stream_upload(
+                s3,
+                file,
                 S3_BUCKET_NAME,
                 key,
-                ExtraArgs={
-                    "ContentType": "application/pdf",
-                    "Metadata": {
-                        "filename": file_name,
-                        "description": description or ""
-                    }
+                "application/pdf",
+                metadata={
+                    "filename": file_name,
+                    "description": description or ""
                 }
             )
+        except EmptyUpload:
+            raise HTTPException(status_code=400, detail="Empty file")
+        except UploadTooLarge:
+            raise HTTPException(status_code=413, detail="File is too large")
         except ClientError as e:
             logger.error(f"S3 upload error: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to upload to storage")
 
         # Save metadata
         try:
-            file_url = f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
-            file_metadata = {
-                "user_id": user_id,
-                "file_name": file_name,
-                "file_url": file_url,
-                "file_type": "application/pdf",
-                "uploaded_at": datetime.utcnow(),
-                "course_id": course["_id"],
-                "description": description or "",
-                "subject": course_name
-            }
+            file_metadata = file_document(user_id, file_name, key, course, course_name, description)
+            file_url = file_metadata["file_url"]
 
-            result = file_metadata_collection.insert_one(file_metadata)
+            result = await file_metadata_collection.insert_one(file_metadata)
             logger.info(f"File uploaded successfully: {file_name}")
             
             return {
@@ -153,41 +159,137 @@ async def upload_file(
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
 
+@router.post("/upload-url")
+async def create_upload_url(upload: FileUploadRequest, user: dict = Depends(get_current_user)):
+    """
+    First step of a direct upload: returns a presigned POST the client sends
+    the PDF to, so the file never passes through this server. The form only
+    accepts a PDF of at most MAX_UPLOAD_SIZE bytes at the returned key.
+    """
+    if not upload.file_name.strip():
+        raise HTTPException(status_code=400, detail="File name is required")
+    course, course_name = await find_course(upload.course_id)
+    key = object_key(course_name, upload.file_name)
+
+    try:
+        form = presigned_post(
+            s3,
+            S3_BUCKET_NAME,
+            key,
+            "application/pdf",
+            metadata={
+                "filename": upload.file_name,
+                "description": upload.description or "",
+                # Checked by /commit, which trusts nothing else from the client
+                "uploader": str(user["_id"]),
+                "course-id": str(course["_id"])
+            }
+        )
+    except ClientError as e:
+        logger.error(f"Presign error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to prepare upload")
+
+    return {
+        "key": key,
+        "url": form["url"],
+        "fields": form["fields"],
+        "expires_in": PRESIGNED_POST_EXPIRY,
+        "max_size": MAX_UPLOAD_SIZE
+    }
+
+
+@router.post("/commit")
+async def commit_upload(commit: FileUploadCommit, user: dict = Depends(get_current_user)):
+    """
+    Second step of a direct upload: checks the uploaded object with a HEAD
+    request and records its metadata. Committing the same key again returns
+    the existing file.
+    """
+    try:
+        head = await run_in_threadpool(s3.head_object, Bucket=S3_BUCKET_NAME, Key=commit.key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            raise HTTPException(status_code=404, detail="Uploaded file not found")
+        logger.error(f"S3 head error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to check storage")
+
+    metadata = head.get("Metadata", {})
+    if metadata.get("uploader") != str(user["_id"]):
+        raise HTTPException(status_code=403, detail="Not your upload")
+    if head.get("ContentType") != "application/pdf":
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    if not 0 < head.get("ContentLength", 0) <= MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=400, detail="Invalid file size")
+
+    existing = await file_metadata_collection.find_one({"s3_key": commit.key}, {"file_url": 1})
+    if not existing:
+        course, course_name = await find_course(metadata.get("course-id", ""))
+        file_name = metadata.get("filename") or commit.key.rsplit("/", 1)[-1]
+        file_metadata = file_document(
+            user["_id"], file_name, commit.key, course, course_name, metadata.get("description"))
+        try:
+            result = await file_metadata_collection.insert_one(file_metadata)
+            existing = {"_id": result.inserted_id, "file_url": file_metadata["file_url"]}
+            logger.info(f"File committed successfully: {file_name}")
+        except DuplicateKeyError:
+            # A concurrent commit of the same key won
+            existing = await file_metadata_collection.find_one(
+                {"s3_key": commit.key}, {"file_url": 1})
+
+    return {
+        "message": "File uploaded successfully",
+        "file_url": existing["file_url"],
+        "file_id": str(existing["_id"])
+    }
+
+
+def format_file(file: dict) -> dict:
+    """Stringifies ids and dates in place; fields left out by a projection are skipped."""
+    file["_id"] = str(file["_id"])
+    if "user_id" in file:
+        file["user_id"] = str(file["user_id"])
+    if "uploaded_at" in file:
+        file["uploaded_at"] = file["uploaded_at"].isoformat()
+    if "course_id" in file:
+        file["course_id"] = str(file["course_id"])
+    return file
+
+
 @router.get("/course/{course_id}", response_model=List[FileMetadata])
-async def get_files_by_course(course_id: str):
+async def get_files_by_course(
+    course_id: str,
+    fields: FieldSelection = Depends(sparse_fields(FileMetadata, extra=("description",))),
+    page: Page = Depends(paginate)
+):
     try:
-        # Fetch files for the given course ID
-        # print(course_id)
-        files_cursor = file_metadata_collection.find({"course_id": PyObjectId(course_id)})
+        # Fetch a page of files for the given course ID, newest uploads first
+        files = await page.fetch(
+            file_metadata_collection, {"course_id": PyObjectId(course_id)},
+            fields.projection, field="uploaded_at")
 
         files_list = []
-        for file in files_cursor.to_list(length=None):
-            file["_id"] = str(file["_id"])
-            file["user_id"] = str(file["user_id"])
-            file["uploaded_at"] = file["uploaded_at"].isoformat()
-            file["course_id"] = str(file["course_id"])
-            files_list.append(file)
-        print(files_list)
-        return files_list
+        for file in files:
+            files_list.append(format_file(file))
+        return page.respond(fields.respond(files_list))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.delete("/delete/{file_id}")
-def delete_file(file_id: str):
+async def delete_file(file_id: str):
     try:
-        file_metadata = file_metadata_collection.find_one(
-            {"_id": PyObjectId(file_id)})
+        file_metadata = await file_metadata_collection.find_one(
+            {"_id": PyObjectId(file_id)}, {"file_name": 1, "file_url": 1, "s3_key": 1})
         if not file_metadata:
             raise HTTPException(
                 status_code=404, detail="File metadata not found")
 
         filename = file_metadata["file_name"]
-        subject = file_metadata["subject"]
-        key = f"{subject}/{filename}"
-        s3.delete_object(Bucket=S3_BUCKET_NAME, Key=key)
+        key = file_metadata.get("s3_key") or key_from_url(file_metadata["file_url"])
+        await run_in_threadpool(s3.delete_object, Bucket=S3_BUCKET_NAME, Key=key)
+        download_urls.forget(file_id, key)
         # Delete file metadata from the database
-        result = file_metadata_collection.delete_one(
+        result = await file_metadata_collection.delete_one(
             {"_id": PyObjectId(file_id)})
         if result.deleted_count == 0:
             raise HTTPException(
@@ -197,17 +299,59 @@ def delete_file(file_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/download/{file_id}")
+async def download_file(file_id: str, user: dict = Depends(get_current_user)):
+    """
+    Redirects to a presigned S3 URL for the file, so the bucket can stay
+    private. URLs and file keys are cached; see src/download_urls.py.
+    """
+    cached = download_urls.get_file(file_id)
+    if cached is None:
+        try:
+            file_oid = PyObjectId(file_id)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid file ID")
+        file_metadata = await file_metadata_collection.find_one(
+            {"_id": file_oid}, {"file_name": 1, "file_url": 1, "s3_key": 1})
+        if not file_metadata:
+            raise HTTPException(status_code=404, detail="File not found")
+        cached = (file_metadata.get("s3_key") or key_from_url(file_metadata["file_url"]),
+                  file_metadata["file_name"])
+        download_urls.set_file(file_id, *cached)
+
+    key, file_name = cached
+    try:
+        url, fresh_for = download_urls.url_for(s3, S3_BUCKET_NAME, key, file_name)
+    except ClientError as e:
+        logger.error(f"Presign error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to prepare download")
+    # The browser may reuse the redirect for as long as the server would
+    return RedirectResponse(url, status_code=302,
+                            headers={"Cache-Control": f"private, max-age={fresh_for}"})
+
+
 @router.get("/files")
-def list_files():
+async def list_files(
+    fields: FieldSelection = Depends(sparse_fields(FileMetadata, extra=("description",))),
+    page: Page = Depends(paginate),
+    stream: Optional[str] = Depends(stream_format)
+):
     try:
-        files = file_metadata_collection.find().to_list(length=None)
+        if stream:
+            def shape(file):
+                file = format_file(file)
+                return fields.select(file) if fields else file
+            cursor = file_metadata_collection.find({}, fields.projection).sort(
+                [("uploaded_at", -1), ("_id", -1)])
+            # JSON keeps the {"files": [...]} envelope; NDJSON is one file per line
+            return stream_response(cursor, shape, stream, prefix=b'{"files":', suffix=b'}')
+
+        files = await page.fetch(
+            file_metadata_collection, {}, fields.projection, field="uploaded_at")
         files_list = []
         for file in files:
-            file["_id"] = str(file["_id"])
-            file["user_id"] = str(file["user_id"])
-            file["uploaded_at"] = file["uploaded_at"].isoformat()
-            file["course_id"] = str(file["course_id"])
-            files_list.append(file)
-        return JSONResponse({"files": files_list})
+            file = format_file(file)
+            files_list.append(fields.select(file) if fields else file)
+        return page.respond(JSONResponse({"files": files_list, "next_cursor": page.next_cursor}))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,13 +1,22 @@
 # src/routes/post.py
-from fastapi import APIRouter, HTTPException, status, Request
+from fastapi import APIRouter, HTTPException, status, Request, Depends, Query
 from fastapi.responses import JSONResponse
-from src.auth import hash_password, verify_password, create_jwt_token, decode_jwt_token
 # Import PostResponse and PostCreate
-from src.schemas import PostResponse, PostCreate
+from src.schemas import PostResponse, PostCreate, FeedPostResponse, CommentResponse
 from src.database import get_database
 from bson import ObjectId
 from datetime import datetime
-from src.gemini import is_NSFW
+from src.dependencies import get_current_user, sparse_fields, FieldSelection
+from src import counters
+from src.pagination import Page, paginate
+from src.loaders import Loaders, get_loaders
+from src.feed_cache import feed_cache
+from src.serialization import BSONResponse, shaper
+from src.streaming import stream_format, stream_response
+from src.moderation_queue import moderation_queue, PENDING, PUBLISHED, VISIBLE, visible_to
+from src.moderation_providers import ModerationUnavailable
+from typing import Optional
+import os
 
 router = APIRouter(prefix="/posts", tags=["Posts"])
 
@@ -17,39 +26,76 @@ posts_collection = db.posts  # Assuming you have a posts_collection
 comments_collection = db.comments
 users_collection = db.users
 
+# Comments shown under each post in the feed, by default and at most
+FEED_COMMENT_PREVIEW = int(os.getenv("FEED_COMMENT_PREVIEW", 3))
+MAX_FEED_COMMENT_PREVIEW = 20
+
+shape_post = shaper(PostResponse)
+shape_feed_post = shaper(FeedPostResponse)
+shape_comment = shaper(CommentResponse)
+
+
+async def post_published(post: dict):
+    await counters.post_created(post["user_id"])
+    # Published late by the queue, the post may belong below newer ones
+    feed_cache.post_created(post["created_at"])
+
+
+moderation_queue.register("post", posts_collection, ("title", "content"), post_published)
+
+
+def _moderation_unavailable():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Moderation is unavailable, please try again shortly",
+        headers={"Retry-After": "5"},
+    )
+
+
+async def has_pending(user: dict) -> bool:
+    """Whether `user` has posts or comments awaiting moderation (async mode only)."""
+    # Posts are attributed by regno, comments by user id
+    return (await moderation_queue.has_pending("post", user["regno"])
+            or await moderation_queue.has_pending("comment", str(user["_id"])))
+
 
 @router.post("/create", response_model=PostResponse)  # Add PostResponse
-def create_post(post: PostCreate, request: Request):
-    # Get the user ID from the token
+async def create_post(post: PostCreate, user: dict = Depends(get_current_user)):
     try:
-        token = request.cookies["access_token"]
-        token_data = decode_jwt_token(token)
-        if not token_data:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token",
-            )
-        user_id = token_data["regno"]
+        user_id = user["regno"]
 
         # Create the post
-        post_d = post.model_dump()
-        if is_NSFW(post_d['title']).strip() == 'Yes' or is_NSFW(post_d['content']).strip() == 'Yes':
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Post contains NSFW content",
-            )
         post_data = post.dict()
         post_data["user_id"] = user_id
         post_data["created_at"] = datetime.utcnow()
         post_data["updated_at"] = datetime.utcnow()
+        post_data["comments_count"] = 0
+
+        # In async mode the post is stored as pending and moderated in the background
+        if moderation_queue.enabled:
+            post_data["status"] = PENDING
+        else:
+            verdict = await moderation_queue.check("post", post_data)
+            if verdict.nsfw:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Post contains NSFW content",
+                )
+            post_data["status"] = PUBLISHED
 
         # Insert into the database
-        result = posts_collection.insert_one(post_data)
+        result = await posts_collection.insert_one(post_data)
         post_data["_id"] = result.inserted_id  # get inserted id
+        if moderation_queue.enabled:
+            post_data["status"] = await moderation_queue.submit("post", post_data)
+        else:
+            await moderation_queue.publish("post", post_data)
         post_data["id"] = str(result.inserted_id)
 
         # Convert the response to a Pydantic model
         return PostResponse(**post_data)
+    except ModerationUnavailable:
+        raise _moderation_unavailable()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -58,32 +104,48 @@ def create_post(post: PostCreate, request: Request):
 
 
 @router.get("/all", response_model=list[PostResponse])
-def get_all_user_posts(request: Request):
+async def get_all_user_posts(
+    request: Request,
+    user: dict = Depends(get_current_user),
+    fields: FieldSelection = Depends(sparse_fields(PostResponse)),
+    page: Page = Depends(paginate),
+    stream: Optional[str] = Depends(stream_format)
+):
     try:
-        # Get all posts from the user
-        token = request.cookies["access_token"]
-        decoded_token = decode_jwt_token(token)
-        print("Decoded token:", decoded_token)
-        regno = decoded_token["regno"]
-        # No need to find user here, we only need regno
-        user = users_collection.find_one({"regno": regno})
-        if not user:
-            print("User not found")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found",
-            )
-
-        all_posts = list(posts_collection.find().sort("created_at",-1))  # Convert cursor to list
-
-        # Convert the response to a Pydantic model and include _id
+        if stream:
+            def shape(post):
+                post["id"] = post["_id"]
+                return fields.select(post) if fields else shape_post(post)
+            cursor = posts_collection.find(VISIBLE, fields.projection).sort(
+                [("created_at", -1), ("_id", -1)])
+            return stream_response(cursor, shape, stream)
+
+        # Authors see their own pending posts, so their pages are not shared
+        own = await has_pending(user)
+
+        # Pages are served from the feed cache until a write touches them
+        key = ("posts.all", fields.fields, page.limit, page.cursor)
+        cached = None if own else feed_cache.lookup(key, request.headers.get("accept-encoding"))
+        if cached is not None:
+            return cached
+        rebuild = feed_cache.start_rebuild()
+
+        query = visible_to(user["regno"]) if own else VISIBLE
+        all_posts = await page.fetch(posts_collection, query, fields.projection)  # Newest first
+
+        # Shape to PostResponse and include _id; serialized once by orjson
         posts = []
 
         for post in all_posts:
             post["id"] = str(post["_id"])  # Rename _id to id
-            posts.append(PostResponse(**post))  # Use PostResponse
+            # Partial documents are trimmed by the field selection instead
+            posts.append(post if fields else shape_post(post))
 
-        return posts
+        if own:
+            return page.respond(fields.respond(posts))
+        return page.respond(feed_cache.store(
+            key, fields.respond(posts), [post["id"] for post in posts],
+            after=page.after, next_cursor=page.next_cursor, rebuild=rebuild))
 
     except Exception as e:
         print(f"Exception occurred: {e}")
@@ -93,19 +155,87 @@ def get_all_user_posts(request: Request):
         )
 
 
-@router.get("/delete/{post_id}")
-def delete_post(post_id: str, request: Request):
+async def recent_comments(post_ids: list, per_post: int, viewer: str = None) -> dict:
+    """
+    Newest `per_post` comments of every post, in one aggregation: {post id: [comments]}.
+
+    Only published comments are included, plus `viewer`'s (a user id) pending ones.
+    """
+    if not post_ids or not per_post:
+        return {}
+    # post_id is stored as a string; older comments may hold an ObjectId
+    ids = [str(post_id) for post_id in post_ids]
+    visible = visible_to(viewer) if viewer else VISIBLE
+    pipeline = [
+        {"$match": {"post_id": {"$in": ids + [ObjectId(i) for i in ids]}, **visible}},
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$group": {"_id": {"$toString": "$post_id"}, "comments": {"$push": "$$ROOT"}}},
+        {"$project": {"comments": {"$slice": ["$comments", per_post]}}},
+    ]
+    rows = await comments_collection.aggregate(pipeline).to_list(length=None)
+    return {row["_id"]: row["comments"] for row in rows}
+
+
+@router.get("/feed", response_model=list[FeedPostResponse])
+async def get_feed(
+    request: Request,
+    comments: int = Query(FEED_COMMENT_PREVIEW, ge=0, le=MAX_FEED_COMMENT_PREVIEW,
+                          description="Newest comments to include per post"),
+    user: dict = Depends(get_current_user),
+    page: Page = Depends(paginate),
+    loaders: Loaders = Depends(get_loaders)
+):
+    """
+    A page of posts, each with its comment count and newest comments.
+
+    Replaces /posts/all followed by /posts/comments/{id} for every post:
+    one request and two queries per page.
+    """
     try:
-        # Get the user ID from the token
-        # Use .get() to avoid KeyError
-        token = request.cookies.get("access_token")
-        if not token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token not found",
-            )
+        # Authors see their own pending posts and comments, so their pages are not shared
+        own = await has_pending(user)
+
+        key = ("posts.feed", comments, page.limit, page.cursor)
+        cached = None if own else feed_cache.lookup(key, request.headers.get("accept-encoding"))
+        if cached is not None:
+            return cached
+        rebuild = feed_cache.start_rebuild()
+
+        query = visible_to(user["regno"]) if own else VISIBLE
+        posts = await page.fetch(posts_collection, query)  # Newest first
+        previews = await recent_comments(
+            [post["_id"] for post in posts], comments, str(user["_id"]) if own else None)
+
+        # Posts from before the counters existed are counted in one aggregation
+        uncounted = [post["_id"] for post in posts if "comments_count" not in post]
+        comment_counts = dict(zip(uncounted, await loaders.comment_counts.load_many(uncounted)))
+
+        feed = []
+        for post in posts:
+            post["id"] = str(post["_id"])
+            post["comments_count"] = post.get("comments_count", comment_counts.get(post["_id"]))
+            post["recent_comments"] = [
+                shape_comment(comment) for comment in reversed(previews.get(post["id"], []))]
+            feed.append(shape_feed_post(post))
+
+        if own:
+            return page.respond(BSONResponse(feed))
+        return page.respond(feed_cache.store(
+            key, feed, [post["id"] for post in feed],
+            after=page.after, next_cursor=page.next_cursor, rebuild=rebuild))
 
-        user_id = decode_jwt_token(token)["regno"]
+    except Exception as e:
+        print(f"Exception occurred: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Exception occurred: {e}",
+        )
+
+
+@router.get("/delete/{post_id}")
+async def delete_post(post_id: str, user: dict = Depends(get_current_user)):
+    try:
+        user_id = user["regno"]
 
         # Convert post_id to ObjectId
         try:
@@ -117,7 +247,7 @@ def delete_post(post_id: str, request: Request):
             )
 
         # Check if the post exists
-        post = posts_collection.find_one({"_id": post_obj_id})
+        post = await posts_collection.find_one({"_id": post_obj_id}, {"user_id": 1, "status": 1})
         if not post:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -131,11 +261,22 @@ def delete_post(post_id: str, request: Request):
                 detail="Unauthorized to delete this post",
             )
 
+        # Tally the commenters so their counters follow the deleted comments
+        commenters = await comments_collection.aggregate([
+            {"$match": {"post_id": post_id, **VISIBLE}},
+            {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
+        ]).to_list(length=None)
+
         # Delete the post's comments first
-        comments_collection.delete_many({"post_id": post_id})
+        await comments_collection.delete_many({"post_id": post_id})
 
         # Delete the post
-        posts_collection.delete_one({"_id": post_obj_id})
+        result = await posts_collection.delete_one({"_id": post_obj_id})
+        feed_cache.post_changed(post_id)
+        # Pending and rejected posts were never counted
+        if result.deleted_count and post.get("status", PUBLISHED) == PUBLISHED:
+            await counters.post_deleted(
+                user_id, {row["_id"]: row["count"] for row in commenters})
 
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -155,23 +296,8 @@ def delete_post(post_id: str, request: Request):
 
 # Creating a route to show all comments in a post
 @router.get("/comments/{post_id}")
-def show_comments(post_id: str, request: Request):
+async def show_comments(post_id: str, user: dict = Depends(get_current_user)):
     try:
-        token = request.cookies.get("access_token")
-        if not token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token not found",
-            )
-
-        regno = decode_jwt_token(token)["regno"]
-        user = users_collection.find_one({"regno": regno})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found",
-            )
-
         # Convert post_id to ObjectId
         try:
             post_obj_id = ObjectId(post_id)
@@ -182,7 +308,7 @@ def show_comments(post_id: str, request: Request):
             )
 
         # Check if the post exists
-        post = posts_collection.find_one({"_id": post_obj_id})
+        post = await posts_collection.find_one({"_id": post_obj_id, **visible_to(user["regno"])}, {"_id": 1})
         if not post:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -198,12 +324,12 @@ def show_comments(post_id: str, request: Request):
         #     )
 
         # Get all comments for the post
-        comments = comments_collection.find({"post_id": post_id})
+        comments = comments_collection.find({"post_id": post_id, **visible_to(str(user["_id"]))})
 
         # Convert the response to a Pydantic model and include _id
         comments_list = []
 
-        for comment in comments:
+        async for comment in comments:
             comment["_id"] = str(comment["_id"])  # Convert ObjectId to string
             comments_list.append(comment)
 
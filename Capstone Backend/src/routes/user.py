@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, status, Request, Depends
+from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
-from src.auth import hash_password, verify_password, create_jwt_token, decode_jwt_token
+from src.auth import create_jwt_token, build_token_claims, JWT_ROLE_CLAIMS
 from src.schemas import UserCreate, UserLogin, UserResponse
 from src.models import User
 from datetime import datetime
 from src.database import get_database
+from src.dependencies import get_current_user as resolve_current_user, get_optional_user, sparse_fields, FieldSelection
+from src.hashing import hashing_service, HashingOverloaded
+from src.loaders import Loaders, get_loaders
+from src.pagination import Page, paginate
+from src.moderation_queue import PUBLISHED, VISIBLE
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter(prefix="/users", tags=["Users"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -43,8 +49,16 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     return user
 
 
+def _hashing_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=UserResponse)
-def register_user(user: UserCreate):
+async def register_user(user: UserCreate):
     """
     Registers a new user.
 
@@ -55,17 +69,21 @@ def register_user(user: UserCreate):
         UserResponse: The registered user data.
 
     Raises:
-        HTTPException: 400 if user with email or regno already exists.
+        HTTPException: 400 if user with email or regno already exists,
+            503 if the password hashing queue is full.
     """
-    existing_user = users_collection.find_one(
-        {"$or": [{"email": user.email}, {"regno": user.regno}]})
+    existing_user = await users_collection.find_one(
+        {"$or": [{"email": user.email}, {"regno": user.regno}]}, {"_id": 1})
     if (existing_user):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with that email or registration number already exists",
         )
 
-    password_hash = hash_password(user.password)
+    try:
+        password_hash = await hashing_service.hash(user.password)
+    except HashingOverloaded:
+        raise _hashing_busy()
 
     user_data = user.dict()
     user_data["password_hash"] = password_hash
@@ -77,9 +95,17 @@ def register_user(user: UserCreate):
     user_data["clubs_participated"] = []  # Added before insertion
     user_data["clubs_administered"] = []
     user_data["uploaded_files"] = []
+    user_data["posts_count"] = 0
+    user_data["comments_count"] = 0
 
-    # Insert user into MongoDB
-    result = users_collection.insert_one(user_data)
+    # Insert user into MongoDB; the unique indexes catch concurrent duplicates
+    try:
+        result = await users_collection.insert_one(user_data)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with that email or registration number already exists",
+        )
 
     # Convert ObjectId to string for response
     user_data["_id"] = result.inserted_id
@@ -89,7 +115,7 @@ def register_user(user: UserCreate):
 
 
 @router.post("/login")
-def login_user(user: UserLogin):
+async def login_user(user: UserLogin):
     """
     Logs in a user.
 
@@ -100,22 +126,39 @@ def login_user(user: UserLogin):
         JSONResponse: Contains a success message, JWT token, and user data.
 
     Raises:
-        HTTPException: 404 if user not found, 401 if password invalid.
+        HTTPException: 404 if user not found, 401 if password invalid,
+            503 if the password hashing queue is full.
     """
-    existing_user = users_collection.find_one({"regno": user.regno})
+    existing_user = await users_collection.find_one(
+        {"regno": user.regno},
+        {"regno": 1, "email": 1, "password_hash": 1, "claims_version": 1})
     if not existing_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
 
-    if not verify_password(user.password, existing_user["password_hash"]):
+    try:
+        password_ok = await hashing_service.verify(
+            user.password, existing_user["password_hash"])
+    except HashingOverloaded:
+        raise _hashing_busy()
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid password",
         )
 
-    token_data = {"regno": user.regno, "email": existing_user["email"]}
+    administered_club_ids = None
+    if JWT_ROLE_CLAIMS:
+        # club.admins holds both string and ObjectId ids, match either
+        user_id = existing_user["_id"]
+        administered = await clubs_collection.find(
+            {"admins": {"$in": [user_id, str(user_id)]}}, {"_id": 1}).to_list(length=None)
+        administered_club_ids = [club["_id"] for club in administered]
+
+    token_data = build_token_claims(existing_user, administered_club_ids)
     token = create_jwt_token(token_data)
 
     print("Token created successfully")
@@ -142,21 +185,8 @@ def login_user(user: UserLogin):
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user(request: Request):
+def get_current_user(current_user: dict = Depends(resolve_current_user)):
     try:
-        token = request.cookies.get("access_token")
-        if not token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Token not found")
-
-        token_data = decode_jwt_token(token)
-        current_user = users_collection.find_one(
-            {"regno": token_data["regno"]})
-
-        if not current_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
         current_user["id"] = str(current_user["_id"])
         current_user["created_at"] = current_user["created_at"].isoformat()
 
@@ -193,43 +223,64 @@ def logout_user():
 
 
 @router.get("/posts/user/{user_id}")
-async def get_user_posts(user_id: str):
+async def get_user_posts(
+    user_id: str,
+    loaders: Loaders = Depends(get_loaders),
+    page: Page = Depends(paginate),
+    viewer: dict = Depends(get_optional_user)
+):
     try:
+        # Authors also see their own pending and rejected posts
+        own = viewer is not None and viewer["regno"] == user_id
         # Changed: Now using regno directly instead of converting to ObjectId
-        posts = posts_collection.find({"user_id": user_id}).sort(
-            "created_at", -1).to_list(length=None)  # Sort by newest first
+        query = {"user_id": user_id} if own else {"user_id": user_id, **VISIBLE}
+        posts = await page.fetch(posts_collection, query)  # Newest first
+
+        # Posts from before the counters existed are counted in one aggregation
+        uncounted = [post["_id"] for post in posts if "comments_count" not in post]
+        comment_counts = dict(zip(uncounted, await loaders.comment_counts.load_many(uncounted)))
 
         formatted_posts = []
-        # print(posts)
         for post in posts:
-            # Get comment count for this post
-            comment_count = comments_collection.count_documents(
-                {"post_id": post["_id"]})
-
             formatted_post = {
                 "id": str(post["_id"]),
                 "title": post["title"],
                 "content": post["content"],
                 "created_at": post["created_at"].isoformat(),
-                "comments_count": comment_count,
+                "comments_count": post.get("comments_count", comment_counts.get(post["_id"])),
                 # Changed: No need to convert to string
-                "user_id": post["user_id"]
+                "user_id": post["user_id"],
+                "status": post.get("status", PUBLISHED)
             }
+            if "rejection_reason" in post:
+                formatted_post["rejection_reason"] = post["rejection_reason"]
             formatted_posts.append(formatted_post)
 
-        return formatted_posts
+        return page.respond(formatted_posts)
     except Exception as e:
         raise HTTPException(
             status_code=404, detail=f"Error fetching posts: {str(e)}")
 
 
 @router.get("/comments/user/{user_id}")
-async def get_user_comments(user_id: str):
-    """Get all comments by a specific user with post titles"""
+async def get_user_comments(
+    user_id: str,
+    loaders: Loaders = Depends(get_loaders),
+    page: Page = Depends(paginate),
+    viewer: dict = Depends(get_optional_user)
+):
+    """Get a page of comments by a specific user with post titles"""
     try:
-        comments = comments_collection.find({"user_id": user_id}).sort(
-            "created_at", -1).to_list(length=None)
-        print(comments)
+        # Authors also see their own pending and rejected comments
+        own = viewer is not None and str(viewer["_id"]) == user_id
+        query = {"user_id": user_id} if own else {"user_id": user_id, **VISIBLE}
+        comments = await page.fetch(comments_collection, query)
+
+        # Fetch every referenced post in one query
+        post_ids = [comment["post_id"] for comment in comments
+                    if ObjectId.is_valid(comment["post_id"])]
+        posts = dict(zip(post_ids, await loaders.posts.load_many(post_ids)))
+
         formatted_comments = []
         for comment in comments:
             # Convert ObjectId to string where needed
@@ -239,27 +290,22 @@ async def get_user_comments(user_id: str):
                 "post_id": str(comment["post_id"]) if isinstance(comment["post_id"], ObjectId) else comment["post_id"],
                 "content": comment["content"],
                 "created_at": comment["created_at"].isoformat(),
+                "status": comment.get("status", PUBLISHED),
                 "post_title": "Unknown Post"  # Default value
             }
+            if "rejection_reason" in comment:
+                formatted_comment["rejection_reason"] = comment["rejection_reason"]
 
             # Try to get the post title
-            try:
-                if isinstance(comment["post_id"], ObjectId):
-                    post = posts_collection.find_one(
-                        {"_id": comment["post_id"]})
-                else:
-                    post = posts_collection.find_one(
-                        {"_id": ObjectId(comment["post_id"])})
-                if post:
-                    formatted_comment["post_title"] = post["title"]
-            except Exception as e:
-                print(f"Error getting post title: {e}")
+            post = posts.get(comment["post_id"])
+            if post:
+                formatted_comment["post_title"] = post["title"]
+            elif comment["post_id"] not in posts:
                 formatted_comment["post_title"] = "Deleted Post"
 
             formatted_comments.append(formatted_comment)
 
-        print("Formatted comments:", formatted_comments)
-        return formatted_comments
+        return page.respond(formatted_comments)
     except Exception as e:
         print(f"Error in get_user_comments: {str(e)}")
         raise HTTPException(
@@ -267,22 +313,31 @@ async def get_user_comments(user_id: str):
 
 
 @router.get("/{user_id}")
-def get_user_by_id(user_id: str):
+async def get_user_by_id(
+    user_id: str,
+    fields: FieldSelection = Depends(sparse_fields(
+        UserResponse, extra=("posts_count", "comments_count")))
+):
     try:
         # Convert string user_id to ObjectId
         user_id_obj = ObjectId(user_id)
 
         # Get user data
-        user = users_collection.find_one({"_id": user_id_obj})
+        projection = fields.projection or {"password_hash": 0}
+        if fields:
+            projection["regno"] = 1  # needed to count the user's posts
+        user = await users_collection.find_one({"_id": user_id_obj}, projection)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        # Changed: Use regno instead of ObjectId for counting posts and comments
-        posts_count = db.posts.count_documents({"user_id": user["regno"]})
-        comments_count = db.comments.count_documents({"user_id": user_id})
-
-        print("Posts count:", posts_count)
-        print("Comments count:", comments_count)
+        # Counters are kept on the user document; users from before they
+        # existed are counted until the repair job backfills them
+        posts_count = user.get("posts_count")
+        comments_count = user.get("comments_count")
+        if posts_count is None and "posts_count" in fields:
+            posts_count = await db.posts.count_documents({"user_id": user["regno"], **VISIBLE})
+        if comments_count is None and "comments_count" in fields:
+            comments_count = await db.comments.count_documents({"user_id": user_id, **VISIBLE})
         # Format the response data
         user_data = {
             "id": str(user["_id"]),
@@ -299,7 +354,7 @@ def get_user_by_id(user_id: str):
             "comments_count": comments_count
         }
 
-        return user_data
+        return fields.respond(user_data)
     except Exception as e:
         print(f"Error in get_user_by_id: {str(e)}")  # Added debug print
         raise HTTPException(
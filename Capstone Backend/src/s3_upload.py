@@ -0,0 +1,185 @@
+# src/s3_upload.py
+"""
+Streaming uploads to S3.
+
+`stream_upload` copies an UploadFile's spool into S3 one part at a time:
+the first S3_PART_SIZE bytes are read, and a file that fits in one part is
+sent with a single PutObject; anything larger becomes a multipart upload
+with up to S3_PART_CONCURRENCY parts in flight. A part is only read once a
+slot is free, so an upload holds at most part size × concurrency bytes in
+memory regardless of the file size. The size limit is enforced as bytes
+arrive, and a failed or oversized upload is aborted so no orphaned parts
+are left in the bucket.
+
+`presigned_post` lets the client upload straight to S3 instead: the
+signed policy pins the key, content type, metadata and size range, so the
+API only signs the form and later checks the object with a HEAD request.
+"""
+import asyncio
+import logging
+import os
+import threading
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# S3 rejects parts under 5 MiB, except the last one
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+S3_PART_SIZE = max(MIN_PART_SIZE, int(os.getenv("S3_PART_SIZE", 8 * 1024 * 1024)))
+S3_PART_CONCURRENCY = int(os.getenv("S3_PART_CONCURRENCY", 4))
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", 100 * 1024 * 1024))
+# Seconds a presigned upload form stays valid
+PRESIGNED_POST_EXPIRY = int(os.getenv("PRESIGNED_POST_EXPIRY", 900))
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class EmptyUpload(Exception):
+    pass
+
+
+class UploadStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.uploads = {"single": 0, "multipart": 0}
+        self.parts = 0
+        self.bytes = 0
+        self.aborted = 0
+        self.too_large = 0
+        self.buffered = 0
+        self.peak_buffered = 0
+
+    def count(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def buffer(self, size: int):
+        """Tracks part bytes held in memory across all uploads."""
+        with self._lock:
+            self.buffered += size
+            self.peak_buffered = max(self.peak_buffered, self.buffered)
+
+    def record_upload(self, kind: str, size: int):
+        with self._lock:
+            self.uploads[kind] += 1
+            self.bytes += size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "part_size": S3_PART_SIZE,
+                "part_concurrency": S3_PART_CONCURRENCY,
+                "max_upload_size": MAX_UPLOAD_SIZE,
+                "uploads": dict(self.uploads),
+                "parts": self.parts,
+                "bytes": self.bytes,
+                "aborted": self.aborted,
+                "too_large": self.too_large,
+                "buffered_bytes": self.buffered,
+                "peak_buffered_bytes": self.peak_buffered,
+            }
+
+
+upload_stats = UploadStats()
+
+
+async def stream_upload(client, file, bucket: str, key: str, content_type: str,
+                        metadata: dict = None, max_size: int = MAX_UPLOAD_SIZE,
+                        part_size: int = S3_PART_SIZE,
+                        concurrency: int = S3_PART_CONCURRENCY) -> int:
+    """
+    Uploads the UploadFile `file` to `bucket`/`key`; returns its size.
+
+    Raises EmptyUpload, UploadTooLarge (nothing is left in the bucket), or
+    the client's error.
+    """
+    extra = {"ContentType": content_type, "Metadata": metadata or {}}
+    first = await file.read(part_size)
+    if not first:
+        raise EmptyUpload("Empty file")
+    if len(first) > max_size:
+        upload_stats.count("too_large")
+        raise UploadTooLarge(f"File exceeds {max_size} bytes")
+
+    if len(first) < part_size:
+        # The whole file fits in one part: a single request instead of three
+        upload_stats.buffer(len(first))
+        try:
+            await run_in_threadpool(
+                client.put_object, Bucket=bucket, Key=key, Body=first, **extra)
+        finally:
+            upload_stats.buffer(-len(first))
+        upload_stats.record_upload("single", len(first))
+        return len(first)
+
+    upload = await run_in_threadpool(
+        client.create_multipart_upload, Bucket=bucket, Key=key, **extra)
+    upload_id = upload["UploadId"]
+    slots = asyncio.Semaphore(concurrency)
+    tasks = []
+
+    async def send(number: int, body: bytes) -> dict:
+        try:
+            response = await run_in_threadpool(
+                client.upload_part, Bucket=bucket, Key=key, UploadId=upload_id,
+                PartNumber=number, Body=body)
+        finally:
+            upload_stats.buffer(-len(body))
+            slots.release()
+        upload_stats.count("parts")
+        return {"PartNumber": number, "ETag": response["ETag"]}
+
+    size = 0
+    try:
+        # A slot is taken before a part is read and freed once it is sent
+        await slots.acquire()
+        chunk, number = first, 1
+        while chunk:
+            size += len(chunk)
+            if size > max_size:
+                upload_stats.count("too_large")
+                raise UploadTooLarge(f"File exceeds {max_size} bytes")
+            upload_stats.buffer(len(chunk))
+            tasks.append(asyncio.create_task(send(number, chunk)))
+            await slots.acquire()
+            if any(task.done() and task.exception() for task in tasks):
+                break  # gather() below raises the part's error
+            chunk, number = await file.read(part_size), number + 1
+        parts = await asyncio.gather(*tasks)
+        await run_in_threadpool(
+            client.complete_multipart_upload, Bucket=bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={"Parts": parts})
+    except BaseException:
+        # Let parts already sent finish before aborting, or they would outlive the abort
+        await asyncio.gather(*tasks, return_exceptions=True)
+        upload_stats.count("aborted")
+        try:
+            await run_in_threadpool(
+                client.abort_multipart_upload, Bucket=bucket, Key=key, UploadId=upload_id)
+        except Exception as e:
+            logger.error(f"Could not abort multipart upload {upload_id} of {key}: {e}")
+        raise
+    upload_stats.record_upload("multipart", size)
+    return size
+
+
+def presigned_post(client, bucket: str, key: str, content_type: str, metadata: dict = None,
+                   max_size: int = MAX_UPLOAD_SIZE, expires_in: int = PRESIGNED_POST_EXPIRY) -> dict:
+    """
+    Signs a browser POST of exactly `key` with the given content type and
+    metadata and a size between 1 byte and `max_size`; returns
+    {"url", "fields"} for the client's multipart form.
+    """
+    fields = {"Content-Type": content_type}
+    fields.update({f"x-amz-meta-{name}": value for name, value in (metadata or {}).items()})
+    conditions = [{name: value} for name, value in fields.items()]
+    conditions.append(["content-length-range", 1, max_size])
+    return client.generate_presigned_post(
+        Bucket=bucket, Key=key, Fields=fields, Conditions=conditions, ExpiresIn=expires_in)
@@ -39,6 +39,8 @@ class PostResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     comments: List[str] = []  # List of Comment IDs
+    comments_count: int = 0
+    status: str = "published"  # pending, published or rejected
 
 # Comment Schema
 class CommentCreate(BaseModel):
@@ -51,6 +53,11 @@ class CommentResponse(BaseModel):
     post_id: str
     content: str
     created_at: datetime
+    status: str = "published"  # pending, published or rejected
+
+# Feed Schema
+class FeedPostResponse(PostResponse):
+    recent_comments: List[CommentResponse] = []  # Newest comments, oldest first
 
 # Club Schema
 class ClubCreate(BaseModel):
@@ -77,6 +84,14 @@ class FileMetadataCreate(BaseModel):
     uploaded_by: str
     course_code: str
 
+class FileUploadRequest(BaseModel):
+    file_name: str
+    course_id: str
+    description: Optional[str] = None
+
+class FileUploadCommit(BaseModel):
+    key: str  # S3 key returned with the presigned POST
+
 class FileMetadataResponse(BaseModel):
     id: str
     user_id: str
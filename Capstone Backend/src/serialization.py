@@ -0,0 +1,60 @@
+# src/serialization.py
+"""
+Fast path from raw Mongo documents to JSON bytes.
+
+List handlers shape documents to their response schema with `shaper()`
+and return a `BSONResponse`; FastAPI skips response_model validation for
+returned responses, so each document is converted once, by orjson. The
+route's response_model still documents the shape in OpenAPI.
+"""
+from typing import Any
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Naive datetimes come out as isoformat() without an offset, same as jsonable_encoder
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def bson_default(obj):
+    """orjson fallback for types it does not know natively."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=bson_default, option=ORJSON_OPTIONS)
+
+
+class BSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson, accepting ObjectIds and datetimes as they come from Mongo."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def shaper(schema):
+    """
+    Returns a function mapping a raw document to exactly the fields of `schema`.
+
+    `id` is taken from `_id` when the document has no `id`; missing optional
+    fields get the schema default. No validation is done, so only use it on
+    documents the app itself wrote in that shape.
+    """
+    fields = []
+    for name, field in schema.model_fields.items():
+        default = None if field.is_required() else field.get_default(call_default_factory=True)
+        fields.append((name, default))
+
+    def shape(doc: dict) -> dict:
+        shaped = {name: doc.get(name, default) for name, default in fields}
+        if "id" in shaped and shaped["id"] is None:
+            shaped["id"] = doc.get("_id")
+        return shaped
+    return shape
@@ -0,0 +1,75 @@
+# src/streaming.py
+"""
+Streaming dumps of whole collections.
+
+List endpoints accept `?stream=json` (a JSON array) or `?stream=ndjson`
+(one document per line; also chosen by `Accept: application/x-ndjson`).
+Documents are written from the Mongo cursor one batch at a time, so memory
+stays flat however large the collection is. Streams are not paginated.
+"""
+import os
+from typing import Optional
+from dotenv import load_dotenv
+from fastapi import Query, Request
+from fastapi.responses import StreamingResponse
+from src.serialization import dumps
+
+# Load environment variables
+load_dotenv()
+
+# Documents per cursor batch, and per chunk written to the client
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 500))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def _batches(cursor, shape, batch_size: int):
+    """Yields lists of up to `batch_size` shaped documents encoded as JSON bytes."""
+    batch = []
+    async for doc in cursor:
+        batch.append(dumps(shape(doc)))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def json_array(cursor, shape, batch_size: int, prefix: bytes = b"", suffix: bytes = b""):
+    opening = prefix + b"["
+    async for batch in _batches(cursor, shape, batch_size):
+        yield opening + b",".join(batch)
+        opening = b","
+    if opening != b",":
+        yield opening  # empty collection
+    yield b"]" + suffix
+
+
+async def ndjson(cursor, shape, batch_size: int):
+    async for batch in _batches(cursor, shape, batch_size):
+        yield b"\n".join(batch) + b"\n"
+
+
+def stream_format(
+    request: Request,
+    stream: Optional[str] = Query(
+        None, pattern="^(json|ndjson)$",
+        description="Stream the whole collection as a JSON array or NDJSON instead of a page"),
+) -> Optional[str]:
+    if stream is None and NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return "ndjson"
+    return stream
+
+
+def stream_response(cursor, shape, stream: str, batch_size: int = STREAM_BATCH_SIZE,
+                    prefix: bytes = b"", suffix: bytes = b"") -> StreamingResponse:
+    """
+    Streams `cursor` in the `stream` format, applying `shape` to each document.
+
+    `prefix`/`suffix` wrap a JSON array in an envelope, e.g. b'{"files":' and b'}'.
+    """
+    cursor = cursor.batch_size(batch_size)
+    if stream == "ndjson":
+        return StreamingResponse(ndjson(cursor, shape, batch_size), media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(json_array(cursor, shape, batch_size, prefix, suffix),
+                             media_type="application/json")
@@ -0,0 +1,111 @@
+# src/verdict_cache.py
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime
+from dotenv import load_dotenv
+from src.cache import TTLCache
+from src.database import get_database
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", 10000))
+VERDICT_CACHE_TTL = float(os.getenv("VERDICT_CACHE_TTL", 3600))
+# Lifetime of stored verdicts; enforced by the TTL index on created_at
+VERDICT_STORE_TTL = int(os.getenv("VERDICT_STORE_TTL", 30 * 24 * 3600))
+
+db = get_database()
+verdicts_collection = db.moderation_verdicts
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Case, Unicode form and whitespace differences do not change a verdict."""
+    return _whitespace.sub(" ", unicodedata.normalize("NFKC", text)).strip().casefold()
+
+
+def content_key(fields: dict, namespace: str = "") -> str:
+    """
+    Hash of the normalized fields. `namespace` (the model and prompt) keeps
+    verdicts from an older model or prompt from being reused.
+    """
+    digest = hashlib.sha256(namespace.encode())
+    for name in sorted(fields):
+        digest.update(b"\0" + name.encode() + b"\0" + normalize(fields[name] or "").encode())
+    return digest.hexdigest()
+
+
+class VerdictCache:
+    """
+    Moderation verdicts by content hash: an in-process LRU in front of the
+    `moderation_verdicts` collection, so repeated text skips the model call
+    and other workers (and restarts) reuse verdicts already paid for.
+    """
+
+    def __init__(self, maxsize: int = VERDICT_CACHE_SIZE, ttl: float = VERDICT_CACHE_TTL):
+        self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.store_hits = 0
+        self.store_misses = 0
+        self.store_errors = 0
+
+    async def get(self, key: str):
+        """Returns the cached verdict as a dict, or None."""
+        verdict = self._memory.get(key)
+        if verdict is not None:
+            return verdict
+        try:
+            doc = await verdicts_collection.find_one({"_id": key}, {"verdict": 1})
+        except Exception as e:
+            # The store only saves model calls; moderation goes on without it
+            logger.warning(f"Verdict store lookup failed: {e}")
+            self._count("store_errors")
+            return None
+        if doc is None:
+            self._count("store_misses")
+            return None
+        self._count("store_hits")
+        self._memory.set(key, doc["verdict"])
+        return doc["verdict"]
+
+    async def set(self, key: str, verdict: dict):
+        self._memory.set(key, verdict)
+        try:
+            await verdicts_collection.update_one(
+                {"_id": key},
+                {"$set": {"verdict": verdict, "created_at": datetime.utcnow()}},
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"Verdict store write failed: {e}")
+            self._count("store_errors")
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def clear(self):
+        self._memory.clear()
+
+    def stats(self) -> dict:
+        memory = self._memory.stats()
+        with self._lock:
+            lookups = memory["hits"] + memory["misses"]
+            hits = memory["hits"] + self.store_hits
+            return {
+                "memory": memory,
+                "store_hits": self.store_hits,
+                "store_misses": self.store_misses,
+                "store_errors": self.store_errors,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+verdict_cache = VerdictCache()
@@ -0,0 +1,144 @@
+# tests/conftest.py
+"""
+The app runs against mongomock (an in-memory MongoDB) through the blocking
+driver path, with the stub moderation provider, so the suite needs neither
+a MongoDB server nor network access:
+
+    pip install -r requirements.txt -r requirements-dev.txt
+    python -m pytest -q
+"""
+import os
+from datetime import datetime
+
+# Must be set before any src module reads its configuration
+os.environ.update(
+    MONGODB_URI="mongodb://localhost:27017",
+    DATABASE_NAME="prabhavit_test",
+    MONGO_DRIVER="pymongo",
+    CREATE_INDEXES_ON_STARTUP="false",
+    MODERATION_PROVIDER="stub",
+    MODERATION_MODE="sync",
+)
+
+import mongomock
+import pymongo
+import pytest
+
+# src.database imports MongoClient from pymongo when it is first imported
+pymongo.MongoClient = mongomock.MongoClient
+
+
+def _without_sort(add):
+    # pymongo 4.11+ passes sort= to bulk builders; mongomock 4.3 predates it
+    def patched(self, *args, sort=None, **kwargs):
+        return add(self, *args, **kwargs)
+    return patched
+
+
+for _name in ("add_update", "add_replace"):
+    setattr(mongomock.collection.BulkOperationBuilder, _name,
+            _without_sort(getattr(mongomock.collection.BulkOperationBuilder, _name)))
+
+PASSWORD = "test-password"
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    from src.dependencies import user_cache
+    from src.feed_cache import feed_cache
+    from src.verdict_cache import verdict_cache
+    yield
+    user_cache.clear()
+    feed_cache.clear()
+    verdict_cache.clear()
+
+
+@pytest.fixture
+def client():
+    """A TestClient on a fresh, empty database."""
+    from fastapi.testclient import TestClient
+    from src.main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def raw_db(client):
+    """The mongomock database behind the app, for seeding and inspection."""
+    from src import database
+    return database.client[database.DATABASE_NAME]
+
+
+@pytest.fixture
+def login(client):
+    """Registers and logs in a user; returns the user as /users/me sees it."""
+    def login(regno: str = "21BCE0001", name: str = "Test User") -> dict:
+        client.post("/api/v1/users/register", json={
+            "name": name, "email": f"{regno.lower()}@vitbhopal.ac.in",
+            "password": PASSWORD, "regno": regno})
+        response = client.post("/api/v1/users/login", json={"regno": regno, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        client.cookies.set("access_token", response.json()["token"])
+        return client.get("/api/v1/users/me").json()
+    return login
+
+
+@pytest.fixture
+def seed_lists(raw_db):
+    """
+    Reseeds a user BENCH0000 with `size` posts (each commented on once by
+    them) and a club with `size` members and pending requests; returns the
+    owner's and club's ids.
+    """
+    def seed(size: int) -> dict:
+        for name in ("users", "posts", "comments", "clubs"):
+            raw_db[name].drop()
+        now = datetime.utcnow()
+        users = raw_db.users.insert_many(
+            [{"name": f"User {i}", "regno": f"BENCH{i:04d}", "email": f"u{i}@vitbhopal.ac.in",
+              "password_hash": "x"} for i in range(size + 1)])
+        owner = users.inserted_ids[0]
+        posts = raw_db.posts.insert_many(
+            [{"user_id": "BENCH0000", "title": f"Post {i}", "content": "x" * 50,
+              "created_at": now, "updated_at": now} for i in range(size)])
+        raw_db.comments.insert_many(
+            [{"post_id": str(post_id), "user_id": str(owner), "content": "nice", "created_at": now}
+             for post_id in posts.inserted_ids])
+        club = raw_db.clubs.insert_one(
+            {"name": "Bench Club", "description": "d", "created_at": now, "created_by": str(owner),
+             "admins": [owner], "members": [owner] + users.inserted_ids[1:],
+             "pending_requests": users.inserted_ids[1:], "faculty_advisor": [], "image_url": None})
+        return {"owner": owner, "club_id": club.inserted_id}
+    return seed
+
+
+class CommandCounter:
+    """Counts calls reaching the (mongomock) collections, i.e. database commands."""
+
+    METHODS = ("find", "find_one", "aggregate", "count_documents", "distinct",
+               "insert_one", "insert_many", "update_one", "update_many",
+               "delete_one", "delete_many", "find_one_and_update", "bulk_write")
+
+    def __init__(self, monkeypatch):
+        self.counts = {}
+        for name in self.METHODS:
+            original = getattr(mongomock.collection.Collection, name)
+            monkeypatch.setattr(mongomock.collection.Collection, name, self._wrap(name, original))
+
+    def _wrap(self, name, original):
+        def counted(collection, *args, **kwargs):
+            key = f"{collection.name}.{name}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+            return original(collection, *args, **kwargs)
+        return counted
+
+    def reset(self):
+        self.counts = {}
+
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+@pytest.fixture
+def command_counter(monkeypatch):
+    return CommandCounter(monkeypatch)
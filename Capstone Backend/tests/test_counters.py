@@ -0,0 +1,54 @@
+# tests/test_counters.py
+import asyncio
+from bson import ObjectId
+from src.counters import repair_counters
+from src.database import ThreadedDatabase
+
+
+def counters(raw_db, regno: str) -> dict:
+    user = raw_db.users.find_one({"regno": regno})
+    return {"posts": user.get("posts_count", 0), "comments": user.get("comments_count", 0)}
+
+
+def comment(client, post_id: str, content: str = "Lab moved to room 204"):
+    response = client.post("/api/v1/comment/create", json={"post_id": post_id, "content": content})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_deleting_a_post_decrements_author_and_commenter_counters(client, raw_db, login):
+    login("21BCE0001")
+    post_id = client.post("/api/v1/posts/create",
+                          json={"title": "Notice", "content": "Lab timings changed"}).json()["id"]
+    client.post("/api/v1/posts/create", json={"title": "Another", "content": "Quiz on Monday"})
+    login("21BCE0002")
+    comment(client, post_id)
+    comment(client, post_id)
+    login("21BCE0003")
+    comment(client, post_id)
+
+    assert counters(raw_db, "21BCE0001") == {"posts": 2, "comments": 0}
+    assert counters(raw_db, "21BCE0002") == {"posts": 0, "comments": 2}
+    assert raw_db.posts.find_one({"_id": ObjectId(post_id)})["comments_count"] == 3
+
+    assert client.get(f"/api/v1/posts/delete/{post_id}").status_code == 403
+    login("21BCE0001")
+    response = client.get(f"/api/v1/posts/delete/{post_id}")
+    assert response.status_code == 200, response.text
+
+    assert counters(raw_db, "21BCE0001") == {"posts": 1, "comments": 0}
+    assert counters(raw_db, "21BCE0002") == {"posts": 0, "comments": 0}
+    assert counters(raw_db, "21BCE0003") == {"posts": 0, "comments": 0}
+    assert raw_db.comments.count_documents({"post_id": post_id}) == 0
+
+
+def test_repair_fixes_drifted_counters(client, raw_db, login):
+    login("21BCE0001")
+    client.post("/api/v1/posts/create", json={"title": "Notice", "content": "Lab timings changed"})
+    raw_db.users.update_one({"regno": "21BCE0001"}, {"$set": {"posts_count": 7}})
+
+    db = ThreadedDatabase(raw_db)
+    assert asyncio.run(repair_counters(db, dry_run=True))["users"]["posts_count"] == 1
+    assert counters(raw_db, "21BCE0001")["posts"] == 7
+    asyncio.run(repair_counters(db))
+    assert counters(raw_db, "21BCE0001")["posts"] == 1
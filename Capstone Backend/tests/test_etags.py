@@ -0,0 +1,22 @@
+# tests/test_etags.py
+CLUBS = "/api/v1/club-chat/clubs/all"
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+def test_each_representation_has_its_own_tag(client):
+    page = client.get(CLUBS)
+    ndjson = client.get(CLUBS, headers=NDJSON)
+    streamed = client.get(CLUBS, params={"stream": "json"})
+
+    tags = {page.headers["etag"], ndjson.headers["etag"], streamed.headers["etag"]}
+    assert len(tags) == 3
+    assert all("Accept" in r.headers["vary"] for r in (page, ndjson, streamed))
+
+
+def test_page_tag_does_not_revalidate_the_ndjson_variant(client):
+    etag = client.get(CLUBS).headers["etag"]
+
+    assert client.get(CLUBS, headers={"If-None-Match": etag}).status_code == 304
+    response = client.get(CLUBS, headers={**NDJSON, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
@@ -0,0 +1,69 @@
+# tests/test_feed_cache.py
+import json
+from datetime import datetime
+from bson import ObjectId
+from src.feed_cache import FeedCache
+from src.pagination import NEXT_CURSOR_HEADER
+
+
+def store(cache, key, post_ids, head=False, next_cursor=None, rebuild=None,
+          after=(datetime(2024, 5, 1), ObjectId())):
+    body = [{"id": post_id} for post_id in post_ids]
+    return cache.store(key, body, post_ids, after=None if head else after,
+                       next_cursor=next_cursor, rebuild=rebuild or cache.start_rebuild())
+
+
+def test_lookup_returns_stored_page_and_cursor():
+    cache = FeedCache()
+    store(cache, "first", ["a", "b"], head=True, next_cursor="next")
+    response = cache.lookup("first")
+    assert json.loads(response.body) == [{"id": "a"}, {"id": "b"}]
+    assert response.headers[NEXT_CURSOR_HEADER] == "next"
+    assert cache.lookup("missing") is None
+
+
+def test_new_post_drops_only_first_pages():
+    cache = FeedCache()
+    store(cache, "first", ["a", "b"], head=True)
+    store(cache, "second", ["c", "d"])
+    cache.post_created()
+    assert cache.lookup("first") is None
+    assert cache.lookup("second") is not None
+
+
+def test_changed_post_drops_only_pages_holding_it():
+    cache = FeedCache()
+    store(cache, "first", ["a", "b"], head=True)
+    store(cache, "second", ["c", "d"])
+    cache.post_changed("c")
+    assert cache.lookup("first") is not None
+    assert cache.lookup("second") is None
+
+
+def test_rebuild_racing_an_invalidation_is_not_stored():
+    cache = FeedCache()
+    rebuild = cache.start_rebuild()
+    cache.post_changed("x")  # a write lands while the page is being read
+    response = store(cache, "first", ["a"], head=True, rebuild=rebuild)
+    assert json.loads(response.body) == [{"id": "a"}]  # still served to this caller
+    assert cache.lookup("first") is None
+    store(cache, "first", ["a"], head=True)
+    assert cache.lookup("first") is not None
+
+
+def test_clear_also_discards_rebuilds_in_progress():
+    cache = FeedCache()
+    rebuild = cache.start_rebuild()
+    cache.clear()
+    store(cache, "first", ["a"], head=True, rebuild=rebuild)
+    assert cache.lookup("first") is None
+
+
+def test_late_publish_drops_later_pages_it_sorts_into():
+    cache = FeedCache()
+    store(cache, "first", ["a", "b"], head=True)
+    store(cache, "second", ["c", "d"], after=(datetime(2024, 5, 1), ObjectId()))
+    cache.post_created(datetime(2024, 5, 2))  # newer than the second page: first pages only
+    assert cache.lookup("second") is not None
+    cache.post_created(datetime(2024, 4, 30))  # published late, sorts into the second page
+    assert cache.lookup("second") is None
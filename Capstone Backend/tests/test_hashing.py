@@ -0,0 +1,32 @@
+# tests/test_hashing.py
+import asyncio
+import pytest
+from src.hashing import HashingOverloaded, HashingService
+
+
+@pytest.fixture
+def service():
+    service = HashingService(workers=1, queue_limit=0, rounds=4)
+    yield service
+    service.shutdown()
+
+
+def test_only_successful_jobs_count_as_completed(service):
+    hashed = asyncio.run(service.hash("secret"))
+    assert asyncio.run(service.verify("secret", hashed))
+    with pytest.raises(ValueError):
+        asyncio.run(service._submit(int, "not a number"))
+    stats = service.stats()
+    assert (stats["completed"], stats["failed"], stats["in_flight"]) == (2, 1, 0)
+
+
+def test_jobs_beyond_the_queue_limit_are_rejected(service):
+    async def run():
+        first = asyncio.create_task(service.hash("secret"))
+        await asyncio.sleep(0)  # let it take the only slot
+        with pytest.raises(HashingOverloaded):
+            await service.hash("other")
+        await first
+
+    asyncio.run(run())
+    assert (service.rejected, service.completed) == (1, 1)
@@ -0,0 +1,127 @@
+# tests/test_moderation_providers.py
+import asyncio
+import time
+import pytest
+from src.moderation_providers import (
+    CircuitBreaker, ModerationError, ModerationProvider, ModerationUnavailable,
+    ResilientProvider, StubProvider, Verdict)
+
+FIELDS = {"content": "lab timings changed"}
+
+
+class FlakyProvider(ModerationProvider):
+    """Fails its first `failures` calls, then answers like the stub."""
+
+    name = "flaky"
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+        self.stub = StubProvider(latency_ms=0, jitter_ms=0)
+
+    async def check(self, fields: dict, timeout: float) -> Verdict:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ModerationError("provider down")
+        return await self.stub.check(fields, timeout)
+
+
+def check(provider: ResilientProvider, fields: dict = FIELDS, timeout: float = None) -> Verdict:
+    return asyncio.run(provider.check(fields, timeout))
+
+
+def test_stub_flags_marked_text_deterministically():
+    stub = StubProvider(latency_ms=20, jitter_ms=10)
+    verdict = asyncio.run(stub.check({"title": "hi", "content": "[NSFW] pics"}, 1))
+    assert (verdict.nsfw, verdict.flagged_fields) == (True, ["content"])
+    assert not asyncio.run(stub.check(FIELDS, 1)).nsfw
+    assert stub.latency_for(FIELDS) == stub.latency_for(dict(FIELDS))
+
+
+def test_failed_attempts_are_retried():
+    provider = ResilientProvider(FlakyProvider(failures=2), retries=2)
+    verdict = check(provider)
+    assert not verdict.nsfw and verdict.source == "model"
+    assert provider.counts["attempts"] == 3
+    assert provider.counts["errors"] == 2
+    assert provider.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retries_are_bounded_and_fail_closed():
+    flaky = FlakyProvider(failures=10)
+    provider = ResilientProvider(flaky, retries=1, breaker=CircuitBreaker(threshold=10))
+    with pytest.raises(ModerationUnavailable):
+        check(provider)
+    assert flaky.calls == 2
+
+
+def test_fail_open_lets_content_through_with_a_fallback_verdict():
+    provider = ResilientProvider(FlakyProvider(failures=10), retries=0, failure_policy="open")
+    verdict = check(provider)
+    assert (verdict.nsfw, verdict.source) == (False, "fallback")
+    assert provider.counts["fallbacks"] == 1
+
+
+def test_breaker_opens_after_threshold_and_is_not_retried():
+    flaky = FlakyProvider(failures=10)
+    provider = ResilientProvider(flaky, retries=3, breaker=CircuitBreaker(threshold=2, cooldown=60))
+    with pytest.raises(ModerationUnavailable):
+        check(provider)
+    assert flaky.calls == 2  # the third attempt met the open circuit and gave up
+    assert provider.breaker.stats() == {"state": "open", "consecutive_failures": 2, "trips": 1}
+
+    started = time.monotonic()
+    with pytest.raises(ModerationUnavailable):
+        check(provider)
+    assert time.monotonic() - started < 0.1  # no backoff while the circuit is open
+    assert flaky.calls == 2
+    assert provider.counts["rejected_by_breaker"] == 2
+
+
+def test_half_open_trial_closes_or_reopens_the_circuit():
+    flaky = FlakyProvider(failures=2)
+    provider = ResilientProvider(flaky, retries=0, breaker=CircuitBreaker(threshold=1, cooldown=0.05))
+    with pytest.raises(ModerationUnavailable):
+        check(provider)
+    time.sleep(0.06)
+    with pytest.raises(ModerationUnavailable):
+        check(provider)  # the trial fails: open again
+    assert provider.breaker.stats()["state"] == "open"
+    assert provider.breaker.stats()["trips"] == 2
+
+    time.sleep(0.06)
+    assert not check(provider).nsfw  # the trial succeeds: closed
+    assert provider.breaker.stats() == {"state": "closed", "consecutive_failures": 0, "trips": 2}
+
+
+def test_only_one_trial_call_while_half_open():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.record_failure()
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(ModerationUnavailable):
+        breaker.before_call()
+    breaker.record_cancelled()
+    breaker.before_call()  # a cancelled trial frees the slot
+
+
+def test_slow_attempts_time_out_and_count_as_failures():
+    slow = StubProvider(latency_ms=200, jitter_ms=0)
+    provider = ResilientProvider(slow, timeout=0.01, retries=0, breaker=CircuitBreaker(threshold=1))
+    with pytest.raises(ModerationUnavailable):
+        check(provider)
+    assert provider.counts["timeouts"] == 1
+    assert provider.breaker.state == CircuitBreaker.OPEN
+
+
+def test_overall_deadline_bounds_the_check():
+    slow = StubProvider(latency_ms=1000, jitter_ms=0)
+    provider = ResilientProvider(slow, timeout=5, retries=2, deadline=0.05)
+    started = time.monotonic()
+    with pytest.raises(ModerationUnavailable, match="deadline exceeded"):
+        check(provider)
+    assert time.monotonic() - started < 0.5
+    assert provider.counts["deadline_exceeded"] == 1
+    # Cutting the call short is not the provider's failure
+    assert provider.breaker.stats() == {"state": "closed", "consecutive_failures": 0, "trips": 0}
+    assert provider.counts["fallbacks"] == 0
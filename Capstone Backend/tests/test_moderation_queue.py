@@ -0,0 +1,238 @@
+# tests/test_moderation_queue.py
+import asyncio
+from datetime import datetime
+import mongomock
+import pytest
+from src import moderation_queue as queue_module
+from src.database import ThreadedCollection
+from src.moderation_providers import ModerationUnavailable
+from src.moderation_queue import PENDING, PUBLISHED, REJECTED, ModerationQueue
+
+
+@pytest.fixture
+def posts():
+    return ThreadedCollection(mongomock.MongoClient().prabhavit_test.posts)
+
+
+def make_queue(posts, published: list, **options) -> ModerationQueue:
+    async def on_publish(doc):
+        published.append(doc["_id"])
+
+    queue = ModerationQueue(**options)
+    queue.register("post", posts, ("title", "content"), on_publish)
+    return queue
+
+
+async def store(posts, content: str, author: str = "21BCE0001") -> dict:
+    doc = {"user_id": author, "title": "Notice", "content": content,
+           "status": PENDING, "created_at": datetime.utcnow()}
+    doc["_id"] = (await posts.insert_one(doc)).inserted_id
+    return doc
+
+
+async def status_of(posts, doc) -> dict:
+    return await posts.find_one({"_id": doc["_id"]})
+
+
+def test_sync_mode_moderates_inline(posts):
+    published = []
+    queue = make_queue(posts, published, mode="sync")
+
+    async def run():
+        ok, flagged = await store(posts, "Lab timings changed"), await store(posts, "[nsfw] pics")
+        assert await queue.submit("post", ok) == PUBLISHED
+        assert await queue.submit("post", flagged) == REJECTED
+        assert not await queue.has_pending("post", "21BCE0001")
+        return ok, flagged
+
+    ok, flagged = asyncio.run(run())
+    assert published == [ok["_id"]]
+
+
+def test_pending_items_are_published_or_rejected_by_workers(posts):
+    published = []
+    queue = make_queue(posts, published, mode="async", workers=2)
+
+    async def run():
+        await queue.start()
+        ok, flagged = await store(posts, "Lab timings changed"), await store(posts, "[nsfw] pics")
+        assert await queue.submit("post", ok) == PENDING
+        assert await queue.submit("post", flagged) == PENDING
+        assert await queue.has_pending("post", "21BCE0001")
+        assert not await queue.has_pending("post", "someone else")
+        await queue._queue.join()
+        assert not await queue.has_pending("post", "21BCE0001")
+        ok, flagged = await status_of(posts, ok), await status_of(posts, flagged)
+        await queue.stop()
+        return ok, flagged
+
+    ok, flagged = asyncio.run(run())
+    assert ok["status"] == PUBLISHED and "rejection_reason" not in ok
+    assert flagged["status"] == REJECTED and flagged["rejection_reason"] == "stub marker"
+    assert published == [ok["_id"]]
+    assert queue.processed == {PUBLISHED: 1, REJECTED: 1}
+
+
+def test_item_deleted_while_pending_is_not_published(posts):
+    published = []
+    queue = make_queue(posts, published, mode="async", workers=1)
+
+    async def run():
+        doc = await store(posts, "Lab timings changed")
+        await posts.delete_one({"_id": doc["_id"]})
+        return await queue.process("post", doc)
+
+    assert asyncio.run(run()) == PUBLISHED
+    assert published == [] and queue.processed[PUBLISHED] == 0
+
+
+def test_startup_sweeps_more_items_than_the_queue_holds(posts):
+    published = []
+    queue = make_queue(posts, published, mode="async", workers=1, queue_limit=2)
+
+    async def run():
+        docs = [await store(posts, f"Notice {number}") for number in range(5)]
+        await queue.start()
+        while await queue.has_pending("post", "21BCE0001"):
+            await asyncio.sleep(0.01)
+        docs = [await status_of(posts, doc) for doc in docs]
+        await queue.stop()
+        return docs
+
+    docs = asyncio.run(asyncio.wait_for(run(), 5))
+    assert [doc["status"] for doc in docs] == [PUBLISHED] * 5
+    assert queue.swept == 5 and len(published) == 5
+
+
+def test_full_queue_moderates_inline(posts):
+    published = []
+    queue = make_queue(posts, published, mode="async", workers=0, queue_limit=1)
+
+    async def run():
+        await queue.start()
+        queued, overflow = await store(posts, "first"), await store(posts, "second")
+        assert await queue.submit("post", queued) == PENDING
+        assert await queue.submit("post", overflow) == PUBLISHED
+        await queue.stop()
+
+    asyncio.run(run())
+    assert queue.inline == 1
+
+
+def test_failed_inline_moderation_leaves_the_item_pending_for_a_retry(posts, monkeypatch):
+    published = []
+    queue = make_queue(posts, published, mode="async", workers=0, queue_limit=1)
+    monkeypatch.setattr(queue_module, "MODERATION_RETRY_DELAY", 60)
+
+    async def unavailable(kind, doc):
+        raise ModerationUnavailable("provider down")
+
+    async def run():
+        await queue.start()
+        await queue.submit("post", await store(posts, "first"))
+        monkeypatch.setattr(queue, "check", unavailable)
+        overflow = await store(posts, "second", author="21BCE0002")
+        assert await queue.submit("post", overflow) == PENDING
+        stats = queue.stats()
+        doc = await status_of(posts, overflow)
+        await queue.stop()
+        return stats, doc
+
+    stats, doc = asyncio.run(run())
+    assert doc["status"] == PENDING
+    assert (stats["failures"], stats["retries_scheduled"]) == (1, 1)
+    assert published == []
+
+
+def test_retry_finding_the_queue_full_moderates_inline(posts, monkeypatch):
+    published = []
+    queue = make_queue(posts, published, mode="async", workers=0, queue_limit=1)
+    monkeypatch.setattr(queue_module, "MODERATION_RETRY_DELAY", 0.01)
+    original = queue.check
+
+    async def run():
+        await queue.start()
+        await queue.submit("post", await store(posts, "first"))  # fills the queue
+        monkeypatch.setattr(queue, "check", unavailable)
+        doc = await store(posts, "second", author="21BCE0002")
+        assert await queue.submit("post", doc) == PENDING
+        monkeypatch.setattr(queue, "check", original)
+        while await queue.has_pending("post", "21BCE0002"):
+            await asyncio.sleep(0.01)
+        doc = await status_of(posts, doc)
+        await queue.stop()
+        return doc
+
+    async def unavailable(kind, doc):
+        raise ModerationUnavailable("provider down")
+
+    assert asyncio.run(asyncio.wait_for(run(), 5))["status"] == PUBLISHED
+    assert queue.inline == 2 and queue.failures == 1
+
+
+def test_items_out_of_attempts_are_counted(posts, monkeypatch):
+    published = []
+    queue = make_queue(posts, published, mode="async", workers=1)
+    monkeypatch.setattr(queue_module, "MODERATION_RETRY_DELAY", 0.01)
+    monkeypatch.setattr(queue_module, "MODERATION_MAX_ATTEMPTS", 2)
+
+    async def unavailable(kind, doc):
+        raise ModerationUnavailable("provider down")
+
+    monkeypatch.setattr(queue, "check", unavailable)
+
+    async def run():
+        await store(posts, "Lab timings changed")
+        await queue.start()  # the sweep queues it
+        while not queue.abandoned:
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert (queue.failures, queue.abandoned) == (2, 1)
+
+
+def test_failed_items_are_retried_until_moderated(posts, monkeypatch):
+    published = []
+    queue = make_queue(posts, published, mode="async", workers=1)
+    monkeypatch.setattr(queue_module, "MODERATION_RETRY_DELAY", 0.01)
+    original, failures = queue.check, []
+
+    async def flaky(kind, doc):
+        if len(failures) < 2:
+            failures.append(doc["_id"])
+            raise ModerationUnavailable("provider down")
+        return await original(kind, doc)
+
+    monkeypatch.setattr(queue, "check", flaky)
+
+    async def run():
+        await queue.start()
+        doc = await store(posts, "Lab timings changed")
+        await queue.submit("post", doc)
+        while await queue.has_pending("post", "21BCE0001"):
+            await asyncio.sleep(0.01)
+        doc = await status_of(posts, doc)
+        await queue.stop()
+        return doc
+
+    assert asyncio.run(asyncio.wait_for(run(), 5))["status"] == PUBLISHED
+    assert queue.failures == 2 and len(published) == 1
+
+
+def test_only_the_author_sees_pending_and_rejected_posts_on_their_profile(client, raw_db, login):
+    author = login("21BCE0001")
+    for title, status in (("Live", PUBLISHED), ("Waiting", PENDING), ("Removed", REJECTED)):
+        raw_db.posts.insert_one({
+            "user_id": author["regno"], "title": title, "content": "...", "status": status,
+            "created_at": datetime.utcnow(), "comments_count": 0,
+            **({"rejection_reason": "stub marker"} if status == REJECTED else {})})
+
+    own = client.get(f"/api/v1/users/posts/user/{author['regno']}").json()
+    assert {post["title"]: post["status"] for post in own} == {
+        "Live": PUBLISHED, "Waiting": PENDING, "Removed": REJECTED}
+    assert [post["rejection_reason"] for post in own if post["status"] == REJECTED] == ["stub marker"]
+
+    login("21BCE0002")
+    other = client.get(f"/api/v1/users/posts/user/{author['regno']}").json()
+    assert [post["title"] for post in other] == ["Live"]
@@ -0,0 +1,46 @@
+# tests/test_pagination.py
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from src.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at, _id = datetime(2024, 5, 17, 9, 30, 15, 123000), ObjectId()
+    cursor = encode_cursor(created_at, _id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, _id)
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "", "e30", encode_cursor(datetime.utcnow(), ObjectId())[:-4]])
+def test_bad_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_pages_follow_the_next_cursor(client, login):
+    login()
+    for number in range(5):
+        response = client.post("/api/v1/posts/create",
+                               json={"title": f"Post {number}", "content": "Lab timings changed"})
+        assert response.status_code == 200, response.text
+
+    titles, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/v1/posts/all", params=params)
+        assert response.status_code == 200, response.text
+        titles += [post["title"] for post in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    assert titles == [f"Post {number}" for number in reversed(range(5))]
+
+
+def test_bad_cursor_returns_400(client, login):
+    login()
+    response = client.get("/api/v1/posts/all", params={"cursor": "garbage"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
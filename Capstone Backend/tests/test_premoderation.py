@@ -0,0 +1,61 @@
+# tests/test_premoderation.py
+import pytest
+from src.premoderation import ACCEPT, BLOCK, ESCALATE, REJECT, WATCH, PreModerator
+
+TERMS = {"porn": BLOCK, "dick pic": BLOCK, "sex": WATCH, "kill": WATCH}
+ALLOWLIST = {"thanks", "great post", "Congrats!"}
+
+
+@pytest.fixture
+def premoderator():
+    return PreModerator(terms=TERMS, allowlist=ALLOWLIST)
+
+
+def decide(premoderator, text):
+    return premoderator.classify({"content": text})
+
+
+@pytest.mark.parametrize("text", ["free PORN here", "p0rn", "Pórn clips", "send a dick pic"])
+def test_whole_word_block_term_rejects(premoderator, text):
+    decision, flagged, reason = decide(premoderator, text)
+    assert (decision, flagged) == (REJECT, ["content"])
+    assert "blocked term" in reason
+
+
+@pytest.mark.parametrize("text", ["Thanks", "thanks!!", "GREAT post.", "congrats", "", "   ", "🎉🎉", "!!!"])
+def test_allowlisted_or_wordless_text_is_accepted(premoderator, text):
+    assert decide(premoderator, text) == (ACCEPT, [], None)
+
+
+@pytest.mark.parametrize("text", [
+    # Abusive text the term list does not cover still goes to the model
+    "you are worthless and everyone hates you",
+    "nobody wants you here, just leave",
+    "go back to where you came from",
+    "I know where you live",
+    # Ordinary text that is not allowlisted
+    "Essex trip photos are up",
+    "thanks, see you at the lab",
+])
+def test_anything_else_is_escalated(premoderator, text):
+    decision, flagged, reason = decide(premoderator, text)
+    assert (decision, flagged, reason) == (ESCALATE, ["content"], "content: not allowlisted")
+
+
+def test_terms_only_match_whole_words(premoderator):
+    # Inside a longer word a block term escalates rather than rejects
+    assert decide(premoderator, "pornography lecture")[0] == ESCALATE
+    assert decide(premoderator, "Sussex campus visit")[2] == "content: not allowlisted"
+    assert decide(premoderator, "sex education talk")[2] == "content: watch term 'sex'"
+
+
+def test_obfuscated_terms_and_links_are_escalated_with_a_reason(premoderator):
+    assert decide(premoderator, "p.o.r.n")[2] == "content: obfuscated term"
+    assert decide(premoderator, "see example.xyz")[2] == "content: link"
+
+
+def test_fields_combine(premoderator):
+    assert premoderator.classify({"title": "thanks", "content": "great post"})[0] == ACCEPT
+    assert premoderator.classify({"title": "thanks", "content": "lab at 5"}) == (
+        ESCALATE, ["content"], "content: not allowlisted")
+    assert premoderator.classify({"title": "lab at 5", "content": "porn"})[:2] == (REJECT, ["content"])
@@ -0,0 +1,42 @@
+# tests/test_query_counts.py
+"""
+Database commands per request must not grow with the size of the list a
+response covers; growth means an N+1 query pattern crept back in.
+"""
+from src.auth import create_jwt_token
+from src.dependencies import user_cache
+
+# Below PAGE_SIZE, so every seeded item is in the response
+SIZES = (3, 12, 40)
+
+ENDPOINTS = (
+    "/api/v1/users/posts/user/BENCH0000",
+    "/api/v1/users/comments/user/{owner}",
+    "/api/v1/club-chat/{club_id}/participants",
+    "/api/v1/club-chat/{club_id}/pending",
+)
+
+
+def commands_per_request(client, seed_lists, command_counter, size: int) -> dict:
+    ids = seed_lists(size)
+    user_cache.clear()
+    client.cookies.set("access_token", create_jwt_token(
+        {"regno": "BENCH0000", "email": "u0@vitbhopal.ac.in"}))
+    counts = {}
+    for endpoint in ENDPOINTS:
+        path = endpoint.format(**ids)
+        client.get(path)  # warms the user cache, so only the handler's queries count
+        command_counter.reset()
+        response = client.get(path)
+        assert response.status_code == 200, (path, response.text)
+        counts[endpoint] = (command_counter.total(), len(response.json()))
+    return counts
+
+
+def test_commands_per_request_do_not_grow_with_list_size(client, seed_lists, command_counter):
+    results = {size: commands_per_request(client, seed_lists, command_counter, size) for size in SIZES}
+    for endpoint in ENDPOINTS:
+        commands = [results[size][endpoint][0] for size in SIZES]
+        items = [results[size][endpoint][1] for size in SIZES]
+        assert items[0] < items[-1], f"{endpoint}: seeding did not grow the response"
+        assert len(set(commands)) == 1, f"{endpoint}: commands {commands} for sizes {SIZES}"
@@ -1,6 +1,7 @@
 import { useState, useEffect } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import axios from "axios";
+import { fetchPage } from "../pagination";
 import {
     Button,
     Card,
@@ -34,6 +35,8 @@ const ClubChat = () => {
     const navigate = useNavigate();
     const [isAdmin, setIsAdmin] = useState(false);
     const [posts, setPosts] = useState([]);
+    const [olderCursor, setOlderCursor] = useState(null); // Cursor of the next older page, if any
+    const [loadingOlder, setLoadingOlder] = useState(false);
     const [pendingRequests, setPendingRequests] = useState([]);
     const [newPost, setNewPost] = useState({ title: "", content: "" });
     const [showPostDialog, setShowPostDialog] = useState(false);
@@ -95,11 +98,14 @@ const ClubChat = () => {
     const fetchPosts = async () => {
         try {
             setLoading(true);
-            const response = await axios.get(
+            // Newest page first; older pages are prepended by fetchOlderPosts
+            const page = await fetchPage(
                 `https://prabhavit-project-backend.onrender.com/api/v1/club-chat/${clubId}/posts`,
+                null,
                 { withCredentials: true }
             );
-            setPosts(Array.isArray(response.data) ? response.data : []);
+            setPosts(page.items);
+            setOlderCursor(page.cursor);
         } catch (error) {
             setError("Failed to load posts: " + error.response?.data?.detail || error.message);
         } finally {
@@ -107,6 +113,24 @@ const ClubChat = () => {
         }
     };
 
+    const fetchOlderPosts = async () => {
+        try {
+            setLoadingOlder(true);
+            const page = await fetchPage(
+                `https://prabhavit-project-backend.onrender.com/api/v1/club-chat/${clubId}/posts`,
+                olderCursor,
+                { withCredentials: true }
+            );
+            // Each page is oldest to newest, so older pages go in front
+            setPosts((prevPosts) => [...page.items, ...prevPosts]);
+            setOlderCursor(page.cursor);
+        } catch (error) {
+            setError("Failed to load older posts: " + error.response?.data?.detail || error.message);
+        } finally {
+            setLoadingOlder(false);
+        }
+    };
+
     const fetchPendingRequests = async () => {
         try {
             const response = await axios.get(
@@ -313,6 +337,16 @@ const ClubChat = () => {
 
             {/* Posts List */}
             <Box sx={{ display: 'flex', flexDirection: 'column', gap: 2 }}>
+                {olderCursor && (
+                    <Button
+                        variant="outlined"
+                        onClick={fetchOlderPosts}
+                        disabled={loadingOlder}
+                        sx={{ alignSelf: 'center' }}
+                    >
+                        {loadingOlder ? "Loading..." : "Load older posts"}
+                    </Button>
+                )}
                 {posts.length > 0 ? (
                     posts.map((post) => (
                         <Card key={post.id} sx={{
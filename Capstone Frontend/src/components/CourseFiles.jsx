@@ -1,13 +1,15 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { Box, Typography, List, ListItem, ListItemText, IconButton, Divider } from '@mui/material';
+import { Box, Typography, List, ListItem, ListItemText, IconButton, Divider, Button } from '@mui/material';
 import { FaFileAlt, FaDownload, FaUpload } from 'react-icons/fa';
 import { Home, Groups, MenuBook, Bookmark, Comment, GroupAdd } from "@mui/icons-material";
 import axios from 'axios';
+import { fetchPage } from '../pagination';
 
 const CourseFiles = () => {
   const { courseId } = useParams();
   const [files, setFiles] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null); // Cursor of the next (older) page, if any
   const [courseName, setCourseName] = useState('');
   const navigate = useNavigate();
   const backendURL = "https://prabhavit-project-backend.onrender.com";
@@ -15,17 +17,18 @@ const CourseFiles = () => {
   useEffect(() => {
     const fetchCourseFiles = async () => {
       try {
-        const filesResponse = await axios.get(`${backendURL}/api/v1/files/course/${courseId}`, {
+        const page = await fetchPage(`${backendURL}/api/v1/files/course/${courseId}`, null, {
           withCredentials: true
         });
-        console.log(filesResponse.data);
+        console.log(page.items);
         const courseResponse = await axios.get(`${backendURL}/api/v1/courses/all`, {
           withCredentials: true
         });
 
         const course = courseResponse.data.find(c => c.id === courseId);
         setCourseName(course?.name || 'Course');
-        setFiles(filesResponse.data);
+        setFiles(page.items);
+        setNextCursor(page.cursor);
       } catch (error) {
         console.error("Error fetching course files:", error);
       }
@@ -34,6 +37,18 @@ const CourseFiles = () => {
     fetchCourseFiles();
   }, [courseId]);
 
+  const fetchMoreFiles = async () => {
+    try {
+      const page = await fetchPage(`${backendURL}/api/v1/files/course/${courseId}`, nextCursor, {
+        withCredentials: true
+      });
+      setFiles((prevFiles) => [...prevFiles, ...page.items]);
+      setNextCursor(page.cursor);
+    } catch (error) {
+      console.error("Error fetching more course files:", error);
+    }
+  };
+
   const handleDownload = (fileUrl) => {
     window.open(fileUrl, '_blank');
   };
@@ -143,6 +158,13 @@ const CourseFiles = () => {
               ))}
             </List>
           )}
+          {nextCursor && (
+            <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+              <Button variant="outlined" onClick={fetchMoreFiles}>
+                Load more
+              </Button>
+            </Box>
+          )}
         </Box>
       </Box>
     </div>
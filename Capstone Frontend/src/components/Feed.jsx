@@ -4,10 +4,12 @@ import { AppBar, Toolbar, Typography, Button, Card, CardContent, CardActions, Ic
 import { ThumbUp, Comment, Close, Home, TrendingUp, Groups, AddCircle, Bookmark, Report, ExpandMore, MenuBook, Delete } from "@mui/icons-material";
 import { useNavigate } from "react-router-dom";
 import axios from "axios";
+import { fetchPage } from "../pagination";
 
 export default function PostsWindow() {
     const navigate = useNavigate();
     const [posts, setPosts] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null); // Cursor of the next (older) page, if any
     const [currentUserId, setCurrentUserId] = useState(null);
     const [showModal, setShowModal] = useState(false);
     const [newPost, setNewPost] = useState({
@@ -43,19 +45,16 @@ export default function PostsWindow() {
             // Set token in cookie
             document.cookie = `access_token=${token}; path=/; max-age=3600; samesite=lax;`;
 
-            const response = await axios.get("https://prabhavit-project-backend.onrender.com/api/v1/posts/all", { withCredentials: true });
+            // Posts arrive with their comment counts and newest comments in one request
+            const page = await fetchPage("https://prabhavit-project-backend.onrender.com/api/v1/posts/feed", null, { withCredentials: true });
             console.log("Token being sent:", token);
-            const postsWithComments = await Promise.all(
-                response.data.map(async (post) => {
-                    console.log(post)
-                    const commentsResponse = await axios.get(
-                        `https://prabhavit-project-backend.onrender.com/api/v1/posts/comments/${post.id}`, { withCredentials: true }
-                    );
-                    return { ...post, comments: commentsResponse.data };
-                })
-            );
+            const postsWithComments = page.items.map((post) => ({
+                ...post,
+                comments: post.recent_comments
+            }));
             console.log("Processed Posts with Comments:", postsWithComments);
             setPosts(postsWithComments);
+            setNextCursor(page.cursor);
         } catch (error) {
             setErrorMessage(error.response?.data?.detail || "Error fetching posts");
             setShowErrorModal(true);
@@ -63,10 +62,26 @@ export default function PostsWindow() {
         }
     };
 
+    const fetchMorePosts = async () => {
+        try {
+            const page = await fetchPage("https://prabhavit-project-backend.onrender.com/api/v1/posts/feed", nextCursor, { withCredentials: true });
+            const postsWithComments = page.items.map((post) => ({
+                ...post,
+                comments: post.recent_comments
+            }));
+            setPosts((prevPosts) => [...prevPosts, ...postsWithComments]);
+            setNextCursor(page.cursor);
+        } catch (error) {
+            setErrorMessage(error.response?.data?.detail || "Error fetching posts");
+            setShowErrorModal(true);
+            console.error("Error fetching more posts:", error);
+        }
+    };
+
     const addPost = async () => {
         try {
             const token = document.cookie.split('access_token=')[1]?.split(';')[0];
-            await axios.post("https://prabhavit-project-backend.onrender.com/api/v1/posts/create",
+            const response = await axios.post("https://prabhavit-project-backend.onrender.com/api/v1/posts/create",
                 newPost,
                 {
                     headers: {
@@ -77,7 +92,11 @@ export default function PostsWindow() {
             );
             setNewPost({ title: "", content: "" });
             setShowModal(false);
-            await fetchPosts();
+            // Patch the loaded pages instead of reloading them, so "Load more" pages survive
+            setPosts((prevPosts) => [
+                { ...response.data, comments: [], comments_count: 0 },
+                ...prevPosts
+            ]);
         } catch (error) {
             setErrorMessage(error.response?.data?.detail || "Error creating post");
             setShowErrorModal(true);
@@ -88,7 +107,7 @@ export default function PostsWindow() {
     const addComment = async (postId) => {
         try {
             const token = document.cookie.split('access_token=')[1]?.split(';')[0];
-            await axios.post("https://prabhavit-project-backend.onrender.com/api/v1/comment/create",
+            const response = await axios.post("https://prabhavit-project-backend.onrender.com/api/v1/comment/create",
                 {
                     post_id: postId,
                     content: newComment
@@ -101,7 +120,15 @@ export default function PostsWindow() {
                 }
             );
             setNewComment("");
-            await fetchPosts();
+            setPosts((prevPosts) => prevPosts.map((post) =>
+                post.id === postId
+                    ? {
+                        ...post,
+                        comments: [...(post.comments || []), response.data],
+                        comments_count: (post.comments_count || 0) + 1
+                    }
+                    : post
+            ));
         } catch (error) {
             setErrorMessage(error.response?.data?.detail || "Error adding comment");
             setShowErrorModal(true);
@@ -118,7 +145,7 @@ export default function PostsWindow() {
                 },
                 withCredentials: true
             });
-            await fetchPosts();
+            setPosts((prevPosts) => prevPosts.filter((post) => post.id !== postId));
         } catch (error) {
             setErrorMessage(error.response?.data?.detail || "Error deleting post");
             setShowErrorModal(true);
@@ -135,7 +162,15 @@ export default function PostsWindow() {
                 },
                 withCredentials: true
             });
-            await fetchPosts();
+            setPosts((prevPosts) => prevPosts.map((post) =>
+                post.id === postId
+                    ? {
+                        ...post,
+                        comments: (post.comments || []).filter((comment) => comment.id !== commentId),
+                        comments_count: Math.max((post.comments_count || 0) - 1, 0)
+                    }
+                    : post
+            ));
         } catch (error) {
             setErrorMessage(error.response?.data?.detail || "Error deleting comment");
             setShowErrorModal(true);
@@ -143,6 +178,25 @@ export default function PostsWindow() {
         }
     };
 
+    // The feed only carries the newest comments; fetch the rest when asked
+    const fetchAllComments = async (postId) => {
+        try {
+            const response = await axios.get(`https://prabhavit-project-backend.onrender.com/api/v1/posts/comments/${postId}`, {
+                withCredentials: true
+            });
+            const comments = response.data
+                .map((comment) => ({ ...comment, id: comment.id || comment._id }))
+                .sort((a, b) => new Date(a.created_at) - new Date(b.created_at));
+            setPosts((prevPosts) => prevPosts.map((post) =>
+                post.id === postId ? { ...post, comments, allComments: true } : post
+            ));
+        } catch (error) {
+            setErrorMessage(error.response?.data?.detail || "Error fetching comments");
+            setShowErrorModal(true);
+            console.error("Error fetching comments:", error);
+        }
+    };
+
     const toggleCommentForm = (postId) => {
         setActiveCommentForm(activeCommentForm === postId ? null : postId);
     };
@@ -348,7 +402,7 @@ export default function PostsWindow() {
                                                 fontWeight: 'bold',
                                                 color: '#666'
                                             }}>
-                                                Comments ({post.comments?.length || 0})
+                                                Comments ({post.comments_count || 0})
                                             </Typography>
                                             <Button
                                                 startIcon={<Comment />}
@@ -402,7 +456,7 @@ export default function PostsWindow() {
                                                 <IconButton
                                                     className="comment-delete"
                                                     size="small"
-                                                    onClick={() => deleteComment(post.id, comment._id)}
+                                                    onClick={() => deleteComment(post.id, comment.id)}
                                                     sx={{
                                                         position: 'absolute',
                                                         right: 8,
@@ -418,9 +472,21 @@ export default function PostsWindow() {
                                                 </IconButton>
                                             </Box>
                                         ))}
+                                        {!post.allComments && (post.comments_count || 0) > (post.comments?.length || 0) && (
+                                            <Button size="small" onClick={() => fetchAllComments(post.id)} sx={{ color: '#1976d2' }}>
+                                                Show all {post.comments_count} comments
+                                            </Button>
+                                        )}
                                     </Box>
                                 </Card>
                             ))}
+                            {nextCursor && (
+                                <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                                    <Button variant="outlined" onClick={fetchMorePosts}>
+                                        Load more
+                                    </Button>
+                                </Box>
+                            )}
                         </Grid>
                     </Grid>
                 </Box>
@@ -4,6 +4,7 @@ import { AppBar, Toolbar, Typography, Button, Card, CardContent, IconButton, Box
 import { Home, TrendingUp, Groups, MenuBook, Bookmark } from "@mui/icons-material";
 import { useNavigate, useParams } from "react-router-dom";
 import axios from "axios";
+import { fetchPage } from "../pagination";
 import "../styles/Profile.css";
 
 export default function ProfilePage() {
@@ -21,6 +22,9 @@ export default function ProfilePage() {
     const [userPosts, setUserPosts] = useState([]);
     const [userActivity, setUserActivity] = useState([]);
     const [userComments, setUserComments] = useState([]);
+    // Cursors of the next (older) pages, if any
+    const [postsCursor, setPostsCursor] = useState(null);
+    const [commentsCursor, setCommentsCursor] = useState(null);
 
     useEffect(() => {
         if (user_id) {
@@ -30,7 +34,31 @@ export default function ProfilePage() {
         }
     }, [user_id]);
 
-    const fetchUserPosts = async () => {
+    // Activity is rebuilt from every loaded page of posts and comments, newest first
+    const toActivity = (posts, comments) => [
+        ...posts.map(post => ({
+            id: post.id,
+            type: "post",
+            post: post.title,
+            created_at: post.created_at,
+            date: new Date(post.created_at).toLocaleDateString(),
+            content: post.content
+        })),
+        ...comments.map(comment => ({
+            id: comment.id,
+            type: "comment",
+            post: comment.post_title || "Unknown Post",
+            content: comment.content,
+            created_at: comment.created_at,
+            date: new Date(comment.created_at).toLocaleDateString()
+        }))
+    ].sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+
+    useEffect(() => {
+        setUserActivity(toActivity(userPosts, userComments));
+    }, [userPosts, userComments]);
+
+    const fetchUserPosts = async (cursor = null) => {
         try {
             // Changed: First get user data to get regno
             const userResponse = await axios.get(
@@ -40,56 +68,30 @@ export default function ProfilePage() {
             const regno = userResponse.data.regno;
 
             // Use regno instead of user_id
-            const response = await axios.get(
+            const page = await fetchPage(
                 `https://prabhavit-project-backend.onrender.com/api/v1/users/posts/user/${regno}`,
+                cursor,
                 { withCredentials: true }
             );
-            setUserPosts(response.data);
-            console.log("User Posts:", response.data);
-            const postActivity = response.data.map(post => ({
-                id: post.id,
-                type: "post",
-                post: post.title,
-                date: new Date(post.created_at).toLocaleDateString(),
-                content: post.content
-            }));
-            setUserActivity(postActivity);
+            setUserPosts(prevPosts => cursor ? [...prevPosts, ...page.items] : page.items);
+            setPostsCursor(page.cursor);
+            console.log("User Posts:", page.items);
         } catch (error) {
             console.error("Error fetching user posts:", error);
         }
     };
 
-    const fetchUserComments = async () => {
+    const fetchUserComments = async (cursor = null) => {
         try {
-            const userResponse = await axios.get(
-                `https://prabhavit-project-backend.onrender.com/api/v1/users/${user_id}`,
-                { withCredentials: true }
-            );
-            const regno = userResponse.data.regno;
-
-            const response = await axios.get(
+            const page = await fetchPage(
                 `https://prabhavit-project-backend.onrender.com/api/v1/users/comments/user/${user_id}`,
+                cursor,
                 { withCredentials: true }
             );
-            console.log("Comments response:", response.data); // Debug log
-
-            setUserComments(response.data);
+            console.log("Comments response:", page.items); // Debug log
 
-            const commentActivity = response.data.map(comment => ({
-                id: comment.id,
-                type: "comment",
-                post: comment.post_title || "Unknown Post",
-                content: comment.content,
-                date: new Date(comment.created_at).toLocaleDateString()
-            }));
-
-            setUserActivity(prevActivity => {
-                // Get only the post activities from previous state
-                const postActivities = prevActivity.filter(act => act.type === "post");
-                // Combine and sort all activities
-                const allActivities = [...postActivities, ...commentActivity];
-                return allActivities.sort((a, b) => new Date(b.date) - new Date(a.date));
-            });
+            setUserComments(prevComments => cursor ? [...prevComments, ...page.items] : page.items);
+            setCommentsCursor(page.cursor);
         } catch (error) {
             console.error("Error fetching user comments:", error);
             console.error("Error details:", error.response?.data);
@@ -343,6 +345,17 @@ export default function ProfilePage() {
                                         userPosts.map((post) => (
                                             <Paper key={post.id} className="post-item" elevation={1}>
                                                 <Typography variant="h6">{post.title}</Typography>
+                                                {/* Only the author is sent their pending and rejected posts */}
+                                                {post.status && post.status !== "published" && (
+                                                    <Chip
+                                                        size="small"
+                                                        color={post.status === "rejected" ? "error" : "warning"}
+                                                        label={post.status === "rejected"
+                                                            ? `Rejected${post.rejection_reason ? `: ${post.rejection_reason}` : ""}`
+                                                            : "Pending review"}
+                                                        sx={{ mb: 1 }}
+                                                    />
+                                                )}
                                                 <Typography variant="body2">{post.content}</Typography>
                                                 <Box display="flex" justifyContent="space-between" mt={1}>
                                                     <Typography variant="body2" color="textSecondary">
@@ -359,6 +372,13 @@ export default function ProfilePage() {
                                             No posts yet
                                         </Typography>
                                     )}
+                                    {postsCursor && (
+                                        <Box display="flex" justifyContent="center" mt={2}>
+                                            <Button variant="outlined" onClick={() => fetchUserPosts(postsCursor)}>
+                                                Load more posts
+                                            </Button>
+                                        </Box>
+                                    )}
                                 </div>
                             )}
 
@@ -392,6 +412,19 @@ export default function ProfilePage() {
                                             No activity yet
                                         </Typography>
                                     )}
+                                    {(postsCursor || commentsCursor) && (
+                                        <Box display="flex" justifyContent="center" mt={2}>
+                                            <Button
+                                                variant="outlined"
+                                                onClick={() => {
+                                                    if (postsCursor) fetchUserPosts(postsCursor);
+                                                    if (commentsCursor) fetchUserComments(commentsCursor);
+                                                }}
+                                            >
+                                                Load more activity
+                                            </Button>
+                                        </Box>
+                                    )}
                                 </div>
                             )}
 
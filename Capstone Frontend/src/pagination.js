@@ -0,0 +1,11 @@
+import axios from "axios";
+
+// List endpoints return one page at a time, newest first; the cursor for
+// the next page comes back in the X-Next-Cursor header (absent on the last page).
+export const nextCursor = (response) => response.headers["x-next-cursor"] || null;
+
+export const fetchPage = async (url, cursor, config = {}) => {
+    const params = cursor ? { ...config.params, cursor } : config.params;
+    const response = await axios.get(url, { ...config, params });
+    return { items: Array.isArray(response.data) ? response.data : [], cursor: nextCursor(response) };
+};